@@ -0,0 +1,90 @@
+# azure_model/azure_stub.py
+"""
+Local stand-in for ``DocumentIntelligenceClient``.
+
+Lets us exercise the scheduler (429s, Retry-After), hedging (slow calls) and
+warm-up code without touching the real Azure resource:
+
+    stub = StubDocumentIntelligenceClient(throttle_first=3, retry_after=0.2)
+    result = analyze(stub, "ordonnance", open("scan.pdf", "rb"))
+"""
+import time
+import threading
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+
+class StubHttpResponseError(Exception):
+    """Mimics ``azure.core.exceptions.HttpResponseError`` (status_code + response.headers)."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+        super().__init__(f"Stub Azure error {status_code}")
+        self.status_code = status_code
+        self.response    = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class _Poller:
+    def __init__(self, result, delay: float):
+        self._result = result
+        self._delay  = delay
+
+    def result(self):
+        if self._delay:
+            time.sleep(self._delay)
+        return self._result
+
+
+def empty_result() -> SimpleNamespace:
+    """Smallest object shaped like an ``AnalyzeResult`` that our parsers accept."""
+    return SimpleNamespace(
+        documents=[SimpleNamespace(doc_type="stub", confidence=1.0, fields={})],
+        tables=[],
+        pages=[],
+    )
+
+
+class StubDocumentIntelligenceClient:
+    """
+    Fake client.
+
+    * ``throttle_first``  – answer the first N calls with HTTP 429.
+    * ``throttle_every``  – additionally answer every Nth call with 429.
+    * ``retry_after``     – value of the Retry-After header on 429s (None → omitted).
+    * ``delay``           – seconds ``poller.result()`` sleeps (latency injection).
+    * ``fail_with``       – status code to raise on every call (availability outage).
+    * ``result_factory``  – builds the returned result; defaults to ``empty_result``.
+    """
+
+    def __init__(
+        self,
+        throttle_first: int = 0,
+        throttle_every: int = 0,
+        retry_after: Optional[float] = 1.0,
+        delay: float = 0.0,
+        fail_with: Optional[int] = None,
+        result_factory: Callable[[], object] = empty_result,
+    ):
+        self.throttle_first = throttle_first
+        self.throttle_every = throttle_every
+        self.retry_after    = retry_after
+        self.delay          = delay
+        self.fail_with      = fail_with
+        self.result_factory = result_factory
+        self.calls          = 0
+        self.throttled      = 0
+        self._lock          = threading.Lock()
+
+    def begin_analyze_document(self, model_id: str, body=None, pages: Optional[str] = None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        if self.fail_with is not None:
+            raise StubHttpResponseError(self.fail_with)
+        if n <= self.throttle_first or (self.throttle_every and n % self.throttle_every == 0):
+            with self._lock:
+                self.throttled += 1
+            raise StubHttpResponseError(429, self.retry_after)
+        if body is not None and hasattr(body, "read"):
+            body.read()
+        return _Poller(self.result_factory(), self.delay)
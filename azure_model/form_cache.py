@@ -0,0 +1,132 @@
+# azure_model/form_cache.py
+"""
+Form-classification cache keyed by a perceptual hash of the page-1 header band.
+
+Scans of the same form print the same header, so its 256-bit dHash lands
+within a few bits of the previous scans' hashes. classify_form asks the cache
+first: a hit returns the stored label, a miss runs the ORB template match
+and stores its label. A small share of hits (FORM_CACHE_VERIFY_RATE) is
+re-classified with ORB anyway, which gives the false-hit rate reported by
+stats() and replaces any entry that was wrong. The hit rate in stats() only
+counts labels returned without running ORB (verified hits are misses there).
+
+With FORM_CACHE_PATH set, entries are kept in a JSON file: loaded at start,
+rewritten every SAVE_EVERY new labels and at exit.
+"""
+import os
+import json
+import atexit
+import random
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .phash import HashCache, dhash
+from .templates import HEADER_FRAC
+
+HASH_SIZE    = 16       # dHash side → 256-bit hashes
+MAXSIZE      = int(os.getenv("FORM_CACHE_SIZE", "2048"))
+MAX_DISTANCE = int(os.getenv("FORM_CACHE_MAX_DISTANCE", "24"))       # of 256 bits
+VERIFY_RATE  = float(os.getenv("FORM_CACHE_VERIFY_RATE", "0.02"))
+CACHE_PATH   = os.getenv("FORM_CACHE_PATH")
+SAVE_EVERY   = 32
+
+
+def header_hash(gray: np.ndarray, frac: float = HEADER_FRAC) -> int:
+    """dHash of the top `frac` of a page (downscaled inside dhash)."""
+    band = gray[: max(1, int(gray.shape[0] * frac))]
+    return dhash(band, size=HASH_SIZE)
+
+
+class FormCache:
+    def __init__(self, maxsize: int = MAXSIZE, max_distance: int = MAX_DISTANCE,
+                 verify_rate: float = VERIFY_RATE, path: Optional[str] = None):
+        self.entries     = HashCache(maxsize=maxsize, max_distance=max_distance)
+        self.verify_rate = verify_rate
+        self.path        = Path(path) if path else None
+        self.hits        = 0
+        self.misses      = 0
+        self.verified    = 0
+        self.false_hits  = 0
+        self._unsaved    = 0
+        self._lock       = threading.Lock()
+        if self.path and self.path.exists():
+            self.load()
+
+    def lookup(self, h: int) -> Optional[str]:
+        found = self.entries.lookup(h, count=False)
+        return found[1] if found else None
+
+    def tally(self, hit: bool) -> None:
+        """Count one classification: a hit when the cached label was used without ORB."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def should_verify(self) -> bool:
+        return random.random() < self.verify_rate
+
+    def record(self, h: int, label: str) -> None:
+        """Store the ORB label of a miss."""
+        self.entries.put(h, label)
+        with self._lock:
+            self._unsaved += 1
+            due = self.path is not None and self._unsaved >= SAVE_EVERY
+        if due:
+            self.save()
+
+    def confirm(self, h: int, cached: str, orb_label: str) -> None:
+        """Compare a hit with ORB's answer; a wrong entry is replaced by ORB's label."""
+        with self._lock:
+            self.verified += 1
+            wrong = cached != orb_label
+            if wrong:
+                self.false_hits += 1
+        if wrong:
+            logging.warning("Form cache false hit: cached %r, ORB says %r", cached, orb_label)
+            self.record(h, orb_label)
+
+    # ── Persistence ──
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+            if data.get("hash_size") != HASH_SIZE:
+                return
+            for hex_hash, label in data["entries"]:
+                self.entries.put(int(hex_hash, 16), label)
+            logging.info("▷ form cache: %d entr(ies) loaded from %s", len(self.entries), self.path)
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning("Could not load form cache %s: %s", self.path, e)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            self._unsaved = 0
+        data = {"hash_size": HASH_SIZE, "entries": [[f"{h:x}", label] for h, label in self.entries.items()]}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.warning("Could not save form cache %s: %s", self.path, e)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        out = {"size": len(self.entries), "maxsize": self.entries.maxsize, "hits": self.hits,
+               "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+        out.update(verified=self.verified, false_hits=self.false_hits,
+                   false_hit_rate=self.false_hits / self.verified if self.verified else 0.0,
+                   max_distance=self.entries.max_distance, persisted=str(self.path) if self.path else None)
+        return out
+
+
+form_cache = FormCache(path=CACHE_PATH)
+if form_cache.path:
+    atexit.register(form_cache.save)
@@ -0,0 +1,35 @@
+# azure_model/hedge.py
+"""
+Latency-budget helpers for hedged Azure calls.
+
+The budget of a hedged call has to start when a worker actually picks it up:
+time spent waiting for a free pool thread is not Azure being slow, and firing
+the local fallback then would still leave the queued Azure call to run (and
+be billed) afterwards.
+"""
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Optional, Tuple
+
+
+def submit_started(pool: Executor, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Future, threading.Event]:
+    """Submit ``fn`` to ``pool``; the returned event is set once a worker starts it."""
+    started = threading.Event()
+
+    def run():
+        started.set()
+        return fn(*args, **kwargs)
+
+    future = pool.submit(run)
+    # a cancelled future (pool shut down) never runs, don't leave waiters hanging
+    future.add_done_callback(lambda _: started.set())
+    return future, started
+
+
+def result_within(future: Future, started: threading.Event, budget: Optional[float]) -> Any:
+    """
+    ``future.result(timeout=budget)`` with the budget counted from the moment a
+    worker started the call. Raises ``concurrent.futures.TimeoutError`` on overrun.
+    """
+    started.wait()
+    return future.result(timeout=budget)
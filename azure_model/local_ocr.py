@@ -0,0 +1,216 @@
+# azure_model/local_ocr.py
+"""
+Local (Tesseract) zonal OCR used when Azure is slow or unavailable.
+
+Instead of producing the final dicts itself, this module builds a small
+object shaped like an Azure ``AnalyzeResult`` (``documents[0].fields`` +
+``tables``) from the known form layouts, so the very same field mapping in
+``pipeline.bulletin_from_result`` / ``prescription_from_result`` produces the
+response. Only the key fields are recovered:
+
+  * bulletins:      id_unique, assured/patient names, birth date, address
+  * prescriptions:  the 8-column item table + beneficiary / patient / date
+"""
+import re
+import string
+import logging
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+from pdf2image import convert_from_path
+
+LOCAL_DPI = 250
+LANG      = "fra"
+
+# (y0, y1) page fractions of the bands we OCR – tuned on the CNAM forms in assets/
+BULLETIN_BAND      = (0.08, 0.62)
+PRESCRIPTION_META  = (0.00, 0.50)
+PRESCRIPTION_TABLE = (0.40, 0.98)       # fallback when no ruled grid is detected
+
+DATE_RE = re.compile(r"(\d{1,2}[\/\.-]\d{1,2}[\/\.-]\d{2,4})")
+
+# label regex → field name. Labels that appear twice on the bulletin (assuré then
+# malade) map to a pair: first hit fills the first field, second hit the second.
+BULLETIN_LABELS: List[Tuple[re.Pattern, Tuple[str, ...]]] = [
+    (re.compile(r"identifiant\s*unique\s*[:.]?\s*(.*)", re.I),          ("id_unique",)),
+    (re.compile(r"r[ée]f\.?\s*dossier\s*[:.]?\s*(.*)", re.I),            ("id_dossier",)),
+    (re.compile(r"\bpr[ée]nom\s*[:.]?\s*(.*)", re.I),                    ("prenom_assure", "prenom_malade")),
+    (re.compile(r"\bnom\b(?!\s*et)\s*[:.]?\s*(.*)", re.I),               ("nom_assure", "nom_malade")),
+    (re.compile(r"adresse\s*[:.]?\s*(.*)", re.I),                        ("adresse_assure",)),
+    (re.compile(r"code\s*postal\s*[:.]?\s*(.*)", re.I),                  ("code_postal",)),
+    (re.compile(r"date\s*de\s*naissance\s*[:.]?\s*(.*)", re.I),          ("date_naissance_malade",)),
+    (re.compile(r"t[ée]l[ée]?phone\s*[:.]?\s*(.*)|\btel\b\s*[:.]?\s*(.*)", re.I), ("telephone",)),
+]
+
+PRESCRIPTION_LABELS: List[Tuple[re.Pattern, Tuple[str, ...]]] = [
+    (re.compile(r"b[ée]n[ée]ficiaire\s*[:.]?\s*(.*)", re.I),             ("id_unique",)),
+    (re.compile(r"identit[ée]\s*du\s*malade\s*[:.]?\s*(.*)", re.I),      ("nom_prenom",)),
+    (re.compile(r"prescripteur\s*[:.]?\s*(.*)", re.I),                   ("code_apci",)),
+    (re.compile(r"date\s*de\s*la\s*prescription\s*[:.]?\s*(.*)", re.I),  ("date",)),
+    (re.compile(r"r[ée]gime\s*[:.]?\s*(.*)", re.I),                      ("regime",)),
+    (re.compile(r"date\s*de\s*dispensation\s*[:.]?\s*(.*)", re.I),       ("date_numero",)),
+]
+
+ITEM_COLUMNS = 8
+
+
+# ─── Rendering / OCR helpers ─────────────────────────────────────────────────
+
+def first_page_number(pages: Optional[str]) -> int:
+    """'3-4,7' → 3; None → 1."""
+    if not pages:
+        return 1
+    m = re.match(r"\s*(\d+)", pages)
+    return int(m.group(1)) if m else 1
+
+
+def render_page(path: str, page_no: int = 1, dpi: int = LOCAL_DPI) -> np.ndarray:
+    if path.lower().endswith(".pdf"):
+        pil = convert_from_path(path, dpi=dpi, first_page=page_no, last_page=page_no, grayscale=True)
+        if not pil:
+            raise RuntimeError(f"Page {page_no} not found in {path}")
+        return np.array(pil[0])
+    img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if img is None:
+        raise FileNotFoundError(f"Cannot read file: {path}")
+    return img
+
+
+def band(gray: np.ndarray, y0: float, y1: float) -> np.ndarray:
+    h = gray.shape[0]
+    return gray[int(h * y0):int(h * y1), :]
+
+
+def ocr_lines(img: np.ndarray, psm: int = 6) -> List[Dict]:
+    """Tesseract words grouped into lines: [{"text", "words": [(text, x_center)], "top"}]."""
+    data = pytesseract.image_to_data(img, lang=LANG, config=f"--psm {psm}",
+                                     output_type=pytesseract.Output.DICT)
+    lines: Dict[Tuple[int, int, int], Dict] = {}
+    for i, word in enumerate(data["text"]):
+        if not word.strip():
+            continue
+        key  = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+        line = lines.setdefault(key, {"words": [], "top": data["top"][i]})
+        line["words"].append((word.strip(), data["left"][i] + data["width"][i] / 2.0))
+        line["top"] = min(line["top"], data["top"][i])
+    out = sorted(lines.values(), key=lambda l: l["top"])
+    for line in out:
+        line["words"].sort(key=lambda w: w[1])
+        line["text"] = " ".join(w for w, _ in line["words"])
+    return out
+
+
+def fields_from_labels(lines: List[Dict], labels) -> Dict[str, Dict]:
+    """Pick the value written after each known label; returns Azure-style field dicts."""
+    fields: Dict[str, Dict] = {}
+    hits: Dict[int, int] = {}
+    for line in lines:
+        for idx, (pattern, names) in enumerate(labels):
+            m = pattern.search(line["text"])
+            if not m:
+                continue
+            n = hits.get(idx, 0)
+            hits[idx] = n + 1
+            if n >= len(names):
+                continue
+            value = next((g for g in m.groups() if g), "").strip(string.punctuation + " ")
+            if value:
+                fields[names[n]] = {"valueString": value, "content": value, "confidence": 0.0}
+            break
+    if "date_naissance_malade" in fields:
+        m = DATE_RE.search(fields["date_naissance_malade"]["content"])
+        if m:
+            fields["date_naissance_malade"] = {"valueString": m.group(1), "content": m.group(1), "confidence": 0.0}
+    return fields
+
+
+def make_table(rows: List[List[str]]) -> SimpleNamespace:
+    cols  = max((len(r) for r in rows), default=0)
+    cells = [SimpleNamespace(row_index=r, column_index=c, content=val)
+             for r, row in enumerate(rows) for c, val in enumerate(row)]
+    return SimpleNamespace(row_count=len(rows), column_count=cols, cells=cells, bounding_regions=[])
+
+
+def make_result(fields: Dict[str, Dict], tables: List[SimpleNamespace]) -> SimpleNamespace:
+    doc = SimpleNamespace(doc_type="local_ocr", confidence=0.0, fields=fields, bounding_regions=[])
+    return SimpleNamespace(documents=[doc], tables=tables, pages=[])
+
+
+# ─── Prescription item table ─────────────────────────────────────────────────
+
+def find_table_columns(gray: np.ndarray, n_cols: int = ITEM_COLUMNS) -> Optional[Tuple[int, int, List[int]]]:
+    """
+    Locate a ruled table: returns (y_top, y_bottom, column_edges) or None.
+    Vertical rules are isolated with a tall morphological opening.
+    """
+    th = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, 10)
+    h, w = th.shape
+    vert = cv2.morphologyEx(th, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(10, h // 30))))
+    horz = cv2.morphologyEx(th, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (max(10, w // 15), 1)))
+    grid = cv2.bitwise_or(vert, horz)
+    cnts, _ = cv2.findContours(grid, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not cnts:
+        return None
+    x, y, gw, gh = cv2.boundingRect(max(cnts, key=cv2.contourArea))
+    if gw < 0.5 * w or gh < 0.05 * h:
+        return None
+
+    # x positions of vertical rules inside the grid, merged when closer than 1% of width
+    cols = np.where(vert[y:y + gh, x:x + gw].sum(axis=0) > 0.5 * 255 * gh)[0] + x
+    edges: List[int] = []
+    for cx in cols:
+        if not edges or cx - edges[-1] > w * 0.01:
+            edges.append(int(cx))
+    if len(edges) < n_cols + 1:
+        return None
+    return y, y + gh, edges
+
+
+def assign_columns(line: Dict, edges: List[int]) -> List[str]:
+    cells = [[] for _ in range(len(edges) - 1)]
+    for word, cx in line["words"]:
+        idx = int(np.searchsorted(edges, cx)) - 1
+        cells[min(max(idx, 0), len(cells) - 1)].append(word)
+    return [" ".join(c) for c in cells]
+
+
+def prescription_items(gray: np.ndarray) -> List[List[str]]:
+    found = find_table_columns(gray)
+    if found:
+        y0, y1, edges = found
+        crop = gray[y0:y1, :]
+    else:
+        crop  = band(gray, *PRESCRIPTION_TABLE)
+        w     = crop.shape[1]
+        edges = [int(w * i / ITEM_COLUMNS) for i in range(ITEM_COLUMNS + 1)]
+
+    rows = [assign_columns(line, edges)[:ITEM_COLUMNS] for line in ocr_lines(crop)]
+    rows = [(r + [""] * ITEM_COLUMNS)[:ITEM_COLUMNS] for r in rows if any(r)]
+    if not rows:
+        return []
+    # the pipeline treats the first row as header and the last one as footer
+    if not rows[-1][0].lower().startswith("total"):
+        rows.append([""] * ITEM_COLUMNS)
+    return rows
+
+
+# ─── Entry points ────────────────────────────────────────────────────────────
+
+def local_bulletin_result(path: str, pages: Optional[str] = None) -> SimpleNamespace:
+    gray   = render_page(path, first_page_number(pages))
+    fields = fields_from_labels(ocr_lines(band(gray, *BULLETIN_BAND), psm=4), BULLETIN_LABELS)
+    logging.info("▷ local OCR bulletin fields: %s", sorted(fields))
+    # eight empty grids keep the table mapping (and its guard) unchanged
+    return make_result(fields, [make_table([[""]]) for _ in range(8)])
+
+
+def local_prescription_result(path: str, pages: Optional[str] = None) -> SimpleNamespace:
+    gray   = render_page(path, first_page_number(pages))
+    fields = fields_from_labels(ocr_lines(band(gray, *PRESCRIPTION_META), psm=4), PRESCRIPTION_LABELS)
+    rows   = prescription_items(gray)
+    logging.info("▷ local OCR prescription: %d item row(s), fields %s", max(0, len(rows) - 2), sorted(fields))
+    tables = [make_table(rows)] if rows else [make_table([[""] * ITEM_COLUMNS])]
+    return make_result(fields, tables)
@@ -0,0 +1,158 @@
+# azure_model/pages.py
+"""
+Lazy page rasterization with a per-request memory ceiling.
+
+`iter_pages` renders one page at a time (a single-page Poppler range per
+step) and yields it as a numpy array – grayscale unless asked otherwise – so
+callers that only need the first page, or that stop once they have an
+answer, never rasterize the rest. Before rendering a page the iterator
+checks it against `budget` and raises `PageBudgetExceeded` when it wouldn't
+fit. By default only the pages held at that moment count (the one being
+rendered plus the one yielded before it, which the caller drops when it moves
+on), so a streaming caller can walk a PDF of any length. Callers that keep
+every page pass `cumulative=True`, and every page yielded so far counts.
+
+A request that renders pages in several places (classification, signature
+crop, doctor-name crop) creates one `PageBudget` and hands it to each of
+them, so the ceiling covers all of its pages together. A plain byte count
+gives the iterator a budget of its own.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+import cv2
+import numpy as np
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+PAGE_DPI           = 300
+PAGE_MEMORY_BUDGET = int(os.getenv("PAGE_MEMORY_BUDGET_MB", "256")) * 1024 * 1024
+
+
+class PageBudgetExceeded(RuntimeError):
+    """Rasterizing the next page would exceed the request's memory budget."""
+
+
+class PageBudget:
+    """Bytes of rendered pages a request may hold at once (None: no limit)."""
+
+    def __init__(self, limit: Optional[int] = PAGE_MEMORY_BUDGET):
+        self.limit = limit
+        self.used  = 0
+        self._lock = threading.Lock()
+
+    def check(self, nbytes: int, name: str = "page") -> None:
+        """Raise PageBudgetExceeded if `nbytes` more wouldn't fit."""
+        if self.limit is not None and self.used + nbytes > self.limit:
+            raise PageBudgetExceeded(
+                f"{name}: page would need {nbytes / 2**20:.1f} MiB, "
+                f"{self.used / 2**20:.1f} of {self.limit / 2**20:.0f} MiB already used"
+            )
+
+    def charge(self, nbytes: int, name: str = "page") -> None:
+        with self._lock:
+            self.check(nbytes, name)
+            self.used += nbytes
+
+    def release(self, nbytes: int) -> None:
+        with self._lock:
+            self.used = max(0, self.used - nbytes)
+
+    @contextmanager
+    def hold(self, nbytes: int, name: str = "page"):
+        """Count `nbytes` for the duration of the block."""
+        self.charge(nbytes, name)
+        try:
+            yield
+        finally:
+            self.release(nbytes)
+
+
+def as_budget(budget: Union[PageBudget, int, None]) -> PageBudget:
+    """A shared PageBudget as is; a byte count (or None) becomes a private one."""
+    return budget if isinstance(budget, PageBudget) else PageBudget(budget)
+
+
+def pdf_info(path, poppler_path: Optional[str] = None) -> dict:
+    """{"pages": n, "width_pt": w, "height_pt": h} (size of the first page)."""
+    info = pdfinfo_from_path(str(path), poppler_path=poppler_path)
+    w_pt, h_pt = 595.0, 842.0                                  # A4 if pdfinfo doesn't say
+    size = str(info.get("Page size", "")).split()
+    if len(size) >= 3 and size[1] == "x":
+        try:
+            w_pt, h_pt = float(size[0]), float(size[2])
+        except ValueError:
+            pass
+    return {"pages": int(info.get("Pages", 1)), "width_pt": w_pt, "height_pt": h_pt}
+
+
+def estimate_page_bytes(width_pt: float, height_pt: float, dpi: int, grayscale: bool = True) -> int:
+    return int(width_pt / 72.0 * dpi) * int(height_pt / 72.0 * dpi) * (1 if grayscale else 3)
+
+
+def iter_pages(
+    path,
+    dpi: int = PAGE_DPI,
+    grayscale: bool = True,
+    poppler_path: Optional[str] = None,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    budget: Union[PageBudget, int, None] = PAGE_MEMORY_BUDGET,
+    cumulative: bool = False,
+) -> Iterator[np.ndarray]:
+    """
+    Yield pages `first_page..last_page` (1-based, inclusive) one at a time:
+    uint8 grayscale, or BGR with grayscale=False. Images count as one page.
+    `budget` is a request's shared PageBudget or a byte count for this iterator
+    alone; `cumulative` is for callers that keep every page (see the module docstring).
+    """
+    path   = Path(path)
+    budget = as_budget(budget)
+    held   = 0      # bytes this iterator has charged: every page so far, or the last one
+
+    def take(arr: np.ndarray) -> None:
+        nonlocal held
+        budget.charge(arr.nbytes, path.name)
+        if not cumulative:
+            budget.release(held)
+            held = 0
+        held += arr.nbytes
+
+    try:
+        if path.suffix.lower() != ".pdf":
+            if first_page > 1:
+                return
+            img = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+            if img is None:
+                raise FileNotFoundError(f"Cannot open {str(path)!r}")
+            take(img)
+            yield img
+            return
+
+        info = pdf_info(path, poppler_path)
+        last = min(last_page or info["pages"], info["pages"])
+        estimate = estimate_page_bytes(info["width_pt"], info["height_pt"], dpi, grayscale)
+        for n in range(first_page, last + 1):
+            budget.check(estimate, path.name)
+            pil = convert_from_path(str(path), dpi=dpi, first_page=n, last_page=n,
+                                    grayscale=grayscale, poppler_path=poppler_path)
+            if not pil:
+                return
+            arr = np.array(pil[0]) if grayscale else cv2.cvtColor(np.asarray(pil[0]), cv2.COLOR_RGB2BGR)
+            del pil
+            take(arr)
+            yield arr
+    finally:
+        # a streaming caller is done with its last page; a cumulative one keeps them all
+        if not cumulative:
+            budget.release(held)
+
+
+def first_page(path, dpi: int = PAGE_DPI, grayscale: bool = True, poppler_path: Optional[str] = None,
+               page: int = 1, budget: Union[PageBudget, int, None] = PAGE_MEMORY_BUDGET) -> np.ndarray:
+    """Just one page (default: the first)."""
+    for img in iter_pages(path, dpi, grayscale, poppler_path, first_page=page, last_page=page, budget=budget):
+        return img
+    raise RuntimeError(f"Page {page} not found in {path}")
@@ -0,0 +1,89 @@
+# azure_model/phash.py
+"""
+Perceptual hashing + a small near-duplicate LRU cache.
+
+Scans of the same letterhead / form header hash to (almost) the same 64-bit
+dHash, so results computed for one scan can be reused for the next one when
+the Hamming distance between their hashes is small.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def dhash(gray: np.ndarray, size: int = 8) -> int:
+    """Difference hash: compare each pixel with its right neighbour on a (size+1)×size thumbnail."""
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits  = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class HashCache:
+    """
+    Bounded LRU keyed by perceptual hash. `get` returns the value stored under the
+    closest hash within `max_distance` bits (exact hits are checked first).
+    """
+
+    def __init__(self, maxsize: int = 1024, max_distance: int = 6):
+        self.maxsize      = maxsize
+        self.max_distance = max_distance
+        self.hits         = 0
+        self.misses       = 0
+        self._data: "OrderedDict[int, Any]" = OrderedDict()
+        self._lock        = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def lookup(self, h: int, count: bool = True) -> Optional[Tuple[int, Any, int]]:
+        """(stored_hash, value, distance) of the nearest entry, or None. Counts hit/miss unless `count` is False."""
+        with self._lock:
+            if h in self._data:
+                self._data.move_to_end(h)
+                self.hits += count
+                return h, self._data[h], 0
+            best = None
+            for key, value in self._data.items():
+                d = hamming(h, key)
+                if d <= self.max_distance and (best is None or d < best[2]):
+                    best = (key, value, d)
+            if best is None:
+                self.misses += count
+                return None
+            self._data.move_to_end(best[0])
+            self.hits += count
+            return best
+
+    def get(self, h: int, default: Any = None) -> Any:
+        found = self.lookup(h)
+        return found[1] if found else default
+
+    def put(self, h: int, value: Any) -> None:
+        with self._lock:
+            self._data[h] = value
+            self._data.move_to_end(h)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, h: int) -> None:
+        with self._lock:
+            self._data.pop(h, None)
+
+    def items(self) -> List[Tuple[int, Any]]:
+        """Snapshot of (hash, value), least recently used first (reloading in order keeps the LRU order)."""
+        with self._lock:
+            return list(self._data.items())
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
@@ -2,17 +2,29 @@ import os
 import logging
 from pathlib import Path
 import tempfile, os
+import hashlib
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import cv2
 import re
 import numpy as np
-import pandas as pd
 from rapidfuzz import process, fuzz
-from pdf2image import convert_from_path
 from dotenv import load_dotenv
 from azure.core.credentials import AzureKeyCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
-from typing import Optional, List, Dict
+from typing import Callable, Optional, List, Dict
 from .signature_pipeline import get_doctor_name, get_signature_crop
+from .scheduler import CLIENT_OPTIONS, INTERACTIVE, analyze, scheduler
+from .hedge import result_within, submit_started
+from .signature_store import save_signature
+from .templates import TemplateRegistry
+from .pages import PAGE_MEMORY_BUDGET, PageBudget, iter_pages
+from .refdata import med_table
+from .form_cache import FormCache, header_hash
+from .result_store import content_hash, save_result
+from .local_ocr import local_bulletin_result, local_prescription_result
+from .upload_normalizer import normalize_enabled, normalize_for_upload, rescale_result
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 load_dotenv()
 
@@ -22,32 +34,16 @@ KEY = "DszvIykXxKf5EbrKjS5c1GxRjaA0Fd2ak7ITBvUMmqIF5umt8dk6JQQJ99BEACi5YpzXJ3w3A
 if not (ENDPOINT and KEY):
     raise SystemExit("Set DOCUMENT_INTELLIGENCE_ENDPOINT & DOCUMENT_INTELLIGENCE_API_KEY in .env")
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-amm_path = os.path.join(current_dir, "liste_amm.xls")
-med_ref = pd.read_excel(amm_path)
+# liste_amm, memory-mapped from refdata/ when compiled (python -m azure_model.refdata build)
+med_ref = med_table()
 
-client = DocumentIntelligenceClient(ENDPOINT, AzureKeyCredential(KEY))
+client = DocumentIntelligenceClient(ENDPOINT, AzureKeyCredential(KEY), **CLIENT_OPTIONS)
 model_id = "ordonnance"
-print("Listing models available on your Azure resource...")
-try:
-    # For new SDKs (azure-ai-documentintelligence)
-    models = client.list_models()
-    for model in models:
-        print("Model ID:", model.model_id)
-except AttributeError:
-    try:
-        # For older SDKs (azure-ai-formrecognizer)
-        models = client.list_custom_models()
-        for model in models:
-            print("Model ID:", model.model_id)
-    except Exception as e:
-        print("Could not list models:", e)
-
 def list_available_models():
     """Print all available models in the Azure Document Intelligence resource"""
     try:
         # For newer SDK versions
-        result = client.list_models()
+        result = scheduler.submit(lambda: list(client.list_models()))
         print("Available models in your Azure resource:")
         for model in result:
             print(f"- {model.model_id} (Created: {model.created_on})")
@@ -55,7 +51,7 @@ def list_available_models():
     except AttributeError:
         try:
             # For older SDK versions
-            result = client.list_custom_models()
+            result = scheduler.submit(lambda: list(client.list_custom_models()))
             print("Available custom models in your Azure resource:")
             for model in result:
                 print(f"- {model.model_id} (Created: {model.created_date_time})")
@@ -67,23 +63,36 @@ def list_available_models():
         print(f"Error listing models: {e}")
         return []
 
-available_models = list_available_models()
-def analyze_document(scan_path: Path, model_id: str, pages: list[str]):
+# AZURE_LIST_MODELS=0 skips the listing (offline benchmarks / tooling)
+available_models = list_available_models() if os.getenv("AZURE_LIST_MODELS", "1") != "0" else []
+def analyze_document(
+    scan_path: Path,
+    model_id: str,
+    pages: str | None,
+    priority: str = INTERACTIVE,
+    normalize: bool | None = None,
+):
     """
     Sends the raw PDF or image stream to Azure custom model.
+    Goes through the shared scheduler (rate limit, retries, priority lanes).
+    With `normalize` (default: AZURE_UPLOAD_NORMALIZE) the scan is shrunk first
+    and the returned polygons are mapped back to the original coordinates.
     """
-    with open(scan_path, "rb") as f:
-        poller = client.begin_analyze_document(
-            model_id,
-            body=f,
-            pages=pages
-        )
-    return poller.result()
+    if normalize is None:
+        normalize = normalize_enabled()
+    upload_path, factors = (normalize_for_upload(scan_path) if normalize else (scan_path, []))
+    try:
+        with open(upload_path, "rb") as f:
+            result = analyze(client, model_id, f, pages=pages, priority=priority)
+        return rescale_result(result, factors)
+    finally:
+        if upload_path != scan_path:
+            upload_path.unlink(missing_ok=True)
 
 def correct_medication_name(raw, med_ref_threshold=80):
-    match, score, idx = process.extractOne(raw, med_ref["Nom"], scorer=fuzz.ratio)
+    match, score, idx = process.extractOne(raw, med_ref.names, scorer=fuzz.ratio)
     if score >= med_ref_threshold:
-        return med_ref.iloc[idx].to_dict(), score
+        return med_ref.row(idx), score
     return None, score
 
 
@@ -130,53 +139,201 @@ def dump_results(result, output_txt: Path, min_conf: float = 0.1):
     output_txt.write_text("\n".join(lines), encoding="utf-8")
     logging.info("✅ OCR results saved to %s", output_txt)
 
-def load_all_pages(path: Path, poppler_path: str | None = None):
+def load_all_pages(path: Path, poppler_path: str | None = None, budget: int | None = PAGE_MEMORY_BUDGET):
+    """Every page as BGR. Prefer `iter_pages`, which renders one page at a time."""
+    return list(iter_pages(path, grayscale=False, poppler_path=poppler_path, budget=budget, cumulative=True))
+
+# a page needs at least this many good ORB matches to count as showing a header
+MIN_PAGE_MATCHES = 20
+# pages with less dark-pixel coverage than this are treated as blank
+MIN_INK_RATIO    = 0.005
+# a page this sure of its header settles the label – later pages aren't rendered
+EARLY_STOP_MATCHES = 150
 
-    if path.suffix.lower() == ".pdf":
-        pages = convert_from_path(str(path), dpi=300, poppler_path=poppler_path)
-        return [cv2.cvtColor(np.array(p), cv2.COLOR_RGB2BGR) for p in pages]
-    img = cv2.imread(str(path))
-    if img is None:
-        raise FileNotFoundError(f"Cannot open {path!r}")
-    return [img]
+def ink_ratio(gray: np.ndarray, dark: int = 200) -> float:
+    return float(np.count_nonzero(gray < dark)) / gray.size if gray.size else 0.0
 
-def detect_and_compute(gray: np.ndarray):
-    orb = cv2.ORB_create(2000)
-    return orb.detectAndCompute(gray, None)
+_registries: Dict[str, TemplateRegistry] = {}
 
-def count_good_matches(desT, desS, ratio=0.75):
-    if desT is None or desS is None:
-        return 0
-    bf = cv2.BFMatcher(cv2.NORM_HAMMING)
-    matches = bf.knnMatch(desT, desS, k=2)
-    return sum(1 for m,n in matches if m.distance < ratio * n.distance)
+def registry_for(presc_hdr_img: np.ndarray, bullet_hdr_img: np.ndarray) -> TemplateRegistry:
+    """Two-template registry for callers that still pass the header images (built once)."""
+    key = hashlib.sha1(presc_hdr_img.tobytes() + bullet_hdr_img.tobytes()).hexdigest()
+    if key not in _registries:
+        _registries[key] = TemplateRegistry.from_images({
+            "prescription":     presc_hdr_img,
+            "bulletin_de_soin": bullet_hdr_img,
+        })
+    return _registries[key]
+
+def page_labels(page_score: Dict) -> List[str]:
+    return [k for k in page_score if k not in ("page", "ink")]
+
+def score_pages(
+    scan_path: Path,
+    presc_hdr_img: np.ndarray | None = None,
+    bullet_hdr_img: np.ndarray | None = None,
+    poppler: str | None = None,
+    registry: TemplateRegistry | None = None,
+    stop_at: int | None = None,
+    page_budget: PageBudget | int | None = PAGE_MEMORY_BUDGET,
+) -> List[Dict]:
+    """
+    Per-page template scores (one query per page against the registry's combined
+    index) plus ink coverage:
+    [{"page": 1, "prescription": 12, "bulletin_de_soin": 240, "ink": 0.08}, ...]
+    Pages are rendered one at a time; with `stop_at` scoring ends at the first
+    page whose best label reaches it.
+    """
+    if registry is None:
+        registry = registry_for(presc_hdr_img, bullet_hdr_img)
+    return score_page_images(iter_pages(scan_path, poppler_path=poppler, budget=page_budget), registry, stop_at)
+
+def score_page_images(pages, registry: TemplateRegistry, stop_at: int | None = None) -> List[Dict]:
+    """score_pages over already-rendered grayscale pages."""
+    scores = []
+    for i, g in enumerate(pages, start=1):
+        ps = {"page": i, **registry.score(g), "ink": ink_ratio(g)}
+        scores.append(ps)
+        if stop_at is not None and max(ps[k] for k in page_labels(ps)) >= stop_at:
+            break
+    return scores
+
+def rank_labels(page_scores: List[Dict]) -> List[tuple[str, int]]:
+    """Labels ranked by their best page score: [("bulletin_de_soin", 240), ("prescription", 12)]."""
+    best: Dict[str, int] = {}
+    for ps in page_scores:
+        for label in page_labels(ps):
+            best[label] = max(best.get(label, 0), ps[label])
+    return sorted(best.items(), key=lambda kv: kv[1], reverse=True)
+
+def classify_form_pages(
+    scan_path: Path,
+    presc_hdr_img: np.ndarray | None = None,
+    bullet_hdr_img: np.ndarray | None = None,
+    poppler: str | None = None,
+    registry: TemplateRegistry | None = None,
+    stop_at: int | None = None,
+    cache: FormCache | None = None,
+    page_budget: PageBudget | int | None = PAGE_MEMORY_BUDGET,
+) -> tuple[str, List[Dict]]:
+    """
+    Like classify_form, but also returns the per-page scores (all pages unless `stop_at`).
+    With `cache`, a page-1 header hash close to one seen before gives the label
+    without ORB matching (see form_cache). Page selection needs every page's
+    scores, so without `stop_at` that only happens for single-page scans
+    (the scores come back empty then).
+    """
+    if registry is None:
+        registry = registry_for(presc_hdr_img, bullet_hdr_img)
+    pages = iter_pages(scan_path, poppler_path=poppler, budget=page_budget)
+    first = next(pages, None)
+    if first is None:
+        return "unknown", []
+
+    key, cached = None, None
+    if cache is not None:
+        key    = header_hash(first)
+        cached = cache.lookup(key)
+    ahead = [first]
+    if cached and stop_at is None:
+        second = next(pages, None)
+        if second is not None:
+            ahead.append(second)
+    if cached and len(ahead) == 1 and not cache.should_verify():
+        logging.info("▷ classified as %r (header hash cache)", cached)
+        cache.tally(hit=True)
+        return cached, []
+
+    page_scores = score_page_images(itertools.chain(ahead, pages), registry, stop_at)
+    ranked = rank_labels(page_scores)
+    best = ranked[0] if ranked else ("unknown", -1)
+    logging.info("▷ classified as %r (best score=%d; ranking=%s)", best[0], best[1], ranked)
+
+    if cache is not None:
+        cache.tally(hit=False)
+        # a weak ORB answer neither fills the cache nor overrules it
+        if best[1] >= MIN_PAGE_MATCHES:
+            if cached:
+                cache.confirm(key, cached, best[0])
+            else:
+                cache.record(key, best[0])
+    return best[0], page_scores
 
 def classify_form(
     scan_path: Path,
-    presc_hdr_img: np.ndarray,
-    bullet_hdr_img: np.ndarray,
-    poppler: str | None = None
+    presc_hdr_img: np.ndarray | None = None,
+    bullet_hdr_img: np.ndarray | None = None,
+    poppler: str | None = None,
+    registry: TemplateRegistry | None = None,
+    cache: FormCache | None = None,
 ) -> str:
-    
-    p_gray = cv2.cvtColor(presc_hdr_img, cv2.COLOR_BGR2GRAY)
-    b_gray = cv2.cvtColor(bullet_hdr_img, cv2.COLOR_BGR2GRAY)
-    _, des_p = detect_and_compute(p_gray)
-    _, des_b = detect_and_compute(b_gray)
-
-    best = ("unknown", -1)
-    pages = load_all_pages(scan_path, poppler_path=poppler)
-    for page in pages:
-        g = cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
-        _, des_s = detect_and_compute(g)
-        mp = count_good_matches(des_p, des_s)
-        mb = count_good_matches(des_b, des_s)
-        if mp > best[1]:
-            best = ("prescription", mp)
-        if mb > best[1]:
-            best = ("bulletin_de_soin", mb)
-
-    logging.info("▷ classified as %r (best score=%d)", best[0], best[1])
-    return best[0]
+    # only the label is needed, so stop at the first page that clearly shows a header
+    label, _ = classify_form_pages(scan_path, presc_hdr_img, bullet_hdr_img, poppler, registry,
+                                   stop_at=EARLY_STOP_MATCHES, cache=cache)
+    return label
+
+def format_page_ranges(pages: List[int]) -> str:
+    """[1, 2, 3, 5] -> "1-3,5" (the syntax Azure's `pages` parameter expects)."""
+    parts = []
+    for p in sorted(set(pages)):
+        if parts and p == parts[-1][1] + 1:
+            parts[-1][1] = p
+        else:
+            parts.append([p, p])
+    return ",".join(f"{a}-{b}" if a != b else str(a) for a, b in parts)
+
+def _segments(page_scores: List[Dict], min_matches: int, min_ink: float) -> List[Dict]:
+    segments: List[Dict] = []
+    for ps in page_scores:
+        if ps.get("ink", 1.0) < min_ink:
+            continue
+        label = max(page_labels(ps), key=lambda k: ps[k])
+        if ps[label] >= min_matches:
+            segments.append({"documentType": label, "pages": [ps["page"]], "score": ps[label]})
+        elif segments:
+            segments[-1]["pages"].append(ps["page"])
+    return segments
+
+def segment_pages(
+    page_scores: List[Dict],
+    min_matches: int = MIN_PAGE_MATCHES,
+    min_ink: float = MIN_INK_RATIO,
+) -> List[Dict]:
+    """
+    Split a scan stack into documents. A page whose header matches a template
+    starts a new segment, a non-blank page without a header continues the
+    current one, and blank pages and leading pages without a header are dropped:
+    [{"documentType": "bulletin_de_soin", "pages": [1, 2], "range": "1-2", "score": 240}, ...]
+    """
+    segments = _segments(page_scores, min_matches, min_ink)
+    for seg in segments:
+        seg["range"] = format_page_ranges(seg["pages"])
+    logging.info("▷ segmented into %d document(s): %s",
+                 len(segments), ", ".join(f"{s['documentType']}[{s['range']}]" for s in segments))
+    return segments
+
+def select_pages(
+    page_scores: List[Dict],
+    label: str,
+    min_matches: int = MIN_PAGE_MATCHES,
+    min_ink: float = MIN_INK_RATIO,
+) -> Optional[str]:
+    """
+    Page range to send to Azure for `label`, built like segment_pages: the pages
+    of every `label` segment, i.e. its header page plus the non-blank continuation
+    pages up to the next header. Blank pages, cover pages and segments of other
+    form types are dropped.
+    Returns None when every page should go (or none qualifies) so Azure gets the whole file.
+    """
+    if not page_scores or label not in page_scores[0]:
+        return None
+    keep = [p for seg in _segments(page_scores, min_matches, min_ink)
+            if seg["documentType"] == label for p in seg["pages"]]
+    if not keep or len(keep) == len(page_scores):
+        return None
+    skipped = len(page_scores) - len(keep)
+    logging.info("▷ sending pages %s to Azure (%d page(s) skipped)", format_page_ranges(keep), skipped)
+    return format_page_ranges(keep)
 
 def format_prescription_id(raw: str) -> str:
     # 1) strip everything but digits
@@ -193,7 +350,145 @@ def format_prescription_id(raw: str) -> str:
     parts = [p if p else "0" for p in parts]
     return "-".join(parts)
 
-def parse_bulletin_ocr(file_bytes: bytes, filename: str) -> dict:
+def notify(progress: Optional[Callable[..., None]], stage: str, **data) -> None:
+    """Report a pipeline stage to an optional progress callback; never breaks the parse."""
+    if progress is None:
+        return
+    try:
+        progress(stage, **data)
+    except Exception as e:
+        logging.warning("progress callback failed at %s: %s", stage, e)
+
+def bulletin_from_result(result) -> dict:
+    """Map an Azure AnalyzeResult (or anything shaped like one) onto the bulletin dict."""
+    doc      = result.documents[0]
+    f        = doc.fields
+    tables   = result.tables
+
+    # 3) guard: must have at least one table (or ≥8 if you require full grids)
+    if len(tables) == 0:
+        raise ValueError("OCR returned no tables; this doesn’t look like a Bulletin de soin.")
+
+    # 4) helpers
+    def txt(k: str) -> Optional[str]:
+        fld = f.get(k)
+        return fld and (fld.get("valueString") or fld.get("content"))
+
+    def chk(k: str) -> bool:
+        fld = f.get(k)
+        return (fld.get("valueSelectionMark","").lower() == "selected") if fld else False
+
+    def extract_grid(tbl) -> List[List[str]]:
+        grid = [[""] * tbl.column_count for _ in range(tbl.row_count)]
+        for cell in tbl.cells:
+            grid[cell.row_index][cell.column_index] = cell.content.strip()
+        return grid
+
+    def table_to_objects(grid: List[List[str]], cols: List[str]) -> List[Dict[str,str]]:
+        out: List[Dict[str,str]] = []
+        for row in grid[1:]:
+            obj = { cols[i]: row[i] if i < len(row) else "" for i in range(len(cols)) }
+            out.append(obj)
+        return out
+
+    # 5) extract & pad grids
+    grids = [extract_grid(tbl) for tbl in tables]
+    while len(grids) < 8:
+        grids.append([[]])   # or `[[""] * len(cols)]` if you prefer
+
+    # 6) map each of the 8 tables
+    consultations_dentaires = table_to_objects(grids[0], ["date","dent","codeActe","cotation","honoraires","codePs","signature"])
+    protheses_dentaires     = table_to_objects(grids[1], ["date","dents","codeActe","cotation","honoraires","codePs","signature"])
+    consultations_visites   = table_to_objects(grids[2], ["date","designation","honoraires","codePs","signature"])
+    actes_medicaux          = table_to_objects(grids[3], ["date","designation","honoraires","codePs","signature"])
+    actes_paramed           = table_to_objects(grids[4], ["date","designation","honoraires","codePs","signature"])
+    biologie                = table_to_objects(grids[5], ["date","montant","codePs","signature"])
+    hospitalisation         = table_to_objects(grids[6], ["date","codeHosp","forfait","codeClinique","signature"])
+    pharmacie               = table_to_objects(grids[7], ["date","montant","codePs","signature"])
+
+    # ── 7) other fields & checks ───────────────────────────────────
+    dossier_id   = txt("id_dossier") or ""
+    formatted_id = format_prescription_id(txt("id_unique") or "")
+
+    prenom  = txt("prenom_assure") or ""
+    nom     = txt("nom_assure")     or ""
+    adresse = txt("adresse_assure") or ""
+    code_po = txt("code_postal")    or ""
+    cnrps_c = chk("cnrps_check")
+    cnss_c  = chk("cnss_check")
+    conv_c  = chk("convention_check")
+
+    mal_prenom = txt("prenom_malade") or ""
+    mal_nom    = txt("nom_malade")    or ""
+    mal_birth  = txt("date_naissance_malade") or ""
+    nom_pr_mal = txt("nom_prenom_malade")    or ""
+    date_prevu = txt("date_prevu")           or ""
+
+    apci_c        = chk("apci_check")
+    mo_c          = chk("mo_check")
+    hosp_req_c    = chk("hospitalisation_check")
+    suivi_gross_c = chk("suivi_grossesse_check")
+    conjoint_c    = chk("conjoint")
+    ascendant_c   = chk("ascendant")
+    assure_soc    = cnrps_c or cnss_c
+
+    # ── 8) assemble final dict ─────────────────────────────────────
+    return {
+        "header": {
+            "documentType": "bulletin_de_soin",
+            "dossierId":    dossier_id
+        },
+
+        # assured info
+        "prenom":            prenom,
+        "nom":               nom,
+        "adresse":           adresse,
+        "codePostal":        code_po,
+        "refDossier":        dossier_id,
+        "identifiantUnique": formatted_id,
+        "cnrps":             cnrps_c,
+        "cnss":              cnss_c,
+        "convbi":            conv_c,
+
+        # the eight tables
+        "consultationsDentaires": consultations_dentaires,
+        "prothesesDentaires":     protheses_dentaires,
+        "consultationsVisites":   consultations_visites,
+        "actesMedicaux":          actes_medicaux,
+        "actesParamed":           actes_paramed,
+        "biologie":               biologie,
+        "hospitalisation":        hospitalisation,
+        "pharmacie":              pharmacie,
+
+        # extra checks & fields
+        "apci":                    apci_c,
+        "mo":                      mo_c,
+        "hospitalisationCheck":    hosp_req_c,
+        "suiviGrossesseCheck":     suivi_gross_c,
+        "datePrevu":               date_prevu,
+        "nomPrenomMalade":         nom_pr_mal,
+
+        # patient info
+        "assureSocial":            assure_soc,
+        "conjoint":                conjoint_c,
+        "ascendant":               ascendant_c,
+        "enfant":                  chk("enfant"),
+        "prenomMalade":            mal_prenom,
+        "nomMalade":               mal_nom,
+        "dateNaissance":           mal_birth,
+
+        # optional
+        "numTel":                  txt("telephone") or "",
+        "patientType":             None
+    }
+
+def parse_bulletin_ocr(
+    file_bytes: bytes,
+    filename: str,
+    pages: Optional[str] = None,
+    priority: str = INTERACTIVE,
+    progress: Optional[Callable[..., None]] = None,
+) -> dict:
     tmp_path: Optional[Path] = None
     try:
         # 1) dump bytes to disk
@@ -204,128 +499,12 @@ def parse_bulletin_ocr(file_bytes: bytes, filename: str) -> dict:
 
         # 2) call Azure
         model_id = "ordonnance"
-        print(f"Using model ID: {model_id}")
-        result   = analyze_document(tmp_path, model_id=model_id, pages=None)
-        doc      = result.documents[0]
-        f        = doc.fields
-        tables   = result.tables
-
-        # 3) guard: must have at least one table (or ≥8 if you require full grids)
-        if len(tables) == 0:
-            raise ValueError("OCR returned no tables; this doesn’t look like a Bulletin de soin.")
-
-        # 4) helpers
-        def txt(k: str) -> Optional[str]:
-            fld = f.get(k)
-            return fld and (fld.get("valueString") or fld.get("content"))
-
-        def chk(k: str) -> bool:
-            fld = f.get(k)
-            return (fld.get("valueSelectionMark","").lower() == "selected") if fld else False
-
-        def extract_grid(tbl) -> List[List[str]]:
-            grid = [[""] * tbl.column_count for _ in range(tbl.row_count)]
-            for cell in tbl.cells:
-                grid[cell.row_index][cell.column_index] = cell.content.strip()
-            return grid
-
-        def table_to_objects(grid: List[List[str]], cols: List[str]) -> List[Dict[str,str]]:
-            out: List[Dict[str,str]] = []
-            for row in grid[1:]:
-                obj = { cols[i]: row[i] if i < len(row) else "" for i in range(len(cols)) }
-                out.append(obj)
-            return out
-
-        # 5) extract & pad grids
-        grids = [extract_grid(tbl) for tbl in tables]
-        while len(grids) < 8:
-            grids.append([[]])   # or `[[""] * len(cols)]` if you prefer
-
-        # 6) map each of the 8 tables
-        consultations_dentaires = table_to_objects(grids[0], ["date","dent","codeActe","cotation","honoraires","codePs","signature"])
-        protheses_dentaires     = table_to_objects(grids[1], ["date","dents","codeActe","cotation","honoraires","codePs","signature"])
-        consultations_visites   = table_to_objects(grids[2], ["date","designation","honoraires","codePs","signature"])
-        actes_medicaux          = table_to_objects(grids[3], ["date","designation","honoraires","codePs","signature"])
-        actes_paramed           = table_to_objects(grids[4], ["date","designation","honoraires","codePs","signature"])
-        biologie                = table_to_objects(grids[5], ["date","montant","codePs","signature"])
-        hospitalisation         = table_to_objects(grids[6], ["date","codeHosp","forfait","codeClinique","signature"])
-        pharmacie               = table_to_objects(grids[7], ["date","montant","codePs","signature"])
-
-        # ── 7) other fields & checks ───────────────────────────────────
-        dossier_id   = txt("id_dossier") or ""
-        formatted_id = format_prescription_id(txt("id_unique") or "")
-
-        prenom  = txt("prenom_assure") or ""
-        nom     = txt("nom_assure")     or ""
-        adresse = txt("adresse_assure") or ""
-        code_po = txt("code_postal")    or ""
-        cnrps_c = chk("cnrps_check")
-        cnss_c  = chk("cnss_check")
-        conv_c  = chk("convention_check")
-
-        mal_prenom = txt("prenom_malade") or ""
-        mal_nom    = txt("nom_malade")    or ""
-        mal_birth  = txt("date_naissance_malade") or ""
-        nom_pr_mal = txt("nom_prenom_malade")    or ""
-        date_prevu = txt("date_prevu")           or ""
-
-        apci_c        = chk("apci_check")
-        mo_c          = chk("mo_check")
-        hosp_req_c    = chk("hospitalisation_check")
-        suivi_gross_c = chk("suivi_grossesse_check")
-        conjoint_c    = chk("conjoint")
-        ascendant_c   = chk("ascendant")
-        assure_soc    = cnrps_c or cnss_c
-
-        # ── 8) assemble final dict ─────────────────────────────────────
-        return {
-            "header": {
-                "documentType": "bulletin_de_soin",
-                "dossierId":    dossier_id
-            },
-
-            # assured info
-            "prenom":            prenom,
-            "nom":               nom,
-            "adresse":           adresse,
-            "codePostal":        code_po,
-            "refDossier":        dossier_id,
-            "identifiantUnique": formatted_id,
-            "cnrps":             cnrps_c,
-            "cnss":              cnss_c,
-            "convbi":            conv_c,
-
-            # the eight tables
-            "consultationsDentaires": consultations_dentaires,
-            "prothesesDentaires":     protheses_dentaires,
-            "consultationsVisites":   consultations_visites,
-            "actesMedicaux":          actes_medicaux,
-            "actesParamed":           actes_paramed,
-            "biologie":               biologie,
-            "hospitalisation":        hospitalisation,
-            "pharmacie":              pharmacie,
-
-            # extra checks & fields
-            "apci":                    apci_c,
-            "mo":                      mo_c,
-            "hospitalisationCheck":    hosp_req_c,
-            "suiviGrossesseCheck":     suivi_gross_c,
-            "datePrevu":               date_prevu,
-            "nomPrenomMalade":         nom_pr_mal,
-
-            # patient info
-            "assureSocial":            assure_soc,
-            "conjoint":                conjoint_c,
-            "ascendant":               ascendant_c,
-            "enfant":                  chk("enfant"),
-            "prenomMalade":            mal_prenom,
-            "nomMalade":               mal_nom,
-            "dateNaissance":           mal_birth,
-
-            # optional
-            "numTel":                  txt("telephone") or "",
-            "patientType":             None
-        }
+        logging.info("▷ using model ID %s", model_id)
+        notify(progress, "azure_submitted", modelId=model_id, pages=pages)
+        result   = analyze_document(tmp_path, model_id=model_id, pages=pages, priority=priority)
+        notify(progress, "azure_done", tables=len(result.tables), fields=len(result.documents[0].fields))
+        save_result(content_hash(file_bytes), "bulletin", model_id, pages, result)
+        return bulletin_from_result(result)
 
     finally:
         if tmp_path and tmp_path.exists():
@@ -359,7 +538,244 @@ def has_signature_coordinates(result) -> bool:
     bounding_regions = getattr(sig_field, "bounding_regions", None)
     return bool(bounding_regions and len(bounding_regions) > 0)
 
-def parse_prescription_ocr(file_bytes: bytes, filename: str) -> dict:
+def prescription_from_result(
+    result,
+    scan_path: Optional[Path] = None,
+    priority: str = INTERACTIVE,
+    progress: Optional[Callable[..., None]] = None,
+    page_budget: PageBudget | int | None = PAGE_MEMORY_BUDGET,
+) -> dict:
+    """
+    Map an Azure AnalyzeResult (or anything shaped like one) onto the prescription dict.
+    The signature is only cropped when the original scan is available (`scan_path`);
+    its page renders count against `page_budget`.
+    """
+    doc      = result.documents[0]
+    f        = doc.fields
+
+    # GUARD: ensure at least one table back
+    raw_tables = result.tables
+    if len(raw_tables) < 1:
+        raise ValueError(f"Expected at least 1 table but found {len(raw_tables)}; not a valid prescription.")
+
+    logging.info("Processing document fields: %s", list(f.keys()))
+    logging.info("Tables found by column count: %s", [tbl.column_count for tbl in result.tables])
+
+    def txt(key: str) -> Optional[str]:
+        fld = f.get(key)
+        if not fld:
+            return None
+        return fld.get("valueString") or fld.get("content")
+
+    # 3) parse all tables into (col_count, matrix)
+    tables: list[tuple[int, list[list[str]]]] = []
+    for tbl in result.tables:
+        mat = [[""] * tbl.column_count for _ in range(tbl.row_count)]
+        for cell in tbl.cells:
+            mat[cell.row_index][cell.column_index] = cell.content.strip()
+        tables.append((tbl.column_count, mat))
+
+    items_mat = next((m for c, m in tables if c >= 8), None)
+    meta_mat  = next((m for c, m in tables if c == 2), None)
+
+    # 4) parse the 8-col items (and footer)
+    items: list[dict] = []
+    total: Optional[str] = None
+    if items_mat and len(items_mat) > 1:
+        for row in items_mat[1:-1]:
+            cells = (row + [""] * 8)[:8]
+            items.append({
+                "codePCT":      cells[0],
+                "produit":      cells[1],
+                "forme":        cells[2],
+                "qte":          cells[3],
+                "puv":          cells[4],
+                "montantPercu": cells[5],
+                "nio":          cells[6],
+                "prLot":        cells[7],
+            })
+        footer = items_mat[-1]
+        if footer and footer[0].lower().startswith("total"):
+            total = footer[0]
+
+    # 5) parse the 2-col metadata
+    beneficiaryId = patientIdentity = prescriberCode = None
+    prescriptionDate = regimen = dispensationDate = None
+
+    if meta_mat:
+        for key_cell, val_cell in meta_mat:
+            key = key_cell.strip().lower()
+            val = val_cell.strip()
+
+            if not val and "date de la prescription" in key:
+                m = re.search(r"(\d{1,2}[\/\.-]\d{1,2}[\/\.-]\d{2,4})", key_cell)
+                prescriptionDate = m.group(1) if m else None
+                continue
+            if not val and "date de dispensation" in key:
+                m = re.search(r"(\d{1,2}[\/\.-]\d{1,2}[\/\.-]\d{2,4})", key_cell)
+                dispensationDate = m.group(1) if m else None
+                continue
+
+            if "bénéficiaire" in key:
+                beneficiaryId = val
+            elif "identité" in key and "malade" in key:
+                patientIdentity = val
+            elif "prescripteur" in key:
+                prescriberCode = val
+            elif "date de la prescription" in key:
+                prescriptionDate = val or prescriptionDate
+            elif "régime" in key:
+                regimen = val or regimen
+            elif "date de dispensation" in key:
+                dispensationDate = val or dispensationDate
+
+    # 6) SAFE FALLBACKS for missing metadata
+    beneficiaryId    = beneficiaryId   or txt("id_unique") or ""
+    formatted_id     = format_prescription_id(beneficiaryId)
+    patientIdentity  = patientIdentity or txt("nom_prenom") or ""
+    prescriberCode   = prescriberCode  or txt("code_apci")
+    prescriptionDate = prescriptionDate or txt("date")
+    dispensationDate = dispensationDate or txt("date_numero")
+    regimen          = regimen          or txt("regime")
+
+    # 7) fallback items from `prescription_items` array or from 'medications' free-text field
+    if not items and f.get("prescription_items"):
+        arr = f["prescription_items"].get("valueArray", [])
+        for idx, row in enumerate(arr):
+            cells = [(c.get("valueString") or c.get("content") or "").strip()
+                    for c in row.get("valueArray", [])]
+            if idx == 0:
+                continue
+            if cells and cells[0].lower().startswith("total"):
+                total = cells[0]
+                continue
+            a, b, c_, d = (cells + [""] * 4)[:4]
+            items.append({
+                "codePCT": a,
+                "produit": b,
+                "forme":   c_,
+                "qte":     d,
+            })
+    elif not items and txt("medications"):
+        meds_text = txt("medications")
+        med_lines = re.split(r"[-,]", meds_text)
+        med_lines = [line.strip() for line in med_lines if line.strip()]
+        for line in med_lines:
+            # Fuzzy match for med name
+            corrected, score = correct_medication_name(line)
+            name = corrected["Nom"] if corrected else line
+
+            # Extract the first number as dosage
+            dosage_match = re.search(r"\b(\d+(\.\d+)?)(?:\s?(mg|ml|g|mcg))?\b", line, re.IGNORECASE)
+            dosage = dosage_match.group(1) if dosage_match else ""
+
+            # Combine for produit
+            produit = f"{name} {dosage}".strip()
+
+            items.append({
+                "codePCT": "NA",
+                "produit": produit,
+                "forme": "NA",
+                "qte": "NA",
+                "puv": "NA",
+                "montantPercu": "NA",
+                "nio": "NA",
+                "prLot": "NA",
+            })
+
+    # 8) fallback total from the raw field
+    total = total or txt("total_ttc") or ""
+
+    # 9) split the `pharmacie` blob
+    raw_pharm    = txt("pharmacie") or ""
+    parts        = re.split(r"Tél[:]? *", raw_pharm, maxsplit=1)
+    main_part    = parts[0].strip()
+    contact_part = parts[1] if len(parts) > 1 else ""
+
+    addr_pat = re.compile(r"\b(RTE|Route|Rue|Av|Avenue)\b", re.IGNORECASE)
+    m = addr_pat.search(main_part)
+    if m:
+        pharmacyName    = main_part[:m.start()].strip()
+        pharmacyAddress = main_part[m.start():].strip()
+    elif " - " in main_part:
+        pharmacyName, pharmacyAddress = [p.strip() for p in main_part.split(" - ", 1)]
+    else:
+        pharmacyName    = main_part
+        pharmacyAddress = None
+
+    tel_m = re.search(r"^([\d\s]+)", contact_part)
+    fax_m = re.search(r"Fax[:]? *([\d\s]+)", contact_part, re.IGNORECASE)
+    pharmacyContact = " / ".join(filter(None, [
+        tel_m and tel_m.group(1).strip(),
+        fax_m and fax_m.group(1).strip(),
+    ])) or None
+
+    fisc_m          = re.search(r"Matricule\s+Fisc[^\w]*(\w+)", contact_part, re.IGNORECASE)
+    pharmacyFiscalId = fisc_m.group(1).strip() if fisc_m else None
+
+    # ─── 10) NEW FIELDS (doctor info, CNAM fields, etc.) ────────────
+    # Executor/exécuteur: standardize on `executor` or `executeur` everywhere
+    executor          = txt("executeur") or txt("info_medecin") or ""
+    pharmacistCnamRef = txt("ref_cnam") or txt("code_cnam") or ""
+    # Prescriber code fallback logic for code_cnam field
+    code_cnam = prescriberCode or txt("code_cnam") or ""
+    # Doctor signature fields
+    signatureDocteurField = txt("signatureDocteurField") or ""
+    nom_prenom_docteur    = txt("nom_prenom_docteur") or ""
+
+    output = {
+        "header":            {"documentType": "prescription"},
+        "pharmacyName":      pharmacyName,
+        "pharmacyAddress":   pharmacyAddress,
+        "pharmacyContact":   pharmacyContact,
+        "pharmacyFiscalId":  pharmacyFiscalId,
+
+        "beneficiaryId":     formatted_id,
+        "patientIdentity":   patientIdentity,
+
+        "prescriberCode":    prescriberCode,
+        "prescriptionDate":  prescriptionDate,
+        "regimen":           regimen,
+        "dispensationDate":  dispensationDate,
+        "executor":          executor,           
+        "ref_cnam":          pharmacistCnamRef,  
+        "code_cnam":         code_cnam,
+        "signatureDocteurField": signatureDocteurField,  
+        "nom_prenom_docteur":   nom_prenom_docteur,
+
+        "items":             items,
+        "total":             total,
+    }
+
+    # ─── 12) signature crop & naming ────────────────────────────────
+    try:
+        # Only attempt cropping if coordinates exist (pseudo-code, adjust as needed)
+        if scan_path is not None and has_signature_coordinates(result):
+            doc_name = get_doctor_name(scan_path, name=nom_prenom_docteur, page_budget=page_budget)
+            sig_crop = get_signature_crop(str(scan_path), priority=priority, page_budget=page_budget)
+            stored   = save_signature(sig_crop, doc_name)
+            output["signatureCropFile"]  = stored["file"]
+            output["signatureThumbFile"] = stored["thumb_webp"]
+        else:
+            output["signatureCropFile"]  = None
+            output["signatureThumbFile"] = None
+    except Exception as e:
+        logging.error(f"Signature cropping failed: {e}")
+        output["signatureCropFile"]  = None
+        output["signatureThumbFile"] = None
+    notify(progress, "signature_cropped", signatureCropFile=output["signatureCropFile"],
+           signatureThumbFile=output["signatureThumbFile"])
+
+    return output
+
+def parse_prescription_ocr(
+    file_bytes: bytes,
+    filename: str,
+    pages: Optional[str] = None,
+    priority: str = INTERACTIVE,
+    progress: Optional[Callable[..., None]] = None,
+    page_budget: PageBudget | int | None = PAGE_MEMORY_BUDGET,
+) -> dict:
     tmp_path: Optional[Path] = None
     try:
         # 1) dump bytes to temp file
@@ -370,221 +786,103 @@ def parse_prescription_ocr(file_bytes: bytes, filename: str) -> dict:
 
         # 2) call Azure Document Intelligence
         model_id = "ordonnance"
-        result   = analyze_document(tmp_path, model_id=model_id, pages=None)
-        doc      = result.documents[0]
-        f        = doc.fields
-
-        # GUARD: ensure at least one table back
-        raw_tables = result.tables
-        if len(raw_tables) < 1:
-            raise ValueError(f"Expected at least 1 table but found {len(raw_tables)}; not a valid prescription.")
-
-        logging.info("Processing document fields: %s", list(f.keys()))
-        logging.info("Tables found by column count: %s", [tbl.column_count for tbl in result.tables])
-
-        def txt(key: str) -> Optional[str]:
-            fld = f.get(key)
-            if not fld:
-                return None
-            return fld.get("valueString") or fld.get("content")
-
-        # 3) parse all tables into (col_count, matrix)
-        tables: list[tuple[int, list[list[str]]]] = []
-        for tbl in result.tables:
-            mat = [[""] * tbl.column_count for _ in range(tbl.row_count)]
-            for cell in tbl.cells:
-                mat[cell.row_index][cell.column_index] = cell.content.strip()
-            tables.append((tbl.column_count, mat))
-
-        items_mat = next((m for c, m in tables if c >= 8), None)
-        meta_mat  = next((m for c, m in tables if c == 2), None)
-
-        # 4) parse the 8-col items (and footer)
-        items: list[dict] = []
-        total: Optional[str] = None
-        if items_mat and len(items_mat) > 1:
-            for row in items_mat[1:-1]:
-                cells = (row + [""] * 8)[:8]
-                items.append({
-                    "codePCT":      cells[0],
-                    "produit":      cells[1],
-                    "forme":        cells[2],
-                    "qte":          cells[3],
-                    "puv":          cells[4],
-                    "montantPercu": cells[5],
-                    "nio":          cells[6],
-                    "prLot":        cells[7],
-                })
-            footer = items_mat[-1]
-            if footer and footer[0].lower().startswith("total"):
-                total = footer[0]
-
-        # 5) parse the 2-col metadata
-        beneficiaryId = patientIdentity = prescriberCode = None
-        prescriptionDate = regimen = dispensationDate = None
-
-        if meta_mat:
-            for key_cell, val_cell in meta_mat:
-                key = key_cell.strip().lower()
-                val = val_cell.strip()
-
-                if not val and "date de la prescription" in key:
-                    m = re.search(r"(\d{1,2}[\/\.-]\d{1,2}[\/\.-]\d{2,4})", key_cell)
-                    prescriptionDate = m.group(1) if m else None
-                    continue
-                if not val and "date de dispensation" in key:
-                    m = re.search(r"(\d{1,2}[\/\.-]\d{1,2}[\/\.-]\d{2,4})", key_cell)
-                    dispensationDate = m.group(1) if m else None
-                    continue
-
-                if "bénéficiaire" in key:
-                    beneficiaryId = val
-                elif "identité" in key and "malade" in key:
-                    patientIdentity = val
-                elif "prescripteur" in key:
-                    prescriberCode = val
-                elif "date de la prescription" in key:
-                    prescriptionDate = val or prescriptionDate
-                elif "régime" in key:
-                    regimen = val or regimen
-                elif "date de dispensation" in key:
-                    dispensationDate = val or dispensationDate
-
-        # 6) SAFE FALLBACKS for missing metadata
-        beneficiaryId    = beneficiaryId   or txt("id_unique") or ""
-        formatted_id     = format_prescription_id(beneficiaryId)
-        patientIdentity  = patientIdentity or txt("nom_prenom") or ""
-        prescriberCode   = prescriberCode  or txt("code_apci")
-        prescriptionDate = prescriptionDate or txt("date")
-        dispensationDate = dispensationDate or txt("date_numero")
-        regimen          = regimen          or txt("regime")
-
-        # 7) fallback items from `prescription_items` array or from 'medications' free-text field
-        if not items and f.get("prescription_items"):
-            arr = f["prescription_items"].get("valueArray", [])
-            for idx, row in enumerate(arr):
-                cells = [(c.get("valueString") or c.get("content") or "").strip()
-                        for c in row.get("valueArray", [])]
-                if idx == 0:
-                    continue
-                if cells and cells[0].lower().startswith("total"):
-                    total = cells[0]
-                    continue
-                a, b, c_, d = (cells + [""] * 4)[:4]
-                items.append({
-                    "codePCT": a,
-                    "produit": b,
-                    "forme":   c_,
-                    "qte":     d,
-                })
-        elif not items and txt("medications"):
-            meds_text = txt("medications")
-            med_lines = re.split(r"[-,]", meds_text)
-            med_lines = [line.strip() for line in med_lines if line.strip()]
-            for line in med_lines:
-                # Fuzzy match for med name
-                corrected, score = correct_medication_name(line, med_ref)
-                name = corrected["name"] if corrected else line
-
-                # Extract the first number as dosage
-                dosage_match = re.search(r"\b(\d+(\.\d+)?)(?:\s?(mg|ml|g|mcg))?\b", line, re.IGNORECASE)
-                dosage = dosage_match.group(1) if dosage_match else ""
-
-                # Combine for produit
-                produit = f"{name} {dosage}".strip()
-
-                items.append({
-                    "codePCT": "NA",
-                    "produit": produit,
-                    "forme": "NA",
-                    "qte": "NA",
-                    "puv": "NA",
-                    "montantPercu": "NA",
-                    "nio": "NA",
-                    "prLot": "NA",
-                })
-
-        # 8) fallback total from the raw field
-        total = total or txt("total_ttc") or ""
-
-        # 9) split the `pharmacie` blob
-        raw_pharm    = txt("pharmacie") or ""
-        parts        = re.split(r"Tél[:]? *", raw_pharm, maxsplit=1)
-        main_part    = parts[0].strip()
-        contact_part = parts[1] if len(parts) > 1 else ""
-
-        addr_pat = re.compile(r"\b(RTE|Route|Rue|Av|Avenue)\b", re.IGNORECASE)
-        m = addr_pat.search(main_part)
-        if m:
-            pharmacyName    = main_part[:m.start()].strip()
-            pharmacyAddress = main_part[m.start():].strip()
-        elif " - " in main_part:
-            pharmacyName, pharmacyAddress = [p.strip() for p in main_part.split(" - ", 1)]
-        else:
-            pharmacyName    = main_part
-            pharmacyAddress = None
-
-        tel_m = re.search(r"^([\d\s]+)", contact_part)
-        fax_m = re.search(r"Fax[:]? *([\d\s]+)", contact_part, re.IGNORECASE)
-        pharmacyContact = " / ".join(filter(None, [
-            tel_m and tel_m.group(1).strip(),
-            fax_m and fax_m.group(1).strip(),
-        ])) or None
-
-        fisc_m          = re.search(r"Matricule\s+Fisc[^\w]*(\w+)", contact_part, re.IGNORECASE)
-        pharmacyFiscalId = fisc_m.group(1).strip() if fisc_m else None
-
-        # ─── 10) NEW FIELDS (doctor info, CNAM fields, etc.) ────────────
-        # Executor/exécuteur: standardize on `executor` or `executeur` everywhere
-        executor          = txt("executeur") or txt("info_medecin") or ""
-        pharmacistCnamRef = txt("ref_cnam") or txt("code_cnam") or ""
-        # Prescriber code fallback logic for code_cnam field
-        code_cnam = prescriberCode or txt("code_cnam") or ""
-        # Doctor signature fields
-        signatureDocteurField = txt("signatureDocteurField") or ""
-        nom_prenom_docteur    = txt("nom_prenom_docteur") or ""
-
-        output = {
-            "header":            {"documentType": "prescription"},
-            "pharmacyName":      pharmacyName,
-            "pharmacyAddress":   pharmacyAddress,
-            "pharmacyContact":   pharmacyContact,
-            "pharmacyFiscalId":  pharmacyFiscalId,
-
-            "beneficiaryId":     formatted_id,
-            "patientIdentity":   patientIdentity,
-
-            "prescriberCode":    prescriberCode,
-            "prescriptionDate":  prescriptionDate,
-            "regimen":           regimen,
-            "dispensationDate":  dispensationDate,
-            "executor":          executor,           
-            "ref_cnam":          pharmacistCnamRef,  
-            "code_cnam":         code_cnam,
-            "signatureDocteurField": signatureDocteurField,  
-            "nom_prenom_docteur":   nom_prenom_docteur,
-
-            "items":             items,
-            "total":             total,
-        }
-
-        # ─── 12) signature crop & naming ────────────────────────────────
-        try:
-            # Only attempt cropping if coordinates exist (pseudo-code, adjust as needed)
-            if has_signature_coordinates(result):
-                doc_name = get_doctor_name(tmp_path)
-                sig_crop = get_signature_crop(tmp_path)
-                sig_dir = Path("signatures")
-                sig_dir.mkdir(exist_ok=True)
-                crop_path = sig_dir / f"{doc_name}_signature.png"
-                cv2.imwrite(str(crop_path), sig_crop)
-                output["signatureCropFile"] = str(crop_path)
-            else:
-                output["signatureCropFile"] = None
-        except Exception as e:
-            logging.error(f"Signature cropping failed: {e}")
-            output["signatureCropFile"] = None
+        notify(progress, "azure_submitted", modelId=model_id, pages=pages)
+        result   = analyze_document(tmp_path, model_id=model_id, pages=pages, priority=priority)
+        notify(progress, "azure_done", tables=len(result.tables), fields=len(result.documents[0].fields))
+        save_result(content_hash(file_bytes), "prescription", model_id, pages, result)
+        return prescription_from_result(result, tmp_path, priority=priority, progress=progress,
+                                        page_budget=page_budget)
 
     finally:
         if tmp_path and tmp_path.exists():
             tmp_path.unlink()
+
+# ─── Hedged execution: fall back to local zonal OCR when Azure is slow/down ───
+# seconds to wait for Azure before starting the local path (unset → wait, but still fall back on errors)
+HEDGE_BUDGET_S = float(os.getenv("AZURE_HEDGE_BUDGET_S")) if os.getenv("AZURE_HEDGE_BUDGET_S") else None
+_hedge_pool = ThreadPoolExecutor(max_workers=int(os.getenv("AZURE_MAX_INFLIGHT", "8")) * 2,
+                                 thread_name_prefix="azure-hedge")
+
+def parse_local_ocr(kind: str, file_bytes: bytes, filename: str, pages: Optional[str] = None) -> dict:
+    """Local Tesseract extraction into the same dict shape as the Azure parsers."""
+    tmp_path: Optional[Path] = None
+    try:
+        suffix = Path(filename).suffix or ".pdf"
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+            tmp.write(file_bytes)
+            tmp_path = Path(tmp.name)
+        if kind == "prescription":
+            return prescription_from_result(local_prescription_result(str(tmp_path), pages))
+        return bulletin_from_result(local_bulletin_result(str(tmp_path), pages))
+    finally:
+        if tmp_path and tmp_path.exists():
+            tmp_path.unlink()
+
+def parse_hedged(
+    kind: str,
+    file_bytes: bytes,
+    filename: str,
+    pages: Optional[str] = None,
+    priority: str = INTERACTIVE,
+    progress: Optional[Callable[..., None]] = None,
+    budget: Optional[float] = None,
+    page_budget: PageBudget | int | None = PAGE_MEMORY_BUDGET,
+) -> dict:
+    """
+    Azure parse with a latency budget. If Azure has not answered within `budget`
+    seconds (default HEDGE_BUDGET_S) or fails, the key fields are extracted locally
+    and the response is marked "degraded". The budget runs from when a pool
+    worker picks the call up, so waiting for a free thread doesn't count. A ValueError from Azure means the
+    document itself was rejected, so it is raised as usual.
+    Once the hedge fires, the Azure call no longer reports progress: the caller
+    has already been told the parse is degraded (or done).
+    `page_budget` covers the pages rendered for the signature crop (prescriptions).
+    """
+    budget   = HEDGE_BUDGET_S if budget is None else budget
+    azure_fn = parse_prescription_ocr if kind == "prescription" else parse_bulletin_ocr
+    muted    = threading.Event()
+
+    def azure_progress(stage: str, **data) -> None:
+        if not muted.is_set():
+            notify(progress, stage, **data)
+
+    extra = {"page_budget": page_budget} if kind == "prescription" else {}
+    future, started = submit_started(_hedge_pool, azure_fn, file_bytes, filename, pages, priority,
+                                     azure_progress, **extra)
+    try:
+        parsed = result_within(future, started, budget)
+        parsed["degraded"] = False
+        return parsed
+    except FutureTimeout:
+        reason = "azure_timeout"
+    except ValueError:
+        raise
+    except Exception as e:
+        logging.error("Azure parse failed, using local OCR: %s", e)
+        reason = "azure_error"
+
+    muted.set()
+    notify(progress, "degraded", reason=reason)
+    try:
+        parsed = parse_local_ocr(kind, file_bytes, filename, pages)
+    except Exception:
+        # local OCR failed too: a late Azure answer still beats an error
+        if reason == "azure_timeout":
+            try:
+                parsed = future.result()
+            except Exception:
+                pass
+            else:
+                parsed["degraded"] = False
+                return parsed
+        raise
+
+    # Azure may have come back while Tesseract was running – prefer it if so
+    if future.done() and future.exception() is None:
+        parsed = future.result()
+        parsed["degraded"] = False
+        return parsed
+
+    parsed["degraded"]       = True
+    parsed["degradedReason"] = reason
+    return parsed
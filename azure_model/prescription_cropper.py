@@ -1,65 +1,103 @@
-import sys, os, cv2, string, pytesseract
+import sys, os, cv2, string, logging, threading, pytesseract
 import numpy as np
+from PIL import Image
 from pdf2image import convert_from_path
 from typing import List
+from .phash import HashCache, dhash
+from .pages import PageBudget, as_budget, first_page, iter_pages
+
+try:
+    import tesserocr        # in-process Tesseract API (needs libtesseract, see requirements.txt)
+except ImportError:
+    tesserocr = None
+logging.info("▷ OCR backend: %s", "tesserocr (in-process)" if tesserocr else "pytesseract (one process per call)")
 
 os.environ["TESSDATA_PREFIX"] = r"C:\Program Files\Tesseract-OCR\tessdata"
 
+# ─── Doctor name (header band only) ─────────────────────────────────────────
+HEADER_FRAC  = 0.2      # top fraction of page 1 that holds the letterhead
+HEADER_WIDTH = 1400     # render page 1 at this width (~170 DPI on A4) instead of 300 DPI
+
+# prescriptions from one doctor share a letterhead → same header hash → same name
+_name_cache = HashCache(maxsize=512, max_distance=12)
+_tess_local = threading.local()
+
+def render_header_band(path: str, frac: float = HEADER_FRAC, width: int = HEADER_WIDTH,
+                       budget: PageBudget | int | None = None) -> np.ndarray:
+    """
+    Grayscale top band of page 1, rendered at a DPI adapted to the page width.
+    The rendered page counts against `budget` until the band is cut out.
+    """
+    if path.lower().endswith(".pdf"):
+        pil  = convert_from_path(path, first_page=1, last_page=1, size=(width, None), grayscale=True)
+        gray = np.array(pil[0])
+    else:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise FileNotFoundError(f"Cannot read file: {path}")
+        if gray.shape[1] > width:
+            scale = width / float(gray.shape[1])
+            gray  = cv2.resize(gray, (width, int(gray.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+    with as_budget(budget).hold(gray.nbytes, os.path.basename(path)):
+        # copy, so the full page can be freed once we return
+        return gray[0:int(gray.shape[0] * frac), :].copy()
+
+def ocr_text(img: np.ndarray, lang: str = "fra", psm: int = 6) -> str:
+    """
+    OCR through a persistent per-thread tesserocr API when available (no process
+    start per call); falls back to the pytesseract subprocess otherwise.
+    """
+    if tesserocr is None:
+        return pytesseract.image_to_string(img, lang=lang, config=f"--psm {psm}")
+    api = getattr(_tess_local, "api", None)
+    if api is None or _tess_local.key != (lang, psm):
+        if api is not None:
+            api.End()
+        api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm)
+        _tess_local.api, _tess_local.key = api, (lang, psm)
+    api.SetImage(Image.fromarray(img))
+    return api.GetUTF8Text()
+
+def name_from_text(text: str, keywords: list) -> str | None:
+    """Words next to a 'Docteur'/'Dr' keyword; the next line when the keyword stands alone."""
+    kws   = {kw.lower().strip(".") for kw in keywords}
+    lines = [ln.split() for ln in text.splitlines() if ln.strip()]
+    for i, words in enumerate(lines):
+        stripped = [w.lower().strip(string.punctuation) for w in words]
+        if not any(w in kws for w in stripped):
+            continue
+        rest = [w for w, lw in zip(words, stripped) if lw not in kws and lw]
+        if not rest and i + 1 < len(lines):
+            rest = lines[i + 1]
+        if rest:
+            return " ".join(rest)
+    return None
+
 def extract_doctor_name(
     path: str,
     keywords: list = ["docteur", "dr"],
     lang: str = "fra",
     psm: int = 6,
+    page_budget: PageBudget | int | None = None,
     ) -> str:
-    
-    gray = load_grayscale_pages(path)[0]
-    
-    h,w = gray.shape
-    hdr = gray[0:int(h*0.2), :]
-    
-    data = pytesseract.image_to_data(
-        hdr,
-        lang=lang,
-        config=f"--psm {psm}",
-        output_type=pytesseract.Output.DICT,
-    )
-    
-    name = None
-    for i, word in enumerate(data["text"]):
-        if not word.strip(): continue
-        lw = word.lower().strip(string.punctuation)
-        for kw in keywords:
-           if kw.lower().strip(".") in lw:
-               line_num = data["line_num"][i]
-               parts = [t for j,t in enumerate(data["text"])
-                        if data["line_num"][j] == line_num and t.strip()]
-               filtered = [p for p in parts if p.lower().strip(".") not in 
-                           [kw.lower().strip(".") for kw in keywords]]
-               name = " ".join(filtered)
-               break
-           if name: 
-               break
-        if not name:
-            name = os.path.basename(path).split(".")[0]
-        safe = "".join(c if c.isalnum() else "_" for c in name).strip("_")
-        return safe
-               
-        
+
+    hdr = render_header_band(path, budget=page_budget)
+    key = dhash(hdr, size=16)
+    cached = _name_cache.get(key)
+    if cached:
+        return cached
+
+    name = name_from_text(ocr_text(hdr, lang=lang, psm=psm), keywords)
+    if not name:
+        return "".join(c if c.isalnum() else "_" for c in os.path.basename(path).split(".")[0]).strip("_")
+
+    safe = "".join(c if c.isalnum() else "_" for c in name).strip("_")
+    _name_cache.put(key, safe)
+    return safe
+
 def load_grayscale_pages(path: str, dpi: int = 300) -> List[np.ndarray]:
-    
-    ext = path.lower().rsplit('.', 1)[-1]
-    pages = []
-    if ext == 'pdf':
-        pil_pages = convert_from_path(path, dpi=dpi)
-        for pil in pil_pages:
-            img = cv2.cvtColor(np.array(pil), cv2.COLOR_RGB2GRAY)
-            pages.append(img)
-    else:
-        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-        if img is None:
-            raise FileNotFoundError(f"Cannot read file: {path}")
-        pages.append(img)
-    return pages
+    """Every page in grayscale (rendered one at a time, within the page memory budget)."""
+    return list(iter_pages(path, dpi=dpi, cumulative=True))
 
 DEBUG_OUT = "debug_crops"
 os.makedirs(DEBUG_OUT, exist_ok=True)
@@ -232,10 +270,7 @@ def crop_signature_first_page(path: str) -> np.ndarray:
     """
     Load only the first page of the document and crop the signature region.
     """
-    pages = load_grayscale_pages(path)
-    if not pages:
-        raise RuntimeError(f"No pages found in {path}")
-    return crop_signature_from_page(pages[0])
+    return crop_signature_from_page(first_page(path))
 
 if __name__ == "__main__":
     import matplotlib.pyplot as plt
@@ -0,0 +1,229 @@
+# azure_model/refdata.py
+"""
+Read-only reference data compiled into memory-mappable files.
+
+Every uvicorn worker used to parse liste_amm.xls into its own DataFrame,
+run ORB over the header templates and decode the genuine-signature images.
+`build` does that work once and writes plain .npy files; workers `np.load`
+them with mmap_mode="r", so the bytes live once in the OS page cache and are
+shared by every process:
+
+    refdata/
+      manifest.json            sources (size + mtime), column names, template labels/hashes
+      med/<n>.npy              one array per liste_amm column (UTF-8 bytes for text)
+      templates/<n>.npy        ORB descriptors of each header image in assets/
+      galleries/<doctor>.npy   preprocessed genuine signatures, stacked
+
+    python -m azure_model.refdata build            # after changing assets/ or liste_amm.xls
+    python -m azure_model.refdata build --out /srv/refdata
+
+When the folder is missing or older than its sources, the loaders fall back
+to the original files (same results, per-process memory).
+
+Not everything stays shared. Each worker still decodes the medicine names
+into a Python list of str (rapidfuzz matches against str choices, and
+decoding them on every lookup would cost more than it saves). FLANN also
+copies the template descriptors into its own index when the registry is
+built. What is shared is the rest of the med columns, the galleries and the
+descriptor files themselves. The per-process saving is the DataFrame, the ORB
+runs and the image decoding, not the whole footprint.
+"""
+import os
+import json
+import logging
+import argparse
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+PKG_DIR     = Path(__file__).resolve().parent
+REPO_DIR    = PKG_DIR.parent
+REFDATA_DIR = Path(os.getenv("REFDATA_DIR", REPO_DIR / "refdata"))
+AMM_PATH    = PKG_DIR / "liste_amm.xls"
+ASSETS_DIR  = REPO_DIR / "assets"
+# cropped genuine signatures per doctor (data/genuine/ holds the source PDFs, not images)
+GENUINE_DIR = PKG_DIR / "data" / "crops"
+IMAGE_EXTS  = (".png", ".jpg", ".jpeg")
+
+
+# ─── Medication table ────────────────────────────────────────────────────────
+
+class MedTable:
+    """
+    Column store over liste_amm. `names` (the fuzzy-match choices) is decoded
+    once per process; other columns stay mapped and a row is only decoded on a match.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], name_col: str = "Nom"):
+        self.columns = columns
+        self.name_col = name_col
+        self.names: List[str] = [self._value(columns[name_col][i]) for i in range(len(self))]
+
+    def __len__(self) -> int:
+        return len(self.columns[self.name_col])
+
+    @staticmethod
+    def _value(v):
+        if isinstance(v, (bytes, np.bytes_)):
+            return bytes(v).decode("utf-8")
+        return v.item() if isinstance(v, np.generic) else v
+
+    def row(self, idx: int) -> dict:
+        return {col: self._value(arr[idx]) for col, arr in self.columns.items()}
+
+    @classmethod
+    def from_dataframe(cls, df) -> "MedTable":
+        return cls({col: column_array(df[col]) for col in df.columns})
+
+
+def column_array(series) -> np.ndarray:
+    """Numeric columns keep their dtype; everything else → fixed-width UTF-8 bytes."""
+    values = series.to_numpy()
+    if values.dtype.kind in "biuf":
+        return values
+    encoded = [("" if v is None or v != v else str(v)).encode("utf-8") for v in values]
+    width   = max((len(e) for e in encoded), default=1) or 1
+    return np.array(encoded, dtype=f"S{width}")
+
+
+# ─── Build ───────────────────────────────────────────────────────────────────
+
+def _source_stamp(path: Path) -> Optional[dict]:
+    if not path.exists():
+        return None
+    files = [path] if path.is_file() else sorted(p for p in path.rglob("*") if p.is_file())
+    return {"size": sum(p.stat().st_size for p in files),
+            "mtime": max((p.stat().st_mtime for p in files), default=0.0)}
+
+
+def build(out: Path = REFDATA_DIR, amm: Path = AMM_PATH, assets: Path = ASSETS_DIR,
+          genuine: Path = GENUINE_DIR) -> dict:
+    import pandas as pd
+    from .templates import TemplateRegistry
+    from .signature_pipeline import preprocess
+
+    out = Path(out)
+    for sub in ("med", "templates", "galleries"):
+        (out / sub).mkdir(parents=True, exist_ok=True)
+
+    # 1) liste_amm → one .npy per column
+    df = pd.read_excel(amm)
+    med_cols = []
+    for i, col in enumerate(df.columns):
+        fname = f"{i:02d}.npy"
+        np.save(out / "med" / fname, column_array(df[col]), allow_pickle=False)
+        med_cols.append({"name": str(col), "file": fname})
+    logging.info("▷ med table: %d rows × %d columns", len(df), len(med_cols))
+
+    # 2) header templates → descriptors
+    registry = TemplateRegistry.from_directory(assets)
+    templates = []
+    for i, t in enumerate(registry.templates):
+        fname = f"{i:02d}.npy"
+        np.save(out / "templates" / fname, t.descriptors, allow_pickle=False)
+        templates.append({"label": t.label, "source": t.source, "hash": str(t.hash),
+                          "shape": list(t.shape), "file": fname})
+    logging.info("▷ templates: %d", len(templates))
+
+    # 3) genuine signatures → one stack of preprocessed samples per doctor
+    galleries = {}
+    if genuine.is_dir():
+        for folder in sorted(p for p in genuine.iterdir() if p.is_dir()):
+            samples = []
+            for f in sorted(folder.iterdir()):
+                if f.suffix.lower() in IMAGE_EXTS:
+                    g = cv2.imread(str(f), cv2.IMREAD_GRAYSCALE)
+                    if g is not None:
+                        samples.append(preprocess(g))
+            if samples:
+                np.save(out / "galleries" / f"{folder.name}.npy", np.stack(samples), allow_pickle=False)
+                galleries[folder.name] = len(samples)
+    logging.info("▷ galleries: %d doctor(s)", len(galleries))
+
+    manifest = {
+        "sources":   {"amm": _source_stamp(amm), "assets": _source_stamp(assets), "genuine": _source_stamp(genuine)},
+        "med":       med_cols,
+        "templates": templates,
+        "galleries": galleries,
+    }
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False))
+    return manifest
+
+
+# ─── Load ────────────────────────────────────────────────────────────────────
+
+def _manifest(root: Path, source_key: str, source: Path) -> Optional[dict]:
+    path = root / "manifest.json"
+    if not path.exists():
+        return None
+    manifest = json.loads(path.read_text())
+    if manifest["sources"].get(source_key) != _source_stamp(source):
+        logging.warning("Reference data in %s is stale for %s – rebuild with `python -m azure_model.refdata build`",
+                        root, source)
+        return None
+    return manifest
+
+
+@lru_cache(maxsize=None)
+def med_table(root: Path = REFDATA_DIR, amm: Path = AMM_PATH) -> MedTable:
+    manifest = _manifest(Path(root), "amm", amm)
+    if manifest is None:
+        import pandas as pd
+        return MedTable.from_dataframe(pd.read_excel(amm))
+    return MedTable({c["name"]: np.load(Path(root) / "med" / c["file"], mmap_mode="r") for c in manifest["med"]})
+
+
+@lru_cache(maxsize=None)
+def template_registry(root: Path = REFDATA_DIR, assets: Path = ASSETS_DIR):
+    from .templates import Template, TemplateRegistry
+    manifest = _manifest(Path(root), "assets", assets)
+    if manifest is None:
+        return TemplateRegistry.from_directory(assets)
+    templates = []
+    for meta in manifest["templates"]:
+        templates.append(Template.from_descriptors(
+            meta["label"], np.load(Path(root) / "templates" / meta["file"], mmap_mode="r"),
+            int(meta["hash"]), tuple(meta["shape"]), meta["source"],
+        ))
+    return TemplateRegistry(templates)
+
+
+def gallery_path(doctor_dir: str, root: Path = REFDATA_DIR, genuine: Path = GENUINE_DIR) -> str:
+    """
+    The compiled gallery (.npy) for a doctor folder name, else the folder of images
+    (signature_pipeline --doctor NAME).
+    """
+    if _manifest(Path(root), "genuine", genuine) is not None:
+        compiled = Path(root) / "galleries" / f"{doctor_dir}.npy"
+        if compiled.exists():
+            return str(compiled)
+    return str(genuine / doctor_dir)
+
+
+def load_gallery(path: str) -> np.ndarray:
+    """(k, h, w) stack of preprocessed genuine signatures, mapped read-only."""
+    return np.load(path, mmap_mode="r")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    p = argparse.ArgumentParser(description="Compile reference data into memory-mappable files.")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build")
+    b.add_argument("--out", type=Path, default=REFDATA_DIR)
+    b.add_argument("--amm", type=Path, default=AMM_PATH)
+    b.add_argument("--assets", type=Path, default=ASSETS_DIR)
+    b.add_argument("--genuine", type=Path, default=GENUINE_DIR)
+    args = p.parse_args()
+
+    if args.cmd == "build":
+        manifest = build(args.out, args.amm, args.assets, args.genuine)
+        print(f"Wrote {len(manifest['med'])} med column(s), {len(manifest['templates'])} template(s), "
+              f"{len(manifest['galleries'])} galler(y/ies) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
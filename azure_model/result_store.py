@@ -0,0 +1,85 @@
+# azure_model/result_store.py
+"""
+Raw Azure AnalyzeResult archive, keyed by the document's content hash.
+
+    analysis_results/<h[:2]>/<h>.<kind>.<pages>.json.gz
+
+Each file is a gzip'd JSON envelope ({"content_hash", "kind", "model_id",
+"pages", "stored_at", "result"}) written right after Azure answers, so a fixed
+field mapping can be re-applied offline (backend.services.reparse) without
+sending anything to Azure again.
+"""
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Iterator, Optional
+
+RESULT_DIR    = Path(os.getenv("AZURE_RESULT_DIR", "analysis_results"))
+STORE_RESULTS = os.getenv("AZURE_STORE_RESULTS", "1") != "0"
+GZIP_LEVEL    = 6
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _pages_key(pages: Optional[str]) -> str:
+    return re.sub(r"[^0-9,\-]", "", pages) if pages else "all"
+
+
+def result_path(digest: str, kind: str, pages: Optional[str] = None, root: Path = RESULT_DIR) -> Path:
+    return root / digest[:2] / f"{digest}.{kind}.{_pages_key(pages)}.json.gz"
+
+
+def result_to_dict(result) -> dict:
+    """AnalyzeResult (SDK model) → plain JSON-able dict, in the service's own camelCase shape."""
+    if hasattr(result, "as_dict"):
+        return result.as_dict()
+    return json.loads(json.dumps(result, default=lambda o: getattr(o, "__dict__", str(o))))
+
+
+def result_from_dict(data: dict):
+    """Plain dict → AnalyzeResult, so the pipeline's attribute *and* mapping access both work."""
+    from azure.ai.documentintelligence.models import AnalyzeResult
+    return AnalyzeResult(data)
+
+
+def save_result(digest: str, kind: str, model_id: str, pages: Optional[str], result,
+                root: Path = RESULT_DIR) -> Optional[Path]:
+    """Archive one result (best effort: a failure here never fails the parse)."""
+    if not STORE_RESULTS:
+        return None
+    path = result_path(digest, kind, pages, root)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        envelope = {"content_hash": digest, "kind": kind, "model_id": model_id, "pages": pages,
+                    "stored_at": time.time(), "result": result_to_dict(result)}
+        tmp = path.with_suffix(".part")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=GZIP_LEVEL) as f:
+            json.dump(envelope, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+    except Exception as e:
+        logging.warning("Could not archive Azure result for %s: %s", digest[:12], e)
+        return None
+
+
+def load_envelope(path: Path) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_result_files(root: Path = RESULT_DIR, kind: Optional[str] = None) -> Iterator[Path]:
+    """
+    Every archived result – one per content hash, kind and page range, since a
+    split upload stores one per segment. Sorted, so a hash's results are adjacent.
+    """
+    for path in sorted(root.glob("*/*.json.gz")):
+        if kind and path.name.split(".")[1] != kind:
+            continue
+        yield path
@@ -0,0 +1,279 @@
+# azure_model/scheduler.py
+"""
+Rate-limit-aware scheduler for every call we make to Azure Document Intelligence.
+
+All Azure traffic goes through ``scheduler.submit(...)`` so that:
+  * a token bucket keeps us under the tier's transactions-per-second,
+  * at most ``max_inflight`` submits run at once (the slot is released once
+    Azure has accepted the analysis, not when it finishes),
+  * interactive requests always jump ahead of batch jobs,
+  * 429 / 503 answers are retried with ``Retry-After`` or jittered backoff.
+
+The scheduler is the only layer that retries HTTP status answers: clients
+are built with CLIENT_OPTIONS, which stops the SDK's RetryPolicy from retrying
+statuses, so a throttled call isn't retried (SDK retries × scheduler retries)
+times. Connection and read failures carry no status, so the SDK keeps
+retrying those.
+"""
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Optional
+
+INTERACTIVE = "interactive"
+BATCH       = "batch"
+LANES       = (INTERACTIVE, BATCH)
+
+# status codes Azure uses when it wants us to slow down
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# DocumentIntelligenceClient(endpoint, credential, **CLIENT_OPTIONS): the SDK still
+# retries dropped connections / read timeouts, but leaves 429 / 5xx to the scheduler
+CLIENT_OPTIONS = {"retry_status": 0}
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate        = float(rate)
+        self.capacity    = float(capacity if capacity is not None else rate)
+        self._clock      = clock
+        self._tokens     = self.capacity
+        self._updated    = clock()
+        self._paused_til = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens  = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take one token. Returns 0 on success, otherwise the seconds to wait."""
+        now = self._clock()
+        if now < self._paused_til:
+            return self._paused_til - now
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for ``seconds`` (used when Azure sends Retry-After)."""
+        now = self._clock()
+        self._paused_til = max(self._paused_til, now + seconds)
+        self._tokens     = 0.0
+        self._updated    = now
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _status_code(exc: BaseException) -> Optional[int]:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    for key in ("Retry-After", "retry-after", "x-ms-retry-after-ms"):
+        raw = headers.get(key)
+        if raw is None:
+            continue
+        try:
+            val = float(raw)
+        except (TypeError, ValueError):
+            continue
+        return val / 1000.0 if key.endswith("-ms") else val
+    return None
+
+
+class _Ticket:
+    __slots__ = ("lane", "enqueued_at")
+
+    def __init__(self, lane: str, enqueued_at: float):
+        self.lane        = lane
+        self.enqueued_at = enqueued_at
+
+
+class AzureScheduler:
+    """
+    Blocking scheduler shared by every thread that talks to Azure.
+
+    ``submit`` parks the calling thread until (1) its ticket is at the head of
+    the highest-priority non-empty lane, (2) an in-flight slot is free and
+    (3) the token bucket grants a token. It then runs the call, retrying
+    throttled/transient failures up to ``max_retries`` times.
+    """
+
+    def __init__(
+        self,
+        tps: float = 15.0,
+        max_inflight: int = 8,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.bucket       = TokenBucket(tps, capacity=max(1.0, tps), clock=clock)
+        self.max_inflight = max_inflight
+        self.max_retries  = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap  = backoff_cap
+        self._clock       = clock
+        self._sleep       = sleep
+        self._cond        = threading.Condition()
+        self._queues      = {lane: deque() for lane in LANES}
+        self._inflight    = 0
+        self._stats       = {
+            lane: {"submitted": 0, "dispatched": 0, "completed": 0, "failed": 0, "retries": 0,
+                   "throttled": 0, "wait_total_s": 0.0, "wait_max_s": 0.0}
+            for lane in LANES
+        }
+
+    # ── slot management ─────────────────────────────────────────────────
+    def _is_next(self, ticket: _Ticket) -> bool:
+        for lane in LANES:
+            q = self._queues[lane]
+            if q:
+                return q[0] is ticket
+        return False
+
+    def _acquire(self, lane: str) -> float:
+        """Block until this thread may call Azure. Returns the time spent waiting."""
+        ticket = _Ticket(lane, self._clock())
+        with self._cond:
+            self._queues[lane].append(ticket)
+            try:
+                while True:
+                    if self._is_next(ticket) and self._inflight < self.max_inflight:
+                        wait = self.bucket.try_acquire()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        self._cond.wait()
+            except BaseException:
+                self._queues[lane].remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._queues[lane].popleft()
+            self._inflight += 1
+            waited = self._clock() - ticket.enqueued_at
+            st = self._stats[lane]
+            st["dispatched"]   += 1
+            st["wait_total_s"] += waited
+            st["wait_max_s"]    = max(st["wait_max_s"], waited)
+            self._cond.notify_all()
+        return waited
+
+    def _release(self) -> None:
+        with self._cond:
+            self._inflight -= 1
+            self._cond.notify_all()
+
+    # ── public API ──────────────────────────────────────────────────────
+    def submit(self, fn: Callable[..., Any], *args, priority: str = INTERACTIVE, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` under the rate limit, retrying throttled calls."""
+        if priority not in self._queues:
+            raise ValueError(f"Unknown priority lane {priority!r}; expected one of {LANES}")
+        with self._cond:
+            self._stats[priority]["submitted"] += 1
+
+        attempt = 0
+        while True:
+            self._acquire(priority)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as exc:
+                status = _status_code(exc)
+                if status not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    with self._cond:
+                        self._stats[priority]["failed"] += 1
+                    raise
+                delay = _retry_after(exc)
+                if delay is None:
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                with self._cond:
+                    st = self._stats[priority]
+                    st["retries"] += 1
+                    if status == 429:
+                        st["throttled"] += 1
+                        # everyone backs off, not just this caller
+                        self.bucket.pause(delay)
+                logging.warning("Azure call failed with %s; retry %d/%d in %.2fs",
+                                status, attempt + 1, self.max_retries, delay)
+                attempt += 1
+            else:
+                with self._cond:
+                    self._stats[priority]["completed"] += 1
+                return result
+            finally:
+                self._release()
+            self._sleep(delay)
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth, in-flight calls and wait times per lane."""
+        with self._cond:
+            out = {"inflight": self._inflight, "max_inflight": self.max_inflight,
+                   "tps": self.bucket.rate, "lanes": {}}
+            for lane in LANES:
+                st = dict(self._stats[lane])
+                st["queue_depth"] = len(self._queues[lane])
+                st["wait_avg_s"]  = st["wait_total_s"] / st["dispatched"] if st["dispatched"] else 0.0
+                out["lanes"][lane] = st
+            return out
+
+
+# ── Shared instance (tuned to the S0 tier: 15 TPS for analyze calls) ────────
+scheduler = AzureScheduler(
+    tps=float(os.getenv("AZURE_TPS", "15")),
+    max_inflight=int(os.getenv("AZURE_MAX_INFLIGHT", "8")),
+    max_retries=int(os.getenv("AZURE_MAX_RETRIES", "5")),
+)
+
+
+def _poll(client, model_id: str, poller):
+    """
+    Wait for an accepted analysis. A throttled / transient poll failure resumes
+    polling from the continuation token (the analysis isn't submitted again).
+    """
+    token = poller.continuation_token() if hasattr(poller, "continuation_token") else None
+    attempt = 0
+    while True:
+        try:
+            return poller.result()
+        except Exception as exc:
+            if token is None or _status_code(exc) not in RETRYABLE_STATUS or attempt >= scheduler.max_retries:
+                raise
+            delay = _retry_after(exc)
+            if delay is None:
+                delay = backoff_delay(attempt, scheduler.backoff_base, scheduler.backoff_cap)
+            logging.warning("Azure poll failed with %s; retry %d/%d in %.2fs",
+                            _status_code(exc), attempt + 1, scheduler.max_retries, delay)
+            attempt += 1
+            time.sleep(delay)
+            poller = client.begin_analyze_document(model_id, continuation_token=token)
+
+
+def analyze(client, model_id: str, body, pages: Optional[str] = None, priority: str = INTERACTIVE):
+    """
+    Submit ``begin_analyze_document`` through the shared scheduler, then poll
+    outside it: the in-flight slot only covers the rate-limited submit.
+    """
+    def _submit():
+        if hasattr(body, "seek"):
+            body.seek(0)
+        kwargs = {"pages": pages} if pages else {}
+        return client.begin_analyze_document(model_id, body=body, **kwargs)
+    return _poll(client, model_id, scheduler.submit(_submit, priority=priority))
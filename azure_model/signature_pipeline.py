@@ -4,14 +4,20 @@ import sys
 import argparse
 import cv2
 import re
+import time
+import logging
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import numpy as np
 from dotenv import load_dotenv
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.core.credentials import AzureKeyCredential
-from pdf2image import convert_from_path
 from skimage.metrics import structural_similarity as ssim
 from .prescription_cropper import extract_doctor_name
+from .scheduler import CLIENT_OPTIONS, INTERACTIVE, analyze
+from .pages import PAGE_MEMORY_BUDGET, PageBudget, first_page
+from .refdata import gallery_path, load_gallery
 
 # ─── Configuration ───────────────────────────────────────────────────────────
 load_dotenv()
@@ -25,38 +31,39 @@ AKAZE_THRESHOLD = 0.20
 SSIM_THRESHOLD  = 0.50
 
 # ─── Azure Client ────────────────────────────────────────────────────────────
-if not (ENDPOINT and KEY and MODEL_ID):
-    print("❌ Set DOCUMENT_INTELLIGENCE_ENDPOINT, DOCUMENT_INTELLIGENCE_API_KEY & SIGNATURE_MODEL_ID in .env")
-    sys.exit(1)
-client = DocumentIntelligenceClient(ENDPOINT, AzureKeyCredential(KEY))
+# only extraction needs Azure; verification (and the batch mode) runs offline.
+# Without a client, get_signature_crop uses the local cropper.
+AZURE_CONFIGURED = bool(ENDPOINT and KEY and MODEL_ID)
+client = DocumentIntelligenceClient(ENDPOINT, AzureKeyCredential(KEY), **CLIENT_OPTIONS) if AZURE_CONFIGURED else None
 
 
 # ─── Helpers ─────────────────────────────────────────────────────────────────
 
 def get_doctor_name(
     path: Path,
-    client: DocumentIntelligenceClient,
-    model_id: str
+    client: DocumentIntelligenceClient | None = None,
+    model_id: str | None = None,
+    name: str | None = None,
+    page_budget: PageBudget | int | None = None,
 ) -> str:
     """
-    Extracts and sanitizes the doctor's name from the Azure field 'nom_prenom_docteur',
-    falling back to local OCR if needed. Returns lower_case_with_underscores.
+    Extracts and sanitizes the doctor's name: an already-known `name` (e.g. the
+    'nom_prenom_docteur' field of a result we have), else Azure when a client is
+    given, else the local header-band OCR. Returns lower_case_with_underscores.
     """
-    name = None
-
     # 1) Try Azure DI
-    try:
-        with open(path, "rb") as f:
-            poller = client.begin_analyze_document(model_id, f)
-        doc = poller.result().documents[0]
-        fld = doc.fields.get("nom_prenom_docteur")
-        if fld and fld.content:
-            name = fld.content
-    except Exception:
-        pass
+    if not name and client is not None and model_id:
+        try:
+            with open(path, "rb") as f:
+                doc = analyze(client, model_id, f).documents[0]
+            fld = doc.fields.get("nom_prenom_docteur")
+            if fld and fld.content:
+                name = fld.content
+        except Exception:
+            pass
 
     if not name:
-        name = extract_doctor_name(str(path))
+        name = extract_doctor_name(str(path), page_budget=page_budget)
 
     name = re.sub(r'^(dr\.?|docteur)\s+', '', name.strip(), flags=re.IGNORECASE)
     name = re.sub(r'[^A-Za-z0-9\s]',    '', name)
@@ -64,16 +71,17 @@ def get_doctor_name(
 
     return name
 
-def get_signature_crop(path: str) -> np.ndarray:
-    from .prescription_cropper import crop_signature_from_page, load_grayscale_pages
+def get_signature_crop(path: str, priority: str = INTERACTIVE,
+                       page_budget: PageBudget | int | None = PAGE_MEMORY_BUDGET) -> np.ndarray:
+    from .prescription_cropper import crop_signature_from_page
     def fallback():
-        gray = load_grayscale_pages(path)[0]
-        return crop_signature_from_page(gray)
+        return crop_signature_from_page(first_page(path, budget=page_budget))
 
+    if client is None:
+        return fallback()
     try:
         with open(path,"rb") as f:
-            poller = client.begin_analyze_document(MODEL_ID, f)
-        result = poller.result()
+            result = analyze(client, MODEL_ID, f, priority=priority)
     except Exception:
         return fallback()
 
@@ -85,13 +93,13 @@ def get_signature_crop(path: str) -> np.ndarray:
     region = field.bounding_regions[0]
     ext = os.path.splitext(path)[1].lower()
     if ext==".pdf":
-        pages = convert_from_path(path, dpi=DPI)
-        page = pages[region.page_number-1]
-        img = cv2.cvtColor(np.array(page), cv2.COLOR_RGB2GRAY)
+        img = first_page(path, dpi=DPI, page=region.page_number, budget=page_budget)
         poly = region.polygon
         pts = [(int(poly[i]*DPI),int(poly[i+1]*DPI)) for i in range(0,len(poly),2)]
     else:
-        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE) or fallback()
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            return fallback()
         poly = region.polygon
         pts = [(int(poly[i]),int(poly[i+1])) for i in range(0,len(poly),2)]
 
@@ -131,18 +139,30 @@ def preprocess(img: np.ndarray, size=(200,400)) -> np.ndarray:
     return cv2.resize(sig, size, interpolation=cv2.INTER_AREA)
 
 
-def compare_akaze(a: np.ndarray, b: np.ndarray) -> float:
-    det = cv2.AKAZE_create()
-    kp1, des1 = det.detectAndCompute(a, None)
-    kp2, des2 = det.detectAndCompute(b, None)
+# (preprocessed image, keypoint count, AKAZE descriptors)
+Features = Tuple[np.ndarray, int, Optional[np.ndarray]]
+
+
+def akaze_features(img: np.ndarray) -> Features:
+    kp, des = cv2.AKAZE_create().detectAndCompute(img, None)
+    return img, len(kp), des
+
+
+def akaze_score(fa: Features, fb: Features) -> float:
+    _, n1, des1 = fa
+    _, n2, des2 = fb
     if des1 is None or des2 is None: return 0.0
     bf = cv2.BFMatcher()
     matches = bf.knnMatch(des1, des2, k=2)
-    good = [m for m,n in matches if m.distance < 0.75*n.distance]
-    denom = min(len(kp1), len(kp2), 50)
+    good = [m for m,n in (pair for pair in matches if len(pair)==2) if m.distance < 0.75*n.distance]
+    denom = min(n1, n2, 50)
     return len(good)/denom if denom>0 else 0.0
 
 
+def compare_akaze(a: np.ndarray, b: np.ndarray) -> float:
+    return akaze_score(akaze_features(a), akaze_features(b))
+
+
 def compare_ssim(a: np.ndarray, b: np.ndarray) -> float:
     b_resized = cv2.resize(b, (a.shape[1], a.shape[0]))
     score,_ = ssim(a, b_resized, full=True)
@@ -150,6 +170,16 @@ def compare_ssim(a: np.ndarray, b: np.ndarray) -> float:
 
 
 def verify_signature(test_crop: np.ndarray, genuine_path: str):
+    # a compiled gallery (refdata build) is already preprocessed and memory-mapped
+    if genuine_path.endswith(".npy") and os.path.isfile(genuine_path):
+        p_test = preprocess(test_crop)
+        best_akaze, best_ssim = 0.0, 0.0
+        for p_g in load_gallery(genuine_path):
+            best_akaze = max(best_akaze, compare_akaze(p_test, p_g))
+            best_ssim  = max(best_ssim, compare_ssim(p_test, p_g))
+        is_genuine = (best_akaze >= AKAZE_THRESHOLD) or (best_ssim >= SSIM_THRESHOLD)
+        return {"akaze": best_akaze, "ssim": best_ssim, "genuine": is_genuine}
+
     # collect genuine samples
     if os.path.isdir(genuine_path):
         files = [os.path.join(genuine_path,f)
@@ -175,6 +205,115 @@ def verify_signature(test_crop: np.ndarray, genuine_path: str):
     return {"akaze": best_akaze, "ssim": best_ssim, "genuine": is_genuine}
 
 
+# ─── Batch verification (N test crops × M doctor galleries) ──────────────────
+IMAGE_EXTS = (".png", ".jpg", ".jpeg")
+
+
+def _is_image(p: Path) -> bool:
+    return p.suffix.lower() in IMAGE_EXTS and ".thumb." not in p.name
+
+
+def list_test_crops(root: Path) -> List[Path]:
+    """Every crop under root (e.g. signatures/<doctor>/<hash>.png), thumbnails excluded."""
+    return sorted(p for p in Path(root).rglob("*") if p.is_file() and _is_image(p))
+
+
+def list_galleries(root: Path) -> Dict[str, list]:
+    """doctor → gallery items: ("file", path) per image of root/<doctor>/, or ("npy", path, i) per compiled sample."""
+    galleries: Dict[str, list] = {}
+    for entry in sorted(Path(root).iterdir()):
+        if entry.is_dir():
+            items = [("file", str(p)) for p in sorted(entry.iterdir()) if _is_image(p)]
+        elif entry.suffix == ".npy":
+            items = [("npy", str(entry), i) for i in range(len(load_gallery(str(entry))))]
+        else:
+            continue
+        if items:
+            galleries[entry.stem if entry.suffix == ".npy" else entry.name] = items
+    return galleries
+
+
+def _prepare(item: tuple) -> Optional[Features]:
+    """Worker: load, preprocess (compiled galleries already are) and describe one image."""
+    if item[0] == "npy":
+        return akaze_features(np.ascontiguousarray(load_gallery(item[1])[item[2]]))
+    img = cv2.imread(item[1], cv2.IMREAD_GRAYSCALE)
+    return akaze_features(preprocess(img)) if img is not None else None
+
+
+_batch_galleries: Dict[str, List[Features]] = {}
+
+
+def _init_scorer(galleries: Dict[str, List[Features]]) -> None:
+    global _batch_galleries
+    _batch_galleries = galleries
+
+
+def _score_tests(tests: List[Tuple[str, str, Features]]) -> List[dict]:
+    """Worker: best AKAZE / SSIM of each test crop against every doctor's gallery."""
+    rows = []
+    for name, test_doctor, ft in tests:
+        for doctor, gallery in _batch_galleries.items():
+            best_akaze = max((akaze_score(ft, fg) for fg in gallery), default=0.0)
+            best_ssim  = max((compare_ssim(ft[0], fg[0]) for fg in gallery), default=0.0)
+            rows.append({
+                "test":        name,
+                "test_doctor": test_doctor,
+                "doctor":      doctor,
+                "akaze":       round(best_akaze, 4),
+                "ssim":        round(float(best_ssim), 4),
+                "genuine":     (best_akaze >= AKAZE_THRESHOLD) or (best_ssim >= SSIM_THRESHOLD),
+                "same_doctor": test_doctor == doctor,
+            })
+    return rows
+
+
+def verify_batch(tests_dir: Path, galleries_dir: Path, workers: Optional[int] = None, chunk: int = 8) -> List[dict]:
+    """
+    Score every crop under tests_dir against every gallery under galleries_dir.
+    Each image is preprocessed and described once, then the N×M matrix is
+    split by test rows across a process pool.
+    """
+    crops     = list_test_crops(tests_dir)
+    galleries = list_galleries(galleries_dir)
+    items     = [("file", str(p)) for p in crops] + [it for g in galleries.values() for it in g]
+    logging.info("▷ %d test crop(s), %d galler(ies), %d image(s) to prepare", len(crops), len(galleries), len(items))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        prepared = list(pool.map(_prepare, items, chunksize=max(1, len(items) // ((workers or os.cpu_count() or 1) * 4))))
+    feats = dict(zip((it if it[0] == "npy" else it[1] for it in items), prepared))
+
+    gallery_feats = {d: [feats[it if it[0] == "npy" else it[1]] for it in g] for d, g in galleries.items()}
+    gallery_feats = {d: [f for f in fs if f is not None] for d, fs in gallery_feats.items()}
+    tests = []
+    for p in crops:
+        ft = feats[str(p)]
+        if ft is None:
+            logging.warning("Could not read %s – skipped", p)
+            continue
+        doctor = p.parent.name if p.parent != Path(tests_dir) else ""
+        tests.append((str(p.relative_to(tests_dir)), doctor, ft))
+
+    rows: List[dict] = []
+    chunks = [tests[i:i + chunk] for i in range(0, len(tests), chunk)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_scorer, initargs=(gallery_feats,)) as pool:
+        for n, part in enumerate(pool.map(_score_tests, chunks), start=1):
+            rows.extend(part)
+            print(f"\r  scored {min(n * chunk, len(tests))}/{len(tests)} crop(s)", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return rows
+
+
+def write_report(rows: List[dict], out: Path) -> None:
+    """Long-format score matrix (one row per crop × doctor) as CSV, or Parquet for a .parquet path."""
+    import pandas as pd
+    df = pd.DataFrame(rows, columns=["test", "test_doctor", "doctor", "akaze", "ssim", "genuine", "same_doctor"])
+    if out.suffix == ".parquet":
+        df.to_parquet(out, index=False)
+    else:
+        df.to_csv(out, index=False)
+
+
 # ─── Main CLI ─────────────────────────────────────────────────────────────────
 
 def main():
@@ -182,15 +321,39 @@ def main():
         prog="signature_pipeline.py",
         description="Extract—and/or verify—a signature."
     )
-    p.add_argument("input", help="PDF/JPG/PNG (or signature image with --verify-only)")
-    p.add_argument("-g","--genuine", help="dir/file of genuine signature(s)")
+    p.add_argument("input", help="PDF/JPG/PNG (or signature image with --verify-only, or a crops dir with --batch)")
+    p.add_argument("-g","--genuine", help="dir/file of genuine signature(s), or a compiled gallery .npy")
+    p.add_argument("-d","--doctor",
+                   help="verify against this doctor's gallery (compiled refdata if built, else data/crops/<doctor>/)")
     p.add_argument("--verify-only", action="store_true",
                    help="skip extraction; treat input as test signature")
     p.add_argument("-o","--out", default="crops", help="crop output folder")
+    p.add_argument("--batch", metavar="GALLERIES",
+                   help="score every crop under input against every gallery in GALLERIES "
+                        "(<doctor>/ image folders or compiled <doctor>.npy)")
+    p.add_argument("--report", default="signature_scores.csv", help="batch output (.csv or .parquet)")
+    p.add_argument("--workers", type=int, help="batch process pool size (default: CPU count)")
     args = p.parse_args()
 
+    if args.batch:
+        logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+        t0   = time.perf_counter()
+        rows = verify_batch(Path(args.input), Path(args.batch), args.workers)
+        write_report(rows, Path(args.report))
+        flagged = sum(1 for r in rows if r["same_doctor"] and not r["genuine"])
+        print(f"{len(rows)} score(s) in {time.perf_counter() - t0:.1f}s → {args.report} "
+              f"({flagged} crop(s) not matching their own doctor)")
+        return
+
+    if args.doctor:
+        if args.genuine:
+            p.error("use either --genuine or --doctor")
+        args.genuine = gallery_path(args.doctor)
     if args.verify_only and not args.genuine:
-        p.error("--verify-only requires --genuine")
+        p.error("--verify-only requires --genuine or --doctor")
+    if not args.verify_only and not AZURE_CONFIGURED:
+        print("❌ Set DOCUMENT_INTELLIGENCE_ENDPOINT, DOCUMENT_INTELLIGENCE_API_KEY & SIGNATURE_MODEL_ID in .env")
+        sys.exit(1)
 
     # 1) test signature
     if args.verify_only:
@@ -0,0 +1,80 @@
+# azure_model/signature_store.py
+"""
+Content-addressed storage for extracted signature crops.
+
+    signatures/<doctor>/<hash>.png          full-resolution crop
+    signatures/<doctor>/<hash>.thumb.webp   small thumbnail for the review UI
+    signatures/<doctor>/<hash>.thumb.png    same thumbnail for clients without WebP
+
+A file's name changes whenever its bytes change, so the static mount can
+serve everything under a doctor folder with an immutable Cache-Control.
+"""
+import re
+import hashlib
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+SIG_DIR      = Path("signatures")
+THUMB_MAX    = 160      # longest thumbnail side, px
+WEBP_QUALITY = 80
+HASH_LEN     = 16
+HASHED_NAME  = re.compile(r"^[0-9a-f]{%d}(\.thumb)?\.(png|webp)$" % HASH_LEN)
+
+
+def safe_doctor_dir(doctor: str) -> str:
+    """lower_case_with_underscores, no path separators."""
+    safe = re.sub(r"[^A-Za-z0-9]+", "_", doctor or "").strip("_").lower()
+    return safe or "unknown"
+
+
+def _thumbnail(img: np.ndarray, max_side: int = THUMB_MAX) -> np.ndarray:
+    h, w = img.shape[:2]
+    scale = min(1.0, max_side / float(max(h, w)))
+    if scale >= 1.0:
+        return img
+    return cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def save_signature(crop: np.ndarray, doctor: str, root: Path = SIG_DIR) -> Dict[str, str]:
+    """Write crop + thumbnails under their content hash; existing files are reused."""
+    ok, png = cv2.imencode(".png", crop)
+    if not ok:
+        raise ValueError("Could not encode signature crop")
+    digest = hashlib.sha256(png.tobytes()).hexdigest()[:HASH_LEN]
+
+    folder = root / safe_doctor_dir(doctor)
+    folder.mkdir(parents=True, exist_ok=True)
+    full       = folder / f"{digest}.png"
+    thumb_webp = folder / f"{digest}.thumb.webp"
+    thumb_png  = folder / f"{digest}.thumb.png"
+
+    if not full.exists():
+        full.write_bytes(png.tobytes())
+    if not (thumb_webp.exists() and thumb_png.exists()):
+        thumb = _thumbnail(crop)
+        cv2.imwrite(str(thumb_webp), thumb, [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY])
+        cv2.imwrite(str(thumb_png), thumb, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+
+    return {"hash": digest, "file": str(full), "thumb_webp": str(thumb_webp), "thumb_png": str(thumb_png)}
+
+
+def list_signatures(doctor: str, root: Path = SIG_DIR) -> List[Dict[str, str]]:
+    """All stored crops of one doctor, newest first, as paths relative to `root`."""
+    folder = root / safe_doctor_dir(doctor)
+    if not folder.is_dir():
+        return []
+    crops = [p for p in folder.glob("*.png") if HASHED_NAME.match(p.name) and ".thumb" not in p.name]
+    crops.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    out = []
+    for p in crops:
+        rel = p.relative_to(root).parent.as_posix()
+        out.append({
+            "hash":       p.stem,
+            "file":       f"{rel}/{p.name}",
+            "thumb_webp": f"{rel}/{p.stem}.thumb.webp",
+            "thumb_png":  f"{rel}/{p.stem}.thumb.png",
+        })
+    return out
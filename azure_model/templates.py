@@ -0,0 +1,155 @@
+# azure_model/templates.py
+"""
+Form-template registry with a single combined descriptor index.
+
+Every header image in a directory (``assets/`` by default) becomes a
+template. All their ORB descriptors go into ONE FLANN-LSH index, so a page
+is matched once no matter how many form types we support; each good match
+votes for the template its descriptor came from. A global dHash of the page
+header is compared first: on a near-identical header the page is matched
+against that one template only (same ratio-test votes, so the same scale),
+and falls back to the combined query when the votes don't confirm the hit.
+
+    registry = TemplateRegistry.from_directory("assets")
+    registry.rank(gray_page)  → [("bulletin_de_soin", 241), ("prescription", 17), ...]
+"""
+import re
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .phash import dhash, hamming
+
+IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+
+# file stem (minus "_header<N>") → label used by the rest of the pipeline
+LABEL_ALIASES = {"ordonnance": "prescription"}
+
+ORB_FEATURES   = 2000
+RATIO          = 0.75
+HEADER_FRAC    = 0.2     # page band compared against template hashes
+PREFILTER_BITS = 4       # dHash distance (of 64) that counts as "same header"
+PREFILTER_MIN_VOTES = 20 # votes the hit template needs, else the hash hit was a false one
+
+FLANN_INDEX_LSH = 6
+LSH_PARAMS      = dict(algorithm=FLANN_INDEX_LSH, table_number=6, key_size=12, multi_probe_level=1)
+SEARCH_PARAMS   = dict(checks=50)
+
+
+def label_from_filename(path: Path) -> str:
+    stem = re.sub(r"_header\d*$", "", path.stem.lower())
+    return LABEL_ALIASES.get(stem, stem)
+
+
+class Template:
+    def __init__(self, label: str, gray: np.ndarray, source: str = ""):
+        self.label  = label
+        self.source = source
+        self.shape  = gray.shape
+        self.hash   = dhash(gray)
+        _, self.descriptors = cv2.ORB_create(ORB_FEATURES).detectAndCompute(gray, None)
+
+    @classmethod
+    def from_descriptors(cls, label: str, descriptors: np.ndarray, hash_: int, shape: tuple,
+                         source: str = "") -> "Template":
+        """Rebuild a template from precomputed data (see refdata.build) without running ORB."""
+        t = cls.__new__(cls)
+        t.label, t.source, t.shape, t.hash, t.descriptors = label, source, shape, hash_, descriptors
+        return t
+
+
+class TemplateRegistry:
+    """All known form headers plus one FLANN-LSH index over their descriptors."""
+
+    def __init__(self, templates: Iterable[Template]):
+        self.templates: List[Template] = [t for t in templates if t.descriptors is not None]
+        if not self.templates:
+            raise RuntimeError("No usable form templates (no ORB descriptors found)")
+        self.labels = sorted({t.label for t in self.templates})
+        self._lock  = threading.Lock()      # FLANN matchers are not thread-safe
+        self._matcher = cv2.FlannBasedMatcher(LSH_PARAMS, SEARCH_PARAMS)
+        # FLANN copies the descriptors into its index (mmap'd refdata is not shared past this point)
+        self._matcher.add([t.descriptors for t in self.templates])
+        self._matcher.train()
+
+    # ── construction ────────────────────────────────────────────────────
+    @classmethod
+    def from_directory(cls, folder, aliases: Optional[Dict[str, str]] = None) -> "TemplateRegistry":
+        folder = Path(folder)
+        templates = []
+        for path in sorted(folder.iterdir()):
+            if path.suffix.lower() not in IMAGE_EXTS:
+                continue
+            gray = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                logging.warning("Skipping unreadable template %s", path)
+                continue
+            label = (aliases or {}).get(path.stem, label_from_filename(path))
+            templates.append(Template(label, gray, str(path)))
+        logging.info("▷ loaded %d template(s) from %s: %s", len(templates), folder,
+                     ", ".join(sorted({t.label for t in templates})))
+        return cls(templates)
+
+    @classmethod
+    def from_images(cls, images: Dict[str, np.ndarray]) -> "TemplateRegistry":
+        """{label: BGR or gray header image} → registry (one template per label)."""
+        templates = []
+        for label, img in images.items():
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+            templates.append(Template(label, gray))
+        return cls(templates)
+
+    # ── matching ────────────────────────────────────────────────────────
+    def prefilter(self, gray_page: np.ndarray) -> Optional[Tuple[Template, int]]:
+        """(template, distance) whose header hash is near-identical to the page's, else None."""
+        band = gray_page[0:max(1, int(gray_page.shape[0] * HEADER_FRAC)), :]
+        h    = dhash(band)
+        best = min(((t, hamming(h, t.hash)) for t in self.templates), key=lambda x: x[1])
+        return best if best[1] <= PREFILTER_BITS else None
+
+    @staticmethod
+    def _good_matches(matches, ratio: float) -> Iterable:
+        for pair in matches:
+            if len(pair) == 2 and pair[0].distance < ratio * pair[1].distance:
+                yield pair[0]
+
+    def votes(self, descriptors: Optional[np.ndarray], ratio: float = RATIO) -> Dict[str, int]:
+        """Good matches per label from one query against the combined index."""
+        scores = {label: 0 for label in self.labels}
+        if descriptors is None or len(descriptors) < 2:
+            return scores
+        with self._lock:
+            matches = self._matcher.knnMatch(descriptors, k=2)
+        for m in self._good_matches(matches, ratio):
+            scores[self.templates[m.imgIdx].label] += 1
+        return scores
+
+    def template_votes(self, template: Template, descriptors: Optional[np.ndarray],
+                       ratio: float = RATIO) -> int:
+        """Good matches against one template only (brute force, no combined-index query)."""
+        if descriptors is None or len(descriptors) < 2:
+            return 0
+        matches = cv2.BFMatcher(cv2.NORM_HAMMING).knnMatch(descriptors, template.descriptors, k=2)
+        return sum(1 for _ in self._good_matches(matches, ratio))
+
+    def score(self, gray_page: np.ndarray, use_prefilter: bool = True) -> Dict[str, int]:
+        """Per-label scores (good ORB matches) for one page (grayscale)."""
+        _, des = cv2.ORB_create(ORB_FEATURES).detectAndCompute(gray_page, None)
+        if use_prefilter:
+            hit = self.prefilter(gray_page)
+            if hit:
+                # near-identical header: vote against that template only
+                n = self.template_votes(hit[0], des)
+                if n >= PREFILTER_MIN_VOTES:
+                    scores = {label: 0 for label in self.labels}
+                    scores[hit[0].label] = n
+                    return scores
+        return self.votes(des)
+
+    def rank(self, gray_page: np.ndarray) -> List[Tuple[str, int]]:
+        """Labels ranked by score, best first."""
+        return sorted(self.score(gray_page).items(), key=lambda kv: kv[1], reverse=True)
@@ -0,0 +1,183 @@
+# azure_model/upload_normalizer.py
+"""
+Optional pre-submission stage: shrink scans before they are uploaded to Azure.
+
+Phone photos and 600 DPI scans are re-rendered to a target DPI / pixel budget,
+converted to grayscale and re-encoded: images as bounded-quality JPEG or PNG,
+whichever is smaller, PDFs as JPEG pages in a compact PDF, rendered and written
+one page at a time. ``rescale_result`` maps the polygons Azure returns back
+onto the original document's coordinates.
+"""
+import os
+import math
+import logging
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import cv2
+from pdf2image import convert_from_path
+
+from .pages import pdf_info
+
+TARGET_DPI   = int(os.getenv("AZURE_UPLOAD_DPI", "150"))
+MAX_PIXELS   = int(os.getenv("AZURE_UPLOAD_MAX_PIXELS", str(4_000_000)))   # per page
+JPEG_QUALITY = int(os.getenv("AZURE_UPLOAD_QUALITY", "85"))
+IMAGE_EXTS   = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff"}
+
+
+def normalize_enabled() -> bool:
+    return os.getenv("AZURE_UPLOAD_NORMALIZE", "0").lower() in ("1", "true", "yes")
+
+
+def _normalize_pdf(src: Path, dst: Path, target_dpi: int, max_pixels: int,
+                   grayscale: bool, quality: int, poppler_path: Optional[str]) -> int:
+    """Render, shrink and append one page at a time, so only one page is ever in memory."""
+    written = 0
+    for n in range(1, pdf_info(src, poppler_path)["pages"] + 1):
+        rendered = convert_from_path(str(src), dpi=target_dpi, first_page=n, last_page=n,
+                                     grayscale=grayscale, poppler_path=poppler_path)
+        if not rendered:
+            break
+        page  = rendered[0]
+        # a per-page DPI keeps every page's physical size (inches) while capping its pixels
+        scale = min(1.0, math.sqrt(max_pixels / float(page.width * page.height)))
+        if scale < 1.0:
+            page = page.resize((max(1, int(page.width * scale)), max(1, int(page.height * scale))))
+        page.save(str(dst), "PDF", append=written > 0, resolution=target_dpi * scale, quality=quality)
+        written += 1
+        del rendered, page
+    if not written:
+        raise ValueError(f"No pages rendered from {src}")
+    return written
+
+
+def _normalize_image(src: Path, max_pixels: int, grayscale: bool, quality: int) -> Tuple[bytes, str, float]:
+    """(encoded bytes, suffix, scale): JPEG at `quality` or lossless PNG, whichever is smaller."""
+    img = cv2.imread(str(src), cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+    if img is None:
+        raise FileNotFoundError(f"Cannot open {src!r}")
+    h, w  = img.shape[:2]
+    scale = min(1.0, math.sqrt(max_pixels / float(h * w)))
+    if scale < 1.0:
+        img = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    # photos compress far better as JPEG, clean bitonal scans often as PNG
+    _, jpeg = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    _, png  = cv2.imencode(".png", img, [cv2.IMWRITE_PNG_COMPRESSION, 9])
+    if png.nbytes < jpeg.nbytes:
+        return png.tobytes(), ".png", scale
+    return jpeg.tobytes(), ".jpg", scale
+
+
+def normalize_for_upload(
+    src: Path,
+    target_dpi: int = TARGET_DPI,
+    max_pixels: int = MAX_PIXELS,
+    grayscale: bool = True,
+    quality: Optional[int] = None,
+    poppler_path: Optional[str] = None,
+) -> Tuple[Path, List[float]]:
+    """
+    Re-encode `src` into a temp file. Returns (path_to_upload, page_factors) where
+    page_factors[i] multiplies page i+1's coordinates back into the original space.
+    PDFs keep their physical page size (Azure reports inches), so no factors are needed.
+    If re-encoding doesn't make the file smaller, `src` itself is returned.
+
+    quality=None → JPEG_QUALITY. Images become JPEG or PNG, whichever is smaller.
+    The caller owns (and must unlink) the returned path when it differs from `src`.
+    """
+    suffix  = src.suffix.lower()
+    quality = quality or JPEG_QUALITY
+    before  = src.stat().st_size
+
+    if suffix == ".pdf":
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
+            dst = Path(tmp.name)
+        try:
+            _normalize_pdf(src, dst, target_dpi, max_pixels, grayscale, quality, poppler_path)
+        except Exception:
+            dst.unlink(missing_ok=True)
+            raise
+        factors = []
+    elif suffix in IMAGE_EXTS:
+        data, out_suffix, scale = _normalize_image(src, max_pixels, grayscale, quality)
+        if len(data) >= before:
+            return src, [1.0]
+        with tempfile.NamedTemporaryFile(delete=False, suffix=out_suffix) as tmp:
+            tmp.write(data)
+            dst = Path(tmp.name)
+        factors = [1.0 / scale]
+    else:
+        return src, [1.0]
+
+    after = dst.stat().st_size
+    if after >= before:
+        dst.unlink(missing_ok=True)
+        return src, [1.0]
+
+    logging.info("▷ upload normalized: %d → %d bytes (%.0f%% saved)", before, after, 100.0 * (before - after) / before)
+    return dst, factors
+
+
+# ─── Polygon rescaling ───────────────────────────────────────────────────────
+
+def _get(obj, attr: str, key: str):
+    val = getattr(obj, attr, None)
+    if val is None and hasattr(obj, "get"):
+        val = obj.get(key)
+    return val
+
+
+def _factor(factors: List[float], page_number: Optional[int]) -> float:
+    if not factors or not page_number:
+        return 1.0
+    idx = page_number - 1
+    return factors[idx] if idx < len(factors) else factors[-1]
+
+
+def _scale_regions(obj, factors: List[float]) -> None:
+    for region in _get(obj, "bounding_regions", "boundingRegions") or []:
+        f = _factor(factors, _get(region, "page_number", "pageNumber"))
+        poly = _get(region, "polygon", "polygon")
+        if poly and f != 1.0:
+            region["polygon"] = [v * f for v in poly]
+
+
+def _scale_field(field, factors: List[float]) -> None:
+    if field is None:
+        return
+    _scale_regions(field, factors)
+    for item in _get(field, "value_array", "valueArray") or []:
+        _scale_field(item, factors)
+    for sub in (_get(field, "value_object", "valueObject") or {}).values():
+        _scale_field(sub, factors)
+
+
+def rescale_result(result, factors: List[float]):
+    """Multiply every polygon / page size in an AnalyzeResult by its page's factor (in place)."""
+    if not factors or all(f == 1.0 for f in factors):
+        return result
+
+    for page in getattr(result, "pages", None) or []:
+        f = _factor(factors, _get(page, "page_number", "pageNumber"))
+        if f == 1.0:
+            continue
+        for dim in ("width", "height"):
+            if page.get(dim) is not None:
+                page[dim] = page[dim] * f
+        for coll in ("words", "lines", "selectionMarks", "barcodes", "formulas"):
+            for el in page.get(coll) or []:
+                if el.get("polygon"):
+                    el["polygon"] = [v * f for v in el["polygon"]]
+
+    for coll in ("tables", "paragraphs", "figures", "sections"):
+        for el in getattr(result, coll, None) or []:
+            _scale_regions(el, factors)
+            for cell in _get(el, "cells", "cells") or []:
+                _scale_regions(cell, factors)
+
+    for doc in getattr(result, "documents", None) or []:
+        _scale_regions(doc, factors)
+        for field in (_get(doc, "fields", "fields") or {}).values():
+            _scale_field(field, factors)
+    return result
@@ -1,36 +1,91 @@
 # main.py
-from datetime import datetime
-import os, re, shutil
-from typing import List
+from datetime import date, datetime
+import os, json, time, asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List
 from fastapi import Body
 import tempfile
 from pathlib import Path
 import cv2, logging
-from fastapi import FastAPI, File, HTTPException, Depends, UploadFile
+from fastapi import FastAPI, File, HTTPException, Depends, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import desc
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 from .schemas import PatientWithDocs
 from . import models, schemas
 from .database import engine, SessionLocal
+from .migrations import run_migrations
 from fastapi.staticfiles import StaticFiles
-from .services.azure import classify_form_on_bytes, parse_bulletin_ocr, parse_prescription_ocr
-from azure_model.pipeline import classify_form
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from .services.azure import classify_form_on_bytes, parse_bulletin_ocr, parse_prescription_ocr, azure_scheduler_stats
+from .services.jobs import ParseJob, create_job, get_job, sse_events
+from .services.admission import AdmissionRejected, admission, estimate_request_bytes
+from .services.aggregates import monthly_spend, patient_spend, record_prescriptions, top_drugs, top_patients
+from .services.bulk import BULK_MAX_ITEMS, bulk_create, bulletin_patient, prescription_patient
+from .services.doc_search import search_bulletins, search_prescriptions
+from .services.export import EXPORTS, FORMATS, MEDIA_TYPES, export_stream
+from .services.patient_search import patient_index, search_patients
+from .services.responses import orm_response
+from .services.storage import UPLOAD_DIR, hash_bytes, store_blob
+from .services.warmup import WARMUP_ENABLED, run_warmup, skip_warmup, warmup_state
+from azure_model.pipeline import classify_form_pages, score_pages, segment_pages, select_pages
+from azure_model.refdata import template_registry
+from azure_model.pages import PageBudget, PageBudgetExceeded
+from azure_model.form_cache import form_cache
+from azure_model.signature_store import HASHED_NAME, list_signatures, safe_doctor_dir
 
 models.Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI(title="Medical Documents API")
 
 BASE = Path(__file__).resolve().parent.parent
 # ── Load header templates ──
-PRESC_HDR = cv2.imread(str(BASE / "assets" /"ordonnance_header1.png"))
-BULL_HDR = cv2.imread(str(BASE / "assets" /"bulletin_de_soin_header1.png"))
-if PRESC_HDR is None or BULL_HDR is None:
+# every header image in assets/ is a template; new form types only need a new file.
+# Descriptors come memory-mapped from refdata/ when it has been built.
+REGISTRY = template_registry()
+if not {"prescription", "bulletin_de_soin"} <= set(REGISTRY.labels):
     raise RuntimeError("Could not load header templates – check your paths!")
 SIGNATURE_DIR = os.path.join(os.path.dirname(__file__), "..", "signatures")
+os.makedirs(SIGNATURE_DIR, exist_ok=True)
+
+class SignatureStaticFiles(StaticFiles):
+    """Content-hashed signature files never change → let clients cache them forever."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if HASHED_NAME.match(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response.headers["Cache-Control"] = "public, max-age=300"
+        return response
+
+# must be registered before the /signatures mount, which would otherwise swallow it
+@app.get("/signatures/{doctor}")
+def signature_index(doctor: str):
+    # legacy flat files (<doctor>_signature.png) still live at the top level
+    legacy = os.path.join(SIGNATURE_DIR, os.path.basename(doctor))
+    if Path(doctor).suffix and os.path.isfile(legacy):
+        return FileResponse(legacy)
+    items = list_signatures(doctor, Path(SIGNATURE_DIR))
+    return {
+        "doctor": safe_doctor_dir(doctor),
+        "signatures": [
+            {
+                "hash":         it["hash"],
+                "url":          f"/signatures/{it['file']}",
+                "thumbnail":    f"/signatures/{it['thumb_webp']}",
+                "thumbnailPng": f"/signatures/{it['thumb_png']}",
+            }
+            for it in items
+        ],
+    }
+
 app.mount(
     "/signatures",
-    StaticFiles(directory=SIGNATURE_DIR),
+    SignatureStaticFiles(directory=SIGNATURE_DIR),
     name="signatures",
 )
 
@@ -74,35 +129,67 @@ def get_or_create_patient_by_name(db: Session, first: str, last: str) -> models.
         db.add(patient)
         db.commit()
         db.refresh(patient)
+        patient_index.add(patient.id, first, last)
     return patient
 
 # ── OCR Parse endpoint ──
-@app.post("/documents/parse")
-async def parse_document(file: UploadFile = File(...)):
-    data = await file.read()
-    suffix = Path(file.filename).suffix or ".pdf"
+def rejected(err: AdmissionRejected) -> HTTPException:
+    headers = {"Retry-After": str(err.retry_after)} if err.retry_after is not None else None
+    return HTTPException(status_code=err.status_code, detail=err.detail, headers=headers)
+
+@asynccontextmanager
+async def admitted(data: bytes, filename: str):
+    """Hold a parse slot (concurrency + estimated memory) for the duration of the block."""
+    try:
+        # pdfinfo runs a subprocess: keep it off the event loop
+        async with admission.slot(await run_in_threadpool(estimate_request_bytes, data, filename)):
+            yield
+    except AdmissionRejected as err:
+        raise rejected(err)
+
+async def classify_and_parse(data: bytes, filename: str, progress: ParseJob | None = None) -> dict:
+    """Classify one document locally, parse it with Azure and sanity-check the result."""
+    emit = progress.emit if progress else None
+    # one page-memory ceiling for every render of this request (classification, crops)
+    page_budget = PageBudget()
+    suffix = Path(filename).suffix or ".pdf"
     with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
         tmp.write(data)
         tmp_path = Path(tmp.name)
 
     # 1) do your ORB‐based, page‐by‐page classification
-    form_key = classify_form(
-        scan_path=tmp_path,
-        presc_hdr_img=PRESC_HDR,
-        bullet_hdr_img=BULL_HDR,
-    )
-    tmp_path.unlink()
+    try:
+        form_key, page_scores = await run_in_threadpool(
+            classify_form_pages, tmp_path, registry=REGISTRY, cache=form_cache, page_budget=page_budget
+        )
+    except PageBudgetExceeded as err:
+        raise HTTPException(status_code=413, detail=str(err))
+    finally:
+        tmp_path.unlink()
+
+    # only the pages that carry the matched header go to Azure
+    pages = select_pages(page_scores, form_key)
+    if emit:
+        emit("classified", documentType=form_key, pages=pages, pageScores=page_scores)
+
+    # 2) send to Azure + 3) sanity check
+    parsed = await parse_as(form_key, data, filename, pages, progress=emit, page_budget=page_budget)
+
+    # 4) if we get here, everything looks good
+    return {"header": {"documentType": form_key}, **parsed}
 
-    # 2) send to Azure
+async def parse_as(form_key: str, data: bytes, filename: str, pages: str | None, progress=None,
+                   page_budget: PageBudget | None = None) -> dict:
+    """Azure parse of an already-classified document (or page range), sanity-checked."""
     try:
         if form_key == "prescription":
-            parsed = await parse_prescription_ocr(data, file.filename)
+            parsed = await parse_prescription_ocr(data, filename, pages, progress=progress, page_budget=page_budget)
         else:
-            parsed = await parse_bulletin_ocr(data, file.filename)
+            parsed = await parse_bulletin_ocr(data, filename, pages, progress=progress, page_budget=page_budget)
     except ValueError as err:
         raise HTTPException(status_code=400, detail=str(err))
 
-    # 3) SANITY CHECK: if Azure returned no meaningful rows, override to “unknown”
+    # SANITY CHECK: if Azure returned no meaningful rows, override to “unknown”
     if form_key == "prescription":
         # prescription must have at least one item
         if not parsed.get("items"):
@@ -110,7 +197,8 @@ async def parse_document(file: UploadFile = File(...)):
                 status_code=400,
                 detail="Unrecognized document type; please upload a Bulletin de soin or a Prescription."
             )
-    else:
+    elif not parsed.get("degraded"):
+        # degraded (local OCR) bulletins only carry the header fields, no tables
         tables = (
             parsed.get("consultationsDentaires", [])
             + parsed.get("prothesesDentaires", [])
@@ -126,9 +214,166 @@ async def parse_document(file: UploadFile = File(...)):
                 status_code=400,
                 detail="Unrecognized document type; please upload a Bulletin de soin or a Prescription."
             )
+    return parsed
 
-    # 4) if we get here, everything looks good
-    return {"header": {"documentType": form_key}, **parsed}
+@app.post("/documents/parse")
+async def parse_document(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    data = await file.read()
+
+    # already parsed these exact bytes? serve the cached result
+    content_hash = hash_bytes(data)
+    known = db.query(models.FileUpload).filter_by(content_hash=content_hash).first()
+    if known and known.parsed:
+        return known.parsed
+
+    async with admitted(data, file.filename):
+        response = await classify_and_parse(data, file.filename)
+    # a degraded (local OCR) result isn't cached, so the next upload retries Azure
+    if known and not response.get("degraded"):
+        known.parsed = response
+        db.commit()
+    return response
+
+@app.post("/documents/parse/stream")
+async def parse_documents_stream(files: List[UploadFile] = File(...)):
+    """
+    Parse several documents concurrently and stream one NDJSON line per document
+    as soon as it is done (completion order, tagged with the upload index).
+    """
+    # read everything now: the UploadFiles are closed once we return the response
+    payloads = [(i, f.filename, await f.read()) for i, f in enumerate(files)]
+
+    async def run_one(index: int, filename: str, data: bytes) -> dict:
+        t0 = time.perf_counter()
+        line = {"index": index, "filename": filename}
+        try:
+            async with admitted(data, filename):
+                line.update(status="ok", result=await classify_and_parse(data, filename))
+        except HTTPException as err:
+            line.update(status="error", statusCode=err.status_code, detail=err.detail)
+            if err.headers and "Retry-After" in err.headers:
+                line["retryAfter"] = int(err.headers["Retry-After"])
+        except Exception as err:
+            logging.exception("Streaming parse of %r failed", filename)
+            line.update(status="error", statusCode=500, detail=str(err))
+        line["elapsedMs"] = round((time.perf_counter() - t0) * 1000)
+        return line
+
+    async def ndjson():
+        tasks = [asyncio.create_task(run_one(*p)) for p in payloads]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.post("/documents/parse/split")
+async def parse_document_stack(file: UploadFile = File(...)):
+    """
+    Parse a scan that holds several bulletins/prescriptions back to back:
+    pages are classified one by one, grouped into documents, and every
+    segment's page range is sent to Azure concurrently.
+    """
+    data   = await file.read()
+    async with admitted(data, file.filename):
+        return await parse_stack(data, file.filename)
+
+async def parse_stack(data: bytes, filename: str) -> dict:
+    # shared by the page scoring and every segment's signature crop (those run concurrently)
+    page_budget = PageBudget()
+    suffix = Path(filename).suffix or ".pdf"
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+        tmp_path = Path(tmp.name)
+    try:
+        page_scores = await run_in_threadpool(score_pages, tmp_path, registry=REGISTRY, page_budget=page_budget)
+    except PageBudgetExceeded as err:
+        raise HTTPException(status_code=413, detail=str(err))
+    finally:
+        tmp_path.unlink()
+
+    segments = segment_pages(page_scores)
+    if not segments:
+        raise HTTPException(
+            status_code=400,
+            detail="Unrecognized document type; please upload a Bulletin de soin or a Prescription."
+        )
+
+    async def run_segment(index: int, seg: dict) -> dict:
+        out = {"index": index, "documentType": seg["documentType"], "pages": seg["range"]}
+        try:
+            parsed = await parse_as(seg["documentType"], data, filename, seg["range"], page_budget=page_budget)
+            out.update(status="ok", result={"header": {"documentType": seg["documentType"]}, **parsed})
+        except HTTPException as err:
+            out.update(status="error", statusCode=err.status_code, detail=err.detail)
+        except Exception as err:
+            logging.exception("Segment %s of %r failed", seg["range"], filename)
+            out.update(status="error", statusCode=500, detail=str(err))
+        return out
+
+    documents = await asyncio.gather(*(run_segment(i, seg) for i, seg in enumerate(segments)))
+    return {"filename": filename, "pageCount": len(page_scores), "documents": documents}
+
+# ── Parse jobs with server-sent progress events ──
+async def run_parse_job(job: ParseJob, data: bytes) -> None:
+    try:
+        async with admitted(data, job.filename):
+            job.emit("admitted")
+            result = await classify_and_parse(data, job.filename, progress=job)
+    except HTTPException as err:
+        job.emit("error", statusCode=err.status_code, detail=err.detail)
+    except Exception as err:
+        logging.exception("Parse job %s failed", job.id)
+        job.emit("error", statusCode=500, detail=str(err))
+    else:
+        job.emit("done", result=result)
+
+@app.post("/documents/parse/jobs", status_code=202)
+async def create_parse_job(file: UploadFile = File(...)):
+    data = await file.read()
+    try:
+        # reject now rather than accept a job that would only fail in the queue
+        admission.precheck(await run_in_threadpool(estimate_request_bytes, data, file.filename))
+    except AdmissionRejected as err:
+        raise rejected(err)
+    job  = create_job(file.filename)
+    job.emit("received", filename=file.filename, bytes=len(data))
+    job.task = asyncio.create_task(run_parse_job(job, data))   # keep a reference on the job
+    return {"jobId": job.id, "events": f"/documents/parse/jobs/{job.id}/events"}
+
+@app.get("/documents/parse/jobs/{job_id}")
+def get_parse_job(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Parse job not found")
+    return {"jobId": job.id, "status": job.status, "events": job.events, "result": job.result}
+
+@app.get("/documents/parse/jobs/{job_id}/events")
+async def parse_job_events(job_id: str):
+    job = get_job(job_id)
+    if not job:
+        raise HTTPException(404, "Parse job not found")
+    return StreamingResponse(
+        sse_events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/patients/search", response_model=List[schemas.PatientMatch])
+def search_patients_fuzzy(
+    q: str,
+    k: int = 10,
+    min_score: float = 50,
+    backend: str | None = None,
+    db: Session = Depends(get_db)
+):
+    """Top-k patients whose name resembles `q` (accents, case, word order and OCR typos tolerated)."""
+    if backend not in (None, "memory", "pg_trgm"):
+        raise HTTPException(400, "backend must be 'memory' or 'pg_trgm'")
+    return search_patients(db, q, k=min(max(k, 1), 100), backend=backend, min_score=min_score)
 
 @app.get("/patients/{first_name}/{last_name}", response_model=schemas.PatientWithDocs)
 def get_patient_by_name(
@@ -147,7 +392,7 @@ def get_patient_by_name(
     )
     if not patient:
         raise HTTPException(404, "Patient not found")
-    return patient
+    return orm_response(schemas.PatientWithDocs, patient)
 
 # ── Create Bulletin ──
 @app.post("/bulletin/", response_model=schemas.Bulletin)
@@ -199,36 +444,173 @@ def create_prescription(
         patient_id=patient.id
     )
     db.add(db_presc)
+    db.flush()
+    # 3) parsed item rows + spend summaries, same transaction
+    record_prescriptions(db, [(db_presc.id, patient.id, data)])
     db.commit()
     db.refresh(db_presc)
     return db_presc
 
-# ── File‐upload endpoints unchanged ──
-UPLOAD_DIR = "bulletins"
+# ── Bulk create (back-office import) ──
+def _check_bulk_size(items: list) -> None:
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(413, f"At most {BULK_MAX_ITEMS} documents per bulk request")
+
+@app.post("/bulletin/bulk", response_model=schemas.BulkResponse)
+def create_bulletins_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db)
+):
+    """Validate + insert many bulletins in one transaction; invalid items are reported per index."""
+    _check_bulk_size(items)
+    return bulk_create(db, items, schemas.BulletinCreate, models.Bulletin, bulletin_patient)
+
+@app.post("/prescription/bulk", response_model=schemas.BulkResponse)
+def create_prescriptions_bulk(
+    items: List[Dict[str, Any]] = Body(...),
+    db: Session = Depends(get_db)
+):
+    _check_bulk_size(items)
+    return bulk_create(db, items, schemas.PrescriptionCreate, models.Prescription, prescription_patient,
+                       on_inserted=record_prescriptions)
+
+# ── Indexed item / table search (JSONB + GIN) ──
+@app.get("/prescriptions/search", response_model=List[schemas.Prescription])
+def search_prescriptions_endpoint(
+    code_pct:   str | None   = Query(None, alias="codePCT"),
+    produit:    str | None   = None,
+    min_amount: float | None = Query(None, alias="minAmount"),
+    max_amount: float | None = Query(None, alias="maxAmount"),
+    date_from:  date | None  = Query(None, alias="dateFrom"),
+    date_to:    date | None  = Query(None, alias="dateTo"),
+    patient_id: int | None   = Query(None, alias="patientId"),
+    limit:      int          = Query(50, le=500),
+    offset:     int          = 0,
+    db: Session = Depends(get_db)
+):
+    """Prescriptions with an item matching codePCT / produit (substring) / montantPerçu range."""
+    found = search_prescriptions(db, code_pct, produit, min_amount, max_amount,
+                                 date_from, date_to, patient_id, limit, offset)
+    return orm_response(List[schemas.Prescription], found)
+
+@app.get("/bulletins/search", response_model=List[schemas.Bulletin])
+def search_bulletins_endpoint(
+    table:       str          = "pharmacie",
+    code_ps:     str | None   = Query(None, alias="codePs"),
+    designation: str | None   = None,
+    min_amount:  float | None = Query(None, alias="minAmount"),
+    max_amount:  float | None = Query(None, alias="maxAmount"),
+    date_from:   date | None  = Query(None, alias="dateFrom"),
+    date_to:     date | None  = Query(None, alias="dateTo"),
+    patient_id:  int | None   = Query(None, alias="patientId"),
+    limit:       int          = Query(50, le=500),
+    offset:      int          = 0,
+    db: Session = Depends(get_db)
+):
+    """Bulletins with a row in `table` matching codePs / designation / amount range."""
+    try:
+        found = search_bulletins(db, table, code_ps, designation, min_amount, max_amount,
+                                 date_from, date_to, patient_id, limit, offset)
+    except ValueError as err:
+        raise HTTPException(400, str(err))
+    return orm_response(List[schemas.Bulletin], found)
+
+# ── Streaming export (server-side cursor, flat rows) ──
+@app.get("/export/{kind}")
+def export_documents(
+    kind:      str,
+    format:    str         = "csv",
+    date_from: date | None = Query(None, alias="dateFrom"),
+    date_to:   date | None = Query(None, alias="dateTo"),
+):
+    """All bulletins / prescriptions created in the range, one row per table row / item."""
+    if kind not in EXPORTS:
+        raise HTTPException(404, f"Unknown export {kind!r}; use one of {', '.join(EXPORTS)}")
+    if format not in FORMATS:
+        raise HTTPException(400, f"format must be one of {', '.join(FORMATS)}")
+    try:
+        chunks = export_stream(engine, kind, format, date_from, date_to)
+    except ValueError as err:
+        raise HTTPException(400, str(err))
+    span = "_".join(d.isoformat() for d in (date_from, date_to) if d) or "all"
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}_{span}.{format}"'},
+    )
+
+# ── Spend aggregates (read from the incrementally maintained summaries) ──
+@app.get("/stats/patients/top", response_model=List[schemas.PatientSpend])
+def stats_top_patients(limit: int = Query(10, le=500), db: Session = Depends(get_db)):
+    return top_patients(db, limit)
+
+@app.get("/stats/patients/{patient_id}", response_model=schemas.PatientSpend)
+def stats_patient(patient_id: int, db: Session = Depends(get_db)):
+    summary = patient_spend(db, patient_id)
+    if not summary:
+        raise HTTPException(404, "No prescriptions recorded for this patient")
+    return summary
+
+@app.get("/stats/monthly", response_model=List[schemas.MonthlySpend])
+def stats_monthly(
+    date_from: date | None = Query(None, alias="dateFrom"),
+    date_to:   date | None = Query(None, alias="dateTo"),
+    db: Session = Depends(get_db)
+):
+    return monthly_spend(db, date_from, date_to)
+
+@app.get("/stats/drugs/top", response_model=List[schemas.DrugSpend])
+def stats_top_drugs(
+    limit:     int         = Query(20, le=500),
+    date_from: date | None = Query(None, alias="dateFrom"),
+    date_to:   date | None = Query(None, alias="dateTo"),
+    db: Session = Depends(get_db)
+):
+    return top_drugs(db, limit, date_from, date_to)
+
+# ── File‐upload endpoints (content-addressed) ──
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+def _upload_info(dbf: models.FileUpload, duplicate: bool) -> dict:
+    return {"id": dbf.id, "filename": dbf.filename, "original_name": dbf.original_name,
+            "content_hash": dbf.content_hash, "duplicate": duplicate, "parsed": dbf.parsed}
+
 @app.post("/bulletin/upload", response_model=schemas.UploadResponse)
 async def upload_bulletins(files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
     uploaded = []
     for file in files:
         try:
-            ts = datetime.utcnow().isoformat()
-            safe = re.sub(r"[:.]", "-", ts)
-            name = f"{safe}_{file.filename}"
-            path = os.path.join(UPLOAD_DIR, name)
-            with open(path, "wb") as buf:
-                shutil.copyfileobj(file.file, buf)
+            suffix = Path(file.filename).suffix or ".pdf"
+            content_hash, path, size = store_blob(file.file, suffix)
+
+            # known document → hand back the existing record (and its cached parse)
+            dbf = db.query(models.FileUpload).filter_by(content_hash=content_hash).first()
+            if dbf:
+                uploaded.append(_upload_info(dbf, duplicate=True))
+                continue
+
             dbf = models.FileUpload(
-                filename=name,
+                filename=os.path.basename(path),
                 original_name=file.filename,
                 path=path,
+                content_hash=content_hash,
+                size_bytes=size,
                 uploaded_at=datetime.utcnow()
             )
             db.add(dbf)
-            db.commit()
+            try:
+                db.commit()
+            except IntegrityError:
+                # same bytes uploaded concurrently; the other request won
+                db.rollback()
+                dbf = db.query(models.FileUpload).filter_by(content_hash=content_hash).one()
+                uploaded.append(_upload_info(dbf, duplicate=True))
+                continue
             db.refresh(dbf)
-            uploaded.append({"id": dbf.id, "filename": name, "original_name": file.filename})
-        except:
+            uploaded.append(_upload_info(dbf, duplicate=False))
+        except Exception:
+            logging.exception("Upload of %r failed", file.filename)
+            db.rollback()
             continue
     return {"message": f"{len(uploaded)} bulletin(s) uploaded", "uploaded_files": uploaded}
 
@@ -263,10 +645,39 @@ def update_bulletin(
     db.refresh(db_b)
     return db_b
 
+@app.on_event("startup")
+async def start_warmup():
+    # in a worker thread: /health answers (and /health/ready says "not yet") while it runs
+    if WARMUP_ENABLED:
+        asyncio.get_running_loop().run_in_executor(None, run_warmup, engine, REGISTRY)
+    else:
+        skip_warmup()
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+def readiness_check():
+    # 503 until the warm-up finished (per-stage timings in the body either way)
+    snapshot = warmup_state.snapshot()
+    return JSONResponse(snapshot, status_code=200 if snapshot["ready"] else 503)
+
+@app.get("/azure/stats")
+def azure_stats():
+    # queue depth / wait times of the Azure request scheduler
+    return azure_scheduler_stats()
+
+@app.get("/classification/cache/stats")
+def classification_cache_stats():
+    # header-hash cache in front of ORB classification: hit rate and sampled false-hit rate
+    return form_cache.stats()
+
+@app.get("/documents/parse/stats")
+def parse_admission_stats():
+    # running parses, queue depth, memory in use and rejection counters (for autoscaling)
+    return admission.stats()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,68 @@
+# migrations.py
+"""
+Idempotent schema changes for databases created before a column/index existed.
+
+`create_all` only creates missing tables; it never alters existing ones.
+Each statement here must be safe to run on every startup.
+"""
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+BULLETIN_JSON_COLUMNS = [
+    "consultations_dentaires", "protheses_dentaires", "consultations_visites", "actes_medicaux",
+    "actes_paramed", "biologie", "hospitalisation", "pharmacie",
+]
+
+
+def json_to_jsonb(table: str, column: str) -> str:
+    """Convert a json column to jsonb – only if it still is json, so reruns don't rewrite the table."""
+    return f"""
+        DO $$
+        BEGIN
+            IF (SELECT data_type FROM information_schema.columns
+                 WHERE table_name = '{table}' AND column_name = '{column}') = 'json' THEN
+                ALTER TABLE {table} ALTER COLUMN {column} TYPE JSONB USING {column}::jsonb;
+            END IF;
+        END $$
+    """
+
+
+MIGRATIONS = [
+    # content-addressable uploads
+    "ALTER TABLE file_uploads ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)",
+    "ALTER TABLE file_uploads ADD COLUMN IF NOT EXISTS size_bytes INTEGER",
+    "ALTER TABLE file_uploads ADD COLUMN IF NOT EXISTS parsed JSON",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_file_uploads_content_hash ON file_uploads (content_hash)",
+
+    # indexed item / table search (services/doc_search.py)
+    json_to_jsonb("prescriptions", "items"),
+    "CREATE INDEX IF NOT EXISTS ix_prescriptions_items_gin ON prescriptions USING gin (items jsonb_path_ops)",
+    *[json_to_jsonb("bulletins", c) for c in BULLETIN_JSON_COLUMNS],
+    *[f"CREATE INDEX IF NOT EXISTS ix_bulletins_{c}_gin ON bulletins USING gin ({c} jsonb_path_ops)"
+      for c in BULLETIN_JSON_COLUMNS],
+    # prescription amount ranges (doc_search) – jsonb_path_ops can't serve those
+    'CREATE INDEX IF NOT EXISTS "ix_prescription_items_montantPercu" ON prescription_items ("montantPercu")',
+]
+
+# Need extensions / privileges the app role may not have: a failure is logged
+# and the feature that depends on it falls back (e.g. in-memory patient search).
+OPTIONAL_MIGRATIONS = [
+    # PATIENT_SEARCH_BACKEND=pg_trgm
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_patients_name_trgm ON patients "
+    "USING gin ((lower(first_name || ' ' || last_name)) gin_trgm_ops)",
+]
+
+
+def run_migrations(engine: Engine) -> None:
+    with engine.begin() as conn:
+        for stmt in MIGRATIONS:
+            conn.execute(text(stmt))
+    for stmt in OPTIONAL_MIGRATIONS:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(stmt))
+        except Exception as e:
+            logging.warning("Optional migration skipped (%s): %s", stmt.split(" ON ")[0], e)
@@ -1,9 +1,9 @@
 #Models
 from datetime import datetime
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, UniqueConstraint
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, Numeric, String, DateTime, Text, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .database import Base
-from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.dialects.postgresql import JSON, JSONB
 
 class Patient(Base):
     __tablename__ = "patients"
@@ -47,14 +47,14 @@ class Bulletin(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    consultationsDentaires = Column("consultations_dentaires", JSON, nullable=False, default=list)
-    prothesesDentaires     = Column("protheses_dentaires",     JSON, nullable=False, default=list)
-    consultationsVisites   = Column("consultations_visites",   JSON, nullable=False, default=list)
-    actesMedicaux          = Column("actes_medicaux",          JSON, nullable=False, default=list)
-    actesParamed           = Column("actes_paramed",           JSON, nullable=False, default=list)
-    biologie               = Column("biologie",                JSON, nullable=False, default=list)
-    hospitalisation        = Column("hospitalisation",         JSON, nullable=False, default=list)
-    pharmacie              = Column("pharmacie",               JSON, nullable=False, default=list)
+    consultationsDentaires = Column("consultations_dentaires", JSONB, nullable=False, default=list)
+    prothesesDentaires     = Column("protheses_dentaires",     JSONB, nullable=False, default=list)
+    consultationsVisites   = Column("consultations_visites",   JSONB, nullable=False, default=list)
+    actesMedicaux          = Column("actes_medicaux",          JSONB, nullable=False, default=list)
+    actesParamed           = Column("actes_paramed",           JSONB, nullable=False, default=list)
+    biologie               = Column("biologie",                JSONB, nullable=False, default=list)
+    hospitalisation        = Column("hospitalisation",         JSONB, nullable=False, default=list)
+    pharmacie              = Column("pharmacie",               JSONB, nullable=False, default=list)
 
     apci           = Column("apci",           Boolean, default=False)
     mo             = Column("mo",             Boolean, default=False)
@@ -87,7 +87,7 @@ class Prescription(Base):
     executor           = Column(String,  nullable=True)
     pharmacistCnamRef  = Column(String,  nullable=True)
 
-    items              = Column(JSON,    nullable=False)
+    items              = Column(JSONB,   nullable=False)
     total              = Column(String,  nullable=True)
     totalInWords       = Column(String,  nullable=True)
 
@@ -98,6 +98,53 @@ class Prescription(Base):
     patient    = relationship("Patient", back_populates="prescriptions")
 
 
+class PrescriptionItem(Base):
+    """One parsed line of Prescription.items (numeric fields for reporting)."""
+    __tablename__ = "prescription_items"
+
+    id              = Column(Integer, primary_key=True)
+    prescription_id = Column(Integer, ForeignKey("prescriptions.id", ondelete="CASCADE"), nullable=False, index=True)
+    patient_id      = Column(Integer, ForeignKey("patients.id"), nullable=False, index=True)
+    line_no         = Column(Integer, nullable=False)
+
+    codePCT         = Column(String,  nullable=True, index=True)
+    produit         = Column(String,  nullable=True, index=True)
+    forme           = Column(String,  nullable=True)
+    qte             = Column(Numeric(12, 3), nullable=True)
+    puv             = Column(Numeric(12, 3), nullable=True)
+    montantPercu    = Column(Numeric(12, 3), nullable=True, index=True)
+    nio             = Column(String,  nullable=True)
+    prLot           = Column(String,  nullable=True)
+
+    pharmacyName    = Column(String,  nullable=True, index=True)
+    prescribed_on   = Column(Date,    nullable=True, index=True)   # prescriptionDate, else insert date
+    created_at      = Column(DateTime, default=datetime.utcnow)
+
+
+class PatientSpendSummary(Base):
+    """Running totals per patient, upserted whenever prescriptions are inserted."""
+    __tablename__ = "patient_spend_summary"
+
+    patient_id    = Column(Integer, ForeignKey("patients.id"), primary_key=True)
+    prescriptions = Column(Integer, nullable=False, default=0)
+    items         = Column(Integer, nullable=False, default=0)
+    total_amount  = Column(Numeric(14, 3), nullable=False, default=0)
+    first_on      = Column(Date, nullable=True)
+    last_on       = Column(Date, nullable=True)
+    updated_at    = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class MonthlySpendSummary(Base):
+    """Running totals per calendar month (first day of the month)."""
+    __tablename__ = "monthly_spend_summary"
+
+    month         = Column(Date, primary_key=True)
+    prescriptions = Column(Integer, nullable=False, default=0)
+    items         = Column(Integer, nullable=False, default=0)
+    total_amount  = Column(Numeric(14, 3), nullable=False, default=0)
+    updated_at    = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class FileUpload(Base):
     __tablename__ = "file_uploads"
 
@@ -106,3 +153,8 @@ class FileUpload(Base):
     original_name = Column(String,  nullable=False)
     path          = Column(String,  nullable=False)
     uploaded_at   = Column(DateTime, default=datetime.utcnow)
+
+    # content-addressable storage: one row / one blob per distinct file
+    content_hash  = Column(String(64), nullable=True, unique=True, index=True)
+    size_bytes    = Column(Integer,  nullable=True)
+    parsed        = Column(JSON,     nullable=True)   # cached /documents/parse output
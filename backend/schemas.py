@@ -1,6 +1,6 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 class PrescriptionItem(BaseModel):
     codePCT: str
@@ -40,8 +40,7 @@ class Prescription(PrescriptionBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 class BulletinBase(BaseModel):
     prenom:            Optional[str] = None
@@ -79,11 +78,9 @@ class BulletinBase(BaseModel):
 
     codeApci:         Optional[str] = Field(None, alias="codeApci")
     dateAccouchement: Optional[str] = Field(None, alias="dateAccouchement")
-    
-    class Config:
-        validate_by_name = True
-        from_attributes = True
-        
+
+    model_config = ConfigDict(validate_by_name=True, from_attributes=True)
+
 
 class BulletinCreate(BulletinBase):
     identifiantUnique: str 
@@ -93,14 +90,53 @@ class Bulletin(BulletinBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+# ── Bulk create ──
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    patient_id: Optional[int] = None
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+# ── Spend aggregates ──
+class PatientSpend(BaseModel):
+    patient_id: int
+    prescriptions: int
+    items: int
+    total_amount: float
+    first_on: Optional[date] = None
+    last_on: Optional[date] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class MonthlySpend(BaseModel):
+    month: date
+    prescriptions: int
+    items: int
+    total_amount: float
+
+    model_config = ConfigDict(from_attributes=True)
+
+class DrugSpend(BaseModel):
+    produit: Optional[str]
+    items: int
+    qte: float
+    total_amount: float
 
 # ── FileUpload / UploadResponse ──
 class UploadedFileInfo(BaseModel):
     id: int
     filename: str
     original_name: str
+    content_hash: Optional[str] = None
+    duplicate: bool = False
+    parsed: Optional[Dict[str, Any]] = None
 
 class UploadResponse(BaseModel):
     message: str
@@ -119,8 +155,7 @@ class Patient(PatientBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class BulletinInDB(Bulletin):
     id: int
@@ -128,8 +163,7 @@ class BulletinInDB(Bulletin):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class PrescriptionInDB(Prescription):
     id: int
@@ -137,8 +171,11 @@ class PrescriptionInDB(Prescription):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
+
+class PatientMatch(PatientBase):
+    id: int
+    score: float
 
 class PatientWithDocs(Patient):
     bulletins: List[BulletinInDB]       = []
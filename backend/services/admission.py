@@ -0,0 +1,194 @@
+# backend/services/admission.py
+"""
+Admission control for the OCR parse endpoints.
+
+Every parse holds the upload in memory, rasterizes pages and waits on Azure,
+so a burst of uploads can OOM the worker. A parse needs both a concurrency
+slot and its estimated memory before it starts. Requests that can't start
+right away wait in a bounded FIFO queue. When the queue is full, or a request
+waits longer than PARSE_QUEUE_TIMEOUT_S, it is rejected with 503 and a
+Retry-After derived from the recent drain rate. A document whose estimate
+alone exceeds the memory budget is rejected with 413.
+
+    PARSE_MAX_CONCURRENT   parses running at once          (default 4)
+    PARSE_MAX_QUEUE        requests allowed to wait        (default 16)
+    PARSE_QUEUE_TIMEOUT_S  longest wait before giving up   (default 30)
+    PARSE_MEMORY_BUDGET_MB estimated memory of running parses (default 1024)
+"""
+import os
+import re
+import math
+import time
+import asyncio
+import logging
+import tempfile
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Deque, Optional
+
+from azure_model.pages import PAGE_DPI, estimate_page_bytes, pdf_info
+
+MAX_CONCURRENT  = int(os.getenv("PARSE_MAX_CONCURRENT", "4"))
+MAX_QUEUE       = int(os.getenv("PARSE_MAX_QUEUE", "16"))
+QUEUE_TIMEOUT_S = float(os.getenv("PARSE_QUEUE_TIMEOUT_S", "30"))
+MEMORY_BUDGET   = int(os.getenv("PARSE_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024
+
+PAGES_IN_FLIGHT     = 2                 # pages are streamed; the signature crop renders one more
+PER_PAGE_OVERHEAD   = 1024 * 1024       # page scores, Azure result objects, per page
+DRAIN_WINDOW_S      = 60.0              # completions counted for the drain rate
+RETRY_AFTER_BOUNDS  = (1, 300)
+
+PDF_BYTES_PER_PAGE  = 100 * 1024         # fallback: a scanned page rarely takes less
+
+PAGE_RE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+def count_pages(data: bytes, filename: str) -> int:
+    """
+    Page count: 1 for an image, Poppler's pdfinfo for a PDF. If pdfinfo fails,
+    the larger of the uncompressed page objects found in the bytes and a
+    size-based guess (page objects inside compressed object streams, PDF 1.5+,
+    can't be seen by scanning).
+    """
+    if Path(filename or "").suffix.lower() != ".pdf" and not data.startswith(b"%PDF"):
+        return 1
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+            tmp.write(data)
+            tmp.flush()
+            return max(1, pdf_info(tmp.name)["pages"])
+    except Exception as e:
+        logging.warning("pdfinfo failed on %r, estimating its page count: %s", filename, e)
+    return max(1, len(PAGE_RE.findall(data)), math.ceil(len(data) / PDF_BYTES_PER_PAGE))
+
+
+def estimate_request_bytes(data: bytes, filename: str) -> int:
+    """Upload + its temp/Azure copies, the rasters in flight (A4 BGR at PAGE_DPI) and per-page results."""
+    pages  = count_pages(data, filename)
+    raster = estimate_page_bytes(595.0, 842.0, PAGE_DPI, grayscale=False)
+    return 2 * len(data) + raster * min(pages, PAGES_IN_FLIGHT) + PER_PAGE_OVERHEAD * pages
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail      = detail
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_queue: int = MAX_QUEUE,
+                 memory_budget: int = MEMORY_BUDGET, queue_timeout: float = QUEUE_TIMEOUT_S):
+        self.max_concurrent = max_concurrent
+        self.max_queue      = max_queue
+        self.memory_budget  = memory_budget
+        self.queue_timeout  = queue_timeout
+
+        self.active        = 0
+        self.memory_in_use = 0
+        self._queue: Deque[int] = deque()               # waiting tickets, FIFO
+        self._tickets      = itertools.count()
+        self._cond         = asyncio.Condition()
+        self._completed: Deque[float] = deque()         # completion times within DRAIN_WINDOW_S
+        self._service: Deque[float]   = deque(maxlen=100)
+        self.counters = {"admitted": 0, "completed": 0, "rejected_queue_full": 0,
+                         "rejected_timeout": 0, "rejected_too_large": 0}
+
+    # ── Drain rate / Retry-After ──
+    def _prune(self, now: float) -> None:
+        while self._completed and now - self._completed[0] > DRAIN_WINDOW_S:
+            self._completed.popleft()
+
+    def drain_rate(self) -> float:
+        """Parses finished per second over the last DRAIN_WINDOW_S (falls back to service times)."""
+        now = time.monotonic()
+        self._prune(now)
+        if len(self._completed) >= 2:
+            return len(self._completed) / max(now - self._completed[0], 1.0)
+        if self._service:
+            return self.max_concurrent / (sum(self._service) / len(self._service))
+        return 0.0
+
+    def retry_after(self) -> int:
+        rate  = self.drain_rate()
+        ahead = len(self._queue) + 1
+        secs  = ahead / rate if rate > 0 else self.queue_timeout
+        lo, hi = RETRY_AFTER_BOUNDS
+        return int(min(hi, max(lo, math.ceil(secs))))
+
+    # ── Admission ──
+    def _fits(self, cost: int) -> bool:
+        if self.active >= self.max_concurrent:
+            return False
+        # an idle worker always takes the request, so one big (but allowed) parse can't starve
+        return self.active == 0 or self.memory_in_use + cost <= self.memory_budget
+
+    def precheck(self, cost: int) -> None:
+        """Raise what acquire() would raise right away (for endpoints that queue work for later)."""
+        if cost > self.memory_budget:
+            self.counters["rejected_too_large"] += 1
+            raise AdmissionRejected(413, f"Document needs ~{cost / 2**20:.0f} MiB to parse, "
+                                         f"more than the {self.memory_budget / 2**20:.0f} MiB budget")
+        if len(self._queue) >= self.max_queue and not self._fits(cost):
+            self.counters["rejected_queue_full"] += 1
+            raise AdmissionRejected(503, "Parse queue is full, retry later", self.retry_after())
+
+    async def acquire(self, cost: int) -> None:
+        async with self._cond:
+            self.precheck(cost)
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: self._queue[0] == ticket and self._fits(cost)),
+                    self.queue_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.counters["rejected_timeout"] += 1
+                raise AdmissionRejected(503, f"Waited {self.queue_timeout:.0f}s for a parse slot, retry later",
+                                        self.retry_after())
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+            self.active        += 1
+            self.memory_in_use += cost
+            self.counters["admitted"] += 1
+
+    async def release(self, cost: int, started: float) -> None:
+        now = time.monotonic()
+        async with self._cond:
+            self.active        -= 1
+            self.memory_in_use -= cost
+            self.counters["completed"] += 1
+            self._completed.append(now)
+            self._service.append(now - started)
+            self._prune(now)
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, cost: int):
+        await self.acquire(cost)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            await asyncio.shield(self.release(cost, started))
+
+    def stats(self) -> dict:
+        return {
+            "active":           self.active,
+            "max_concurrent":   self.max_concurrent,
+            "queue_depth":      len(self._queue),
+            "max_queue":        self.max_queue,
+            "memory_in_use_mb": round(self.memory_in_use / 2**20, 1),
+            "memory_budget_mb": round(self.memory_budget / 2**20, 1),
+            "drain_rate_per_s": round(self.drain_rate(), 3),
+            "retry_after_s":    self.retry_after(),
+            **self.counters,
+        }
+
+
+admission = AdmissionController()
@@ -0,0 +1,212 @@
+# backend/services/aggregates.py
+"""
+Prescription line items as rows + incrementally maintained spend summaries.
+
+`record_prescriptions` is called in the same transaction as the prescription
+INSERT: it bulk-inserts the parsed items and adds the new totals to
+patient_spend_summary / monthly_spend_summary with one
+INSERT … ON CONFLICT DO UPDATE SET x = x + excluded.x each. Reports read those
+summaries, never the JSON blobs.
+
+Existing data (or a summary that drifted) is rebuilt with:
+
+    python -m backend.services.aggregates backfill
+"""
+import re
+import logging
+import argparse
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .. import models
+
+DATE_RE = re.compile(r"(\d{1,2})[\/\.-](\d{1,2})[\/\.-](\d{2,4})")
+
+
+def parse_amount(raw) -> Optional[Decimal]:
+    """'12.500' / '12,5' / '1 234,500 DT' → Decimal; None when there is no number."""
+    if raw is None:
+        return None
+    s = re.sub(r"[^\d,.\-]", "", str(raw))
+    if not s:
+        return None
+    if "," in s and "." in s:              # thousands separator + decimal mark
+        s = s.replace(",", "") if s.rfind(".") > s.rfind(",") else s.replace(".", "").replace(",", ".")
+    else:
+        s = s.replace(",", ".")
+    try:
+        return Decimal(s)
+    except InvalidOperation:
+        return None
+
+
+def parse_date(raw) -> Optional[date]:
+    m = DATE_RE.search(str(raw or ""))
+    if not m:
+        return None
+    d, mth, y = (int(g) for g in m.groups())
+    if y < 100:
+        y += 2000
+    try:
+        return date(y, mth, d)
+    except ValueError:
+        return None
+
+
+def item_rows(prescription_id: int, patient_id: int, presc: dict, on: date) -> List[dict]:
+    rows = []
+    for n, item in enumerate(presc.get("items") or [], start=1):
+        rows.append({
+            "prescription_id": prescription_id,
+            "patient_id":      patient_id,
+            "line_no":         n,
+            "codePCT":         item.get("codePCT"),
+            "produit":         item.get("produit"),
+            "forme":           item.get("forme"),
+            "qte":             parse_amount(item.get("qte")),
+            "puv":             parse_amount(item.get("puv")),
+            "montantPercu":    parse_amount(item.get("montantPercu")),
+            "nio":             item.get("nio"),
+            "prLot":           item.get("prLot"),
+            "pharmacyName":    presc.get("pharmacyName"),
+            "prescribed_on":   on,
+        })
+    return rows
+
+
+def record_prescriptions(db: Session, inserted: Iterable[Tuple[int, int, dict]]) -> int:
+    """
+    inserted: (prescription_id, patient_id, prescription dict) for rows just inserted
+    in the current transaction. Returns the number of item rows written.
+    """
+    today = datetime.utcnow().date()
+    rows: List[dict] = []
+    per_patient: Dict[int, dict] = defaultdict(lambda: {"prescriptions": 0, "items": 0, "total_amount": Decimal(0),
+                                                        "first_on": None, "last_on": None})
+    per_month: Dict[date, dict] = defaultdict(lambda: {"prescriptions": 0, "items": 0, "total_amount": Decimal(0)})
+
+    for presc_id, patient_id, presc in inserted:
+        created = presc.get("created_at")
+        on    = parse_date(presc.get("prescriptionDate")) or (created.date() if created else today)
+        items = item_rows(presc_id, patient_id, presc, on)
+        rows.extend(items)
+        amount = sum((r["montantPercu"] or Decimal(0) for r in items), Decimal(0))
+
+        p = per_patient[patient_id]
+        p["prescriptions"] += 1
+        p["items"]         += len(items)
+        p["total_amount"]  += amount
+        p["first_on"] = min(filter(None, [p["first_on"], on]))
+        p["last_on"]  = max(filter(None, [p["last_on"], on]))
+
+        m = per_month[on.replace(day=1)]
+        m["prescriptions"] += 1
+        m["items"]         += len(items)
+        m["total_amount"]  += amount
+
+    if rows:
+        db.execute(insert(models.PrescriptionItem), rows)
+
+    if per_patient:
+        t = models.PatientSpendSummary.__table__
+        stmt = pg_insert(t).values([{"patient_id": pid, **v} for pid, v in per_patient.items()])
+        stmt = stmt.on_conflict_do_update(index_elements=[t.c.patient_id], set_={
+            "prescriptions": t.c.prescriptions + stmt.excluded.prescriptions,
+            "items":         t.c.items + stmt.excluded.items,
+            "total_amount":  t.c.total_amount + stmt.excluded.total_amount,
+            "first_on":      func.least(t.c.first_on, stmt.excluded.first_on),
+            "last_on":       func.greatest(t.c.last_on, stmt.excluded.last_on),
+            "updated_at":    func.now(),
+        })
+        db.execute(stmt)
+
+    if per_month:
+        t = models.MonthlySpendSummary.__table__
+        stmt = pg_insert(t).values([{"month": month, **v} for month, v in per_month.items()])
+        stmt = stmt.on_conflict_do_update(index_elements=[t.c.month], set_={
+            "prescriptions": t.c.prescriptions + stmt.excluded.prescriptions,
+            "items":         t.c.items + stmt.excluded.items,
+            "total_amount":  t.c.total_amount + stmt.excluded.total_amount,
+            "updated_at":    func.now(),
+        })
+        db.execute(stmt)
+
+    return len(rows)
+
+
+# ─── Reads ───────────────────────────────────────────────────────────────────
+
+def patient_spend(db: Session, patient_id: int) -> Optional[models.PatientSpendSummary]:
+    return db.get(models.PatientSpendSummary, patient_id)
+
+
+def top_patients(db: Session, limit: int = 10) -> List[models.PatientSpendSummary]:
+    return (db.query(models.PatientSpendSummary)
+              .order_by(models.PatientSpendSummary.total_amount.desc())
+              .limit(limit).all())
+
+
+def monthly_spend(db: Session, start: Optional[date] = None, end: Optional[date] = None) -> List[models.MonthlySpendSummary]:
+    q = db.query(models.MonthlySpendSummary)
+    if start:
+        q = q.filter(models.MonthlySpendSummary.month >= start.replace(day=1))
+    if end:
+        q = q.filter(models.MonthlySpendSummary.month <= end.replace(day=1))
+    return q.order_by(models.MonthlySpendSummary.month).all()
+
+
+def top_drugs(db: Session, limit: int = 20, start: Optional[date] = None, end: Optional[date] = None) -> List[dict]:
+    """Per-drug totals straight from prescription_items (numeric columns, no JSON parsing)."""
+    pi = models.PrescriptionItem
+    q = select(pi.produit, func.count().label("items"), func.coalesce(func.sum(pi.qte), 0).label("qte"),
+               func.coalesce(func.sum(pi.montantPercu), 0).label("total_amount"))
+    if start:
+        q = q.where(pi.prescribed_on >= start)
+    if end:
+        q = q.where(pi.prescribed_on <= end)
+    q = q.group_by(pi.produit).order_by(text("total_amount DESC")).limit(limit)
+    return [dict(r._mapping) for r in db.execute(q)]
+
+
+# ─── Backfill ────────────────────────────────────────────────────────────────
+
+def backfill(db: Session, batch: int = 1000) -> int:
+    """Rebuild prescription_items and both summaries from every stored prescription."""
+    db.execute(text("TRUNCATE prescription_items, patient_spend_summary, monthly_spend_summary"))
+    done, last_id = 0, 0
+    while True:
+        chunk = (db.query(models.Prescription)
+                   .filter(models.Prescription.id > last_id)
+                   .order_by(models.Prescription.id)
+                   .limit(batch).all())
+        if not chunk:
+            break
+        record_prescriptions(db, [(p.id, p.patient_id, {"items": p.items, "pharmacyName": p.pharmacyName,
+                                                         "prescriptionDate": p.prescriptionDate,
+                                                         "created_at": p.created_at})
+                                  for p in chunk])
+        done, last_id = done + len(chunk), chunk[-1].id
+        db.expunge_all()
+    db.commit()
+    return done
+
+
+def main():
+    from ..database import SessionLocal
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    p = argparse.ArgumentParser(description="Prescription item table / spend summaries maintenance.")
+    p.add_argument("cmd", choices=["backfill"])
+    args = p.parse_args()
+    with SessionLocal() as db:
+        if args.cmd == "backfill":
+            logging.info("▷ rebuilt items + summaries for %d prescription(s)", backfill(db))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 # backend/services/azure.py
 import os
-import cv2
 import tempfile
 from pathlib import Path
+from typing import Callable
 from dotenv import load_dotenv
 from starlette.concurrency import run_in_threadpool
 
@@ -11,7 +11,12 @@ from azure_model.pipeline import (
   parse_bulletin_ocr   as _sync_parse_bulletin,
   parse_prescription_ocr as _sync_parse_prescription,
   classify_form        as _sync_classify_form,
+  parse_hedged         as _sync_parse_hedged,
 )
+from azure_model.scheduler import INTERACTIVE, scheduler
+from azure_model.pages import PageBudget
+from azure_model.refdata import template_registry
+from azure_model.form_cache import form_cache
 
 load_dotenv(override=True)
 
@@ -23,24 +28,31 @@ async def classify_form_on_bytes(file_bytes: bytes, filename: str) -> str:
             tmp.write(file_bytes)
             tmp_path = Path(tmp.name)
 
-        presc_hdr  = cv2.imread("assets/ordonnance_header1.png")
-        bullet_hdr = cv2.imread("assets/bulletin_de_soin_header1.png")
-        if presc_hdr is None or bullet_hdr is None:
-            raise RuntimeError("Could not load header images")
-
-        # THIS must call the sync classify_form from the pipeline:
+        # THIS must call the sync classify_form from the pipeline (shared, memory-mapped templates):
         return await run_in_threadpool(
-            _sync_classify_form, tmp_path, presc_hdr, bullet_hdr, None
+            _sync_classify_form, tmp_path, registry=template_registry(), cache=form_cache
         )
     finally:
         if tmp_path and tmp_path.exists():
             tmp_path.unlink()
 
 
-async def parse_bulletin_ocr(file_bytes: bytes, filename: str) -> dict:
-    # delegate to your sync pipeline
-    return await run_in_threadpool(_sync_parse_bulletin, file_bytes, filename)
+async def parse_bulletin_ocr(
+    file_bytes: bytes, filename: str, pages: str | None = None, priority: str = INTERACTIVE,
+    progress: Callable[..., None] | None = None, page_budget: PageBudget | None = None,
+) -> dict:
+    # delegate to your sync pipeline (hedged: local OCR if Azure is slow or down)
+    return await run_in_threadpool(_sync_parse_hedged, "bulletin_de_soin", file_bytes, filename, pages, priority, progress,
+                                   page_budget=page_budget or PageBudget())
+
+
+async def parse_prescription_ocr(
+    file_bytes: bytes, filename: str, pages: str | None = None, priority: str = INTERACTIVE,
+    progress: Callable[..., None] | None = None, page_budget: PageBudget | None = None,
+) -> dict:
+    return await run_in_threadpool(_sync_parse_hedged, "prescription", file_bytes, filename, pages, priority, progress,
+                                   page_budget=page_budget or PageBudget())
 
 
-async def parse_prescription_ocr(file_bytes: bytes, filename: str) -> dict:
-    return await run_in_threadpool(_sync_parse_prescription, file_bytes, filename)
+def azure_scheduler_stats() -> dict:
+    return scheduler.stats()
@@ -0,0 +1,121 @@
+# backend/services/bulk.py
+"""
+Batch creation of bulletins / prescriptions for the back-office import.
+
+One request → one transaction:
+  1. validate every item with the regular Create schema (bad items are reported, not fatal)
+  2. upsert all referenced patients with a single INSERT … ON CONFLICT … RETURNING
+  3. insert all documents with one executemany INSERT … RETURNING id
+If the batch insert fails (a constraint on one row), it is retried row by row
+inside savepoints so only the offending items are reported as failed.
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from .. import models, schemas
+from .patient_search import patient_index
+
+BULK_MAX_ITEMS = 5000
+
+Name = Tuple[str, str]
+
+
+def bulletin_patient(b: schemas.BulletinCreate) -> Name:
+    if not b.prenom or not b.nom:
+        raise ValueError("Missing first or last name in bulletin")
+    return b.prenom, b.nom
+
+
+def prescription_patient(p: schemas.PrescriptionCreate) -> Name:
+    if not p.items:
+        raise ValueError("Prescription must have at least one item")
+    try:
+        first, last = (p.patientIdentity or "").split(" ", 1)
+    except ValueError:
+        raise ValueError("patientIdentity must be 'First Last'")
+    return first, last
+
+
+def upsert_patients(db: Session, names: List[Name]) -> Dict[Name, int]:
+    """
+    Insert missing patients and return {(first, last): id} for all of them, in one statement.
+    The caller adds them to patient_index once the transaction has committed.
+    """
+    unique = sorted(set(names))
+    if not unique:
+        return {}
+    stmt = pg_insert(models.Patient).values([{"first_name": f, "last_name": l} for f, l in unique])
+    # DO UPDATE (not DO NOTHING) so RETURNING also yields the rows that already existed
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_patient_name",
+        set_={"first_name": stmt.excluded.first_name},
+    ).returning(models.Patient.id, models.Patient.first_name, models.Patient.last_name)
+    return {(r.first_name, r.last_name): r.id for r in db.execute(stmt)}
+
+
+def _insert_rows(db: Session, model, rows: List[dict]) -> List[int]:
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return [r.id for r in db.execute(stmt, rows)]
+
+
+def bulk_create(
+    db: Session,
+    raw_items: List[Dict[str, Any]],
+    schema: Type[BaseModel],
+    model,
+    patient_of: Callable[[Any], Name],
+    on_inserted: Optional[Callable[[Session, List[Tuple[int, int, dict]]], Any]] = None,
+) -> dict:
+    """`on_inserted(db, [(id, patient_id, row), …])` runs in the same savepoint as the INSERT."""
+    results: List[Dict[str, Any]] = [{"index": i} for i in range(len(raw_items))]
+
+    # 1) per-item validation
+    valid: List[Tuple[int, BaseModel, Name]] = []
+    for i, raw in enumerate(raw_items):
+        try:
+            item = schema.model_validate(raw)
+            valid.append((i, item, patient_of(item)))
+        except ValidationError as e:
+            results[i]["error"] = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+        except ValueError as e:
+            results[i]["error"] = str(e)
+
+    if valid:
+        try:
+            # 2) patients, 3) documents – same transaction
+            patient_ids = upsert_patients(db, [name for _, _, name in valid])
+            rows = [{**item.model_dump(), "patient_id": patient_ids[name]} for _, item, name in valid]
+            try:
+                with db.begin_nested():
+                    ids = _insert_rows(db, model, rows)
+                    if on_inserted:
+                        on_inserted(db, [(new_id, row["patient_id"], row) for new_id, row in zip(ids, rows)])
+                for (i, _, _), row, new_id in zip(valid, rows, ids):
+                    results[i].update(id=new_id, patient_id=row["patient_id"])
+            except DBAPIError:
+                logging.warning("Bulk insert into %s failed – retrying row by row", model.__tablename__)
+                for (i, _, _), row in zip(valid, rows):
+                    try:
+                        with db.begin_nested():
+                            new_id = _insert_rows(db, model, [row])[0]
+                            if on_inserted:
+                                on_inserted(db, [(new_id, row["patient_id"], row)])
+                        results[i].update(id=new_id, patient_id=row["patient_id"])
+                    except DBAPIError as e:
+                        results[i]["error"] = str(e.orig).strip() if e.orig else str(e)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        # only committed rows may reach the search index (a rollback would leave ids that 404)
+        for (first, last), pid in patient_ids.items():
+            patient_index.add(pid, first, last)
+
+    created = sum(1 for r in results if "id" in r)
+    return {"created": created, "failed": len(results) - created, "results": results}
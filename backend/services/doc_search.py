@@ -0,0 +1,144 @@
+# backend/services/doc_search.py
+"""
+Filters over the JSONB item/table columns, pushed down to Postgres.
+
+Exact matches (codePCT, codePs) are containment (`@>`) queries, served by
+the jsonb_path_ops GIN indexes created in migrations.py. That operator class
+only accelerates containment and `==` jsonpath predicates, though, so:
+
+- prescription amount ranges and product substrings go through the
+  prescription_items table (numeric montantPercu with a btree index – see
+  aggregates.py; rebuild it with `aggregates backfill` for older rows);
+- bulletin tables have no such side table, so their ranges (`.double()`) and
+  designation substrings (`like_regex`) are jsonpath predicates (`@?`) that
+  Postgres evaluates row by row. They still never load a row into Python, but
+  they do scan every bulletin the other filters leave.
+
+Amounts are stored as strings ("12.500") in the JSON; values that aren't
+numbers simply don't match.
+"""
+import json
+from datetime import date, timedelta
+from typing import List, Optional
+
+from sqlalchemy import Boolean, cast, literal, select
+from sqlalchemy.dialects.postgresql import JSONPATH
+from sqlalchemy.orm import Query, Session
+
+from .. import models
+
+# bulletin table → the field holding its amount
+BULLETIN_TABLES = {
+    "consultationsDentaires": "honoraires",
+    "prothesesDentaires":     "honoraires",
+    "consultationsVisites":   "honoraires",
+    "actesMedicaux":          "honoraires",
+    "actesParamed":           "honoraires",
+    "biologie":               "montant",
+    "hospitalisation":        "forfait",
+    "pharmacie":              "montant",
+}
+
+
+# metacharacters of the XQuery-style regexes jsonpath's like_regex takes
+REGEX_SPECIAL = set(r".\?*+{}()[]^$|")
+
+
+def jsonpath_string(value: str) -> str:
+    """A jsonpath string literal (same escaping rules as JSON)."""
+    return json.dumps(value)
+
+
+def regex_literal(value: str) -> str:
+    """`value` as a like_regex pattern matching it literally (re.escape's escapes aren't all valid there)."""
+    return "".join("\\" + c if c in REGEX_SPECIAL else c for c in value)
+
+
+def like_literal(value: str) -> str:
+    """`value` as a LIKE pattern matching it literally (escape character: backslash)."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def item_filter(column, predicates: List[str]):
+    """`column @? '$[*] ? (p1 && p2 …)'` – all predicates must hold for the same element."""
+    path = "$[*] ? (" + " && ".join(predicates) + ")"
+    return column.op("@?", return_type=Boolean)(cast(literal(path), JSONPATH))
+
+
+def amount_predicates(field: str, min_amount: Optional[float], max_amount: Optional[float]) -> List[str]:
+    preds = []
+    if min_amount is not None:
+        preds.append(f"@.{field}.double() >= {float(min_amount)!r}")
+    if max_amount is not None:
+        preds.append(f"@.{field}.double() <= {float(max_amount)!r}")
+    return preds
+
+
+def created_between(query: Query, model, date_from: Optional[date], date_to: Optional[date]) -> Query:
+    if date_from:
+        query = query.filter(model.created_at >= date_from)
+    if date_to:
+        query = query.filter(model.created_at < date_to + timedelta(days=1))
+    return query
+
+
+def search_prescriptions(
+    db: Session,
+    code_pct: Optional[str] = None,
+    produit: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    patient_id: Optional[int] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> List[models.Prescription]:
+    q = db.query(models.Prescription)
+    if code_pct:
+        q = q.filter(models.Prescription.items.contains([{"codePCT": code_pct}]))
+    # ranges / substrings: one prescription_items row must satisfy them all
+    pi, conds = models.PrescriptionItem, []
+    if min_amount is not None:
+        conds.append(pi.montantPercu >= min_amount)
+    if max_amount is not None:
+        conds.append(pi.montantPercu <= max_amount)
+    if produit:
+        conds.append(pi.produit.ilike(f"%{like_literal(produit)}%", escape="\\"))
+    if conds:
+        q = q.filter(models.Prescription.id.in_(select(pi.prescription_id).where(*conds)))
+    if patient_id is not None:
+        q = q.filter(models.Prescription.patient_id == patient_id)
+    q = created_between(q, models.Prescription, date_from, date_to)
+    return q.order_by(models.Prescription.id.desc()).offset(offset).limit(limit).all()
+
+
+def search_bulletins(
+    db: Session,
+    table: str = "pharmacie",
+    code_ps: Optional[str] = None,
+    designation: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    patient_id: Optional[int] = None,
+    limit: int = 50,
+    offset: int = 0,
+) -> List[models.Bulletin]:
+    if table not in BULLETIN_TABLES:
+        raise ValueError(f"table must be one of {', '.join(BULLETIN_TABLES)}")
+    column = getattr(models.Bulletin, table)
+
+    q = db.query(models.Bulletin)
+    if code_ps:
+        q = q.filter(column.contains([{"codePs": code_ps}]))
+    preds = amount_predicates(BULLETIN_TABLES[table], min_amount, max_amount)
+    if designation:
+        preds.append(f"@.designation like_regex {jsonpath_string(regex_literal(designation))} flag \"i\"")
+    if preds:
+        q = q.filter(item_filter(column, preds))
+    if patient_id is not None:
+        q = q.filter(models.Bulletin.patient_id == patient_id)
+    q = created_between(q, models.Bulletin, date_from, date_to)
+    return q.order_by(models.Bulletin.id.desc()).offset(offset).limit(limit).all()
@@ -0,0 +1,224 @@
+# backend/services/export.py
+"""
+Streaming export of bulletins / prescriptions as flat rows (CSV or Parquet).
+
+Rows are read through a server-side cursor (`yield_per` → stream_results),
+one partition at a time, so memory stays flat however many documents match:
+
+  prescriptions  one row per item      (prescription columns + line_no + item fields)
+  bulletins      one row per table row (bulletin columns + table + line_no + row fields)
+
+A document with no item / table row still gets one row with those fields empty.
+Each partition is flattened and encoded, then dropped before the next fetch.
+CSV is written with csv.writer and Parquet as one row group per partition
+(needs pyarrow).
+
+    python -m backend.services.export prescriptions out.parquet --from 2025-01-01 --to 2025-03-31
+"""
+import io
+import csv
+import logging
+import argparse
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from .. import models
+from .doc_search import BULLETIN_TABLES
+
+YIELD_PER = 2000
+FORMATS   = ("csv", "parquet")
+
+PRESCRIPTION_COLUMNS = ["id", "patient_id", "first_name", "last_name", "pharmacyName", "pharmacyAddress",
+                        "pharmacyContact", "pharmacyFiscalId", "beneficiaryId", "patientIdentity",
+                        "prescriberCode", "prescriptionDate", "regimen", "dispensationDate", "executor",
+                        "pharmacistCnamRef", "total", "totalInWords", "created_at", "updated_at"]
+ITEM_FIELDS          = ["codePCT", "produit", "forme", "qte", "puv", "montantPercu", "nio", "prLot"]
+
+BULLETIN_COLUMNS     = ["id", "patient_id", "first_name", "last_name", "prenom", "nom", "adresse", "codePostal",
+                        "prenomMalade", "nomMalade", "assureSocial", "conjoint", "enfant", "ascendant",
+                        "dateNaissance", "numTel", "refDossier", "identifiantUnique", "cnss", "cnrps", "convbi",
+                        "patientType", "apci", "mo", "hosp", "grossesse", "codeApci", "dateAccouchement",
+                        "created_at", "updated_at"]
+# union of the columns bulletin_from_result gives the eight tables
+TABLE_FIELDS         = ["date", "dent", "dents", "codeActe", "cotation", "designation", "honoraires", "montant",
+                        "forfait", "codeHosp", "codeClinique", "codePs", "signature"]
+
+
+class ExportFormatError(ValueError):
+    pass
+
+
+# ── Queries ──
+def _query(model, columns: List[str], json_columns: List[str], date_from: Optional[date], date_to: Optional[date]):
+    own = [c for c in columns if c not in ("first_name", "last_name")]
+    q = (select(*(getattr(model, c).label(c) for c in own + json_columns),
+                models.Patient.first_name, models.Patient.last_name)
+           .join(models.Patient, model.patient_id == models.Patient.id))
+    if date_from:
+        q = q.where(model.created_at >= date_from)
+    if date_to:
+        q = q.where(model.created_at < date_to + timedelta(days=1))
+    return q.order_by(model.id)
+
+
+def prescription_rows(rows: Iterable) -> Iterator[list]:
+    for r in rows:
+        base = [getattr(r, c) for c in PRESCRIPTION_COLUMNS]
+        items = r.items or [{}]
+        for n, item in enumerate(items, start=1):
+            yield base + [n if item else None] + [item.get(f) for f in ITEM_FIELDS]
+
+
+def bulletin_rows(rows: Iterable) -> Iterator[list]:
+    empty = [None, None] + [None] * len(TABLE_FIELDS)
+    for r in rows:
+        base, emitted = [getattr(r, c) for c in BULLETIN_COLUMNS], False
+        for table in BULLETIN_TABLES:
+            for n, row in enumerate(getattr(r, table) or [], start=1):
+                emitted = True
+                yield base + [table, n] + [row.get(f) for f in TABLE_FIELDS]
+        if not emitted:
+            yield base + empty
+
+
+EXPORTS = {
+    "prescriptions": (models.Prescription, PRESCRIPTION_COLUMNS, ["items"],
+                      PRESCRIPTION_COLUMNS + ["line_no"] + ITEM_FIELDS, prescription_rows),
+    "bulletins":     (models.Bulletin, BULLETIN_COLUMNS, list(BULLETIN_TABLES),
+                      BULLETIN_COLUMNS + ["table", "line_no"] + TABLE_FIELDS, bulletin_rows),
+}
+
+
+def iter_partitions(engine: Engine, kind: str, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                    yield_per: int = YIELD_PER) -> Iterator[List[list]]:
+    """Flattened rows, one list per server-side cursor partition."""
+    model, columns, json_columns, _, flatten = EXPORTS[kind]
+    with engine.connect() as conn:
+        result = conn.execution_options(yield_per=yield_per).execute(
+            _query(model, columns, json_columns, date_from, date_to))
+        for partition in result.partitions():
+            yield list(flatten(partition))
+
+
+# ── Encoders: partitions in, bytes out ──
+def _cell(v):
+    return v.isoformat() if isinstance(v, (date, datetime)) else v
+
+
+def encode_csv(header: List[str], partitions: Iterable[List[list]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    for rows in partitions:
+        writer.writerows([[_cell(v) for v in row] for row in rows])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream that hands out what was written since the last drain()."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        out, self._chunks = b"".join(self._chunks), []
+        return out
+
+
+def encode_parquet(header: List[str], partitions: Iterable[List[list]]) -> Iterator[bytes]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportFormatError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    sink, writer, schema = _ChunkSink(), None, None
+    for rows in partitions:
+        if not rows:
+            continue
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(header)}
+        if writer is None:
+            # string columns can be all-null in the first partition: fix them as strings
+            schema = pa.schema([(name, pa.string() if pa.types.is_null(t.type) else t.type)
+                                for name, t in zip(header, pa.table(columns).schema)])
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        yield sink.drain()
+    if writer is None:
+        writer = pq.ParquetWriter(sink, pa.schema([(name, pa.string()) for name in header]))
+    writer.close()
+    yield sink.drain()
+
+
+ENCODERS: dict[str, Callable[[List[str], Iterable[List[list]]], Iterator[bytes]]] = {
+    "csv":     encode_csv,
+    "parquet": encode_parquet,
+}
+MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "parquet": "application/vnd.apache.parquet"}
+
+
+def export_stream(engine: Engine, kind: str, fmt: str = "csv", date_from: Optional[date] = None,
+                  date_to: Optional[date] = None, yield_per: int = YIELD_PER) -> Iterator[bytes]:
+    if kind not in EXPORTS:
+        raise ValueError(f"kind must be one of {', '.join(EXPORTS)}")
+    if fmt not in ENCODERS:
+        raise ExportFormatError(f"format must be one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401 – fail before the response starts, not halfway through it
+        except ImportError:
+            raise ExportFormatError("Parquet export needs pyarrow (pip install pyarrow)")
+    header = EXPORTS[kind][3]
+    return ENCODERS[fmt](header, iter_partitions(engine, kind, date_from, date_to, yield_per))
+
+
+def export_to_file(engine: Engine, kind: str, out: Path, fmt: Optional[str] = None,
+                   date_from: Optional[date] = None, date_to: Optional[date] = None,
+                   yield_per: int = YIELD_PER) -> int:
+    fmt = fmt or ("parquet" if out.suffix == ".parquet" else "csv")
+    written = 0
+    with open(out, "wb") as f:
+        for chunk in export_stream(engine, kind, fmt, date_from, date_to, yield_per):
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def main():
+    from ..database import engine
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    p = argparse.ArgumentParser(description="Stream bulletins / prescriptions to CSV or Parquet.")
+    p.add_argument("kind", choices=list(EXPORTS))
+    p.add_argument("out", type=Path, help="output file (.csv or .parquet)")
+    p.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    p.add_argument("--from", dest="date_from", type=date.fromisoformat, help="created on/after (YYYY-MM-DD)")
+    p.add_argument("--to", dest="date_to", type=date.fromisoformat, help="created on/before (YYYY-MM-DD)")
+    p.add_argument("--yield-per", type=int, default=YIELD_PER, help="rows fetched per cursor round trip")
+    args = p.parse_args()
+
+    size = export_to_file(engine, args.kind, args.out, args.format, args.date_from, args.date_to, args.yield_per)
+    logging.info("▷ wrote %s (%.1f MiB)", args.out, size / 2**20)
+
+
+if __name__ == "__main__":
+    main()
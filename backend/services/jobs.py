@@ -0,0 +1,95 @@
+# backend/services/jobs.py
+"""
+In-process registry of parse jobs and their progress events (served as SSE).
+
+Pipeline stages call `job.emit(stage, **data)` from any thread; every
+subscriber replays the events seen so far and then waits for new ones.
+"""
+import json
+import time
+import uuid
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+FINAL_STAGES = {"done", "error"}
+JOB_TTL_S    = 600      # forget finished jobs after 10 minutes
+
+
+class ParseJob:
+    def __init__(self, filename: str, loop: asyncio.AbstractEventLoop):
+        self.id          = uuid.uuid4().hex
+        self.filename    = filename
+        self.events: List[dict] = []
+        self.result: Optional[dict] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._loop       = loop
+        self._started    = time.perf_counter()
+        self._last       = self._started
+        self._changed    = asyncio.Event()
+
+    @property
+    def status(self) -> str:
+        if not self.events:
+            return "pending"
+        last = self.events[-1]["stage"]
+        return last if last in FINAL_STAGES else "running"
+
+    def _append(self, stage: str, data: dict) -> None:
+        now = time.perf_counter()
+        self.events.append({
+            "stage":     stage,
+            "elapsedMs": round((now - self._started) * 1000),
+            "stageMs":   round((now - self._last) * 1000),
+            **data,
+        })
+        self._last = now
+        if stage in FINAL_STAGES:
+            self.finished_at = time.monotonic()
+            if stage == "done":
+                self.result = data.get("result")
+        # wake current subscribers, then re-arm for the next event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def emit(self, stage: str, **data) -> None:
+        """Thread-safe: may be called from the pipeline's worker threads."""
+        self._loop.call_soon_threadsafe(self._append, stage, data)
+
+    async def subscribe(self) -> AsyncIterator[dict]:
+        seen = 0
+        while True:
+            waiter = self._changed
+            while seen < len(self.events):
+                event = self.events[seen]
+                seen += 1
+                yield event
+                if event["stage"] in FINAL_STAGES:
+                    return
+            await waiter.wait()
+
+
+_jobs: Dict[str, ParseJob] = {}
+
+
+def _evict_expired() -> None:
+    now = time.monotonic()
+    for job_id in [j for j, job in _jobs.items() if job.finished_at and now - job.finished_at > JOB_TTL_S]:
+        del _jobs[job_id]
+
+
+def create_job(filename: str) -> ParseJob:
+    _evict_expired()
+    job = ParseJob(filename, asyncio.get_running_loop())
+    _jobs[job.id] = job
+    return job
+
+
+def get_job(job_id: str) -> Optional[ParseJob]:
+    return _jobs.get(job_id)
+
+
+async def sse_events(job: ParseJob) -> AsyncIterator[str]:
+    """Format a job's events as text/event-stream frames."""
+    async for event in job.subscribe():
+        yield f"event: {event['stage']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
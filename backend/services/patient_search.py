@@ -0,0 +1,146 @@
+# backend/services/patient_search.py
+"""
+Fuzzy patient lookup for OCR'd names.
+
+Process-local index (default): names are normalized (accents, case,
+punctuation), split into character trigrams and kept in an inverted index.
+A query only scores the patients that share enough trigrams with it
+(blocking), with rapidfuzz's token_sort_ratio – so "BEN ALI Mohamed" finds
+"Mohamed Ben Ali". New patients are added as they are created, and each
+search first pulls rows with a higher id than the index has seen, so
+inserts made by other workers show up too.
+
+PATIENT_SEARCH_BACKEND=pg_trgm runs the same search in Postgres with pg_trgm
+(see migrations.OPTIONAL_MIGRATIONS) for deployments where per-process
+indexes are not wanted.
+"""
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+from rapidfuzz import fuzz
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .. import models
+
+SEARCH_BACKEND   = os.getenv("PATIENT_SEARCH_BACKEND", "memory")   # memory | pg_trgm
+NGRAM            = 3
+BLOCK_FRAC       = 0.3      # candidates must share ≥30% of the query's trigrams
+MAX_CANDIDATES   = 500      # scored per query, best-blocked first
+MIN_SCORE        = 50
+SYNC_INTERVAL_S  = 2.0      # how often a search checks for rows added by other workers
+
+
+def normalize(name: str) -> str:
+    name = unicodedata.normalize("NFKD", name or "")
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+def ngrams(norm: str, n: int = NGRAM) -> Set[str]:
+    grams: Set[str] = set()
+    for token in norm.split():
+        padded = f" {token} "
+        grams.update(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+    return grams
+
+
+class PatientIndex:
+    def __init__(self):
+        self._names: Dict[int, Tuple[str, str, str]] = {}      # id → (first, last, normalized)
+        self._postings: Dict[str, Set[int]] = {}
+        self._lock      = threading.Lock()
+        self._max_id    = 0
+        self._loaded    = False
+        self._synced_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, patient_id: int, first: str, last: str) -> None:
+        norm = normalize(f"{first} {last}")
+        with self._lock:
+            if patient_id in self._names:
+                self._remove_locked(patient_id)
+            self._names[patient_id] = (first, last, norm)
+            for g in ngrams(norm):
+                self._postings.setdefault(g, set()).add(patient_id)
+            self._max_id = max(self._max_id, patient_id)
+
+    def remove(self, patient_id: int) -> None:
+        with self._lock:
+            self._remove_locked(patient_id)
+
+    def _remove_locked(self, patient_id: int) -> None:
+        entry = self._names.pop(patient_id, None)
+        if not entry:
+            return
+        for g in ngrams(entry[2]):
+            ids = self._postings.get(g)
+            if ids:
+                ids.discard(patient_id)
+                if not ids:
+                    del self._postings[g]
+
+    def sync(self, db: Session, force: bool = False) -> None:
+        """Load everything on first use, then only rows newer than the highest id seen."""
+        now = time.monotonic()
+        if self._loaded and not force and now - self._synced_at < SYNC_INTERVAL_S:
+            return
+        rows = (db.query(models.Patient.id, models.Patient.first_name, models.Patient.last_name)
+                  .filter(models.Patient.id > self._max_id)
+                  .all())
+        for r in rows:
+            self.add(r.id, r.first_name, r.last_name)
+        self._loaded, self._synced_at = True, now
+
+    def search(self, query: str, k: int = 10, min_score: float = MIN_SCORE) -> List[dict]:
+        q = normalize(query)
+        grams = ngrams(q)
+        if not grams:
+            return []
+        with self._lock:
+            shared = Counter()
+            for g in grams:
+                shared.update(self._postings.get(g, ()))
+            need = max(1, int(len(grams) * BLOCK_FRAC))
+            candidates = [pid for pid, c in shared.most_common(MAX_CANDIDATES) if c >= need]
+            entries = [(pid, self._names[pid]) for pid in candidates]
+
+        hits = []
+        for pid, (first, last, norm) in entries:
+            score = fuzz.token_sort_ratio(q, norm)
+            if score >= min_score:
+                hits.append({"id": pid, "first_name": first, "last_name": last, "score": round(score, 1)})
+        hits.sort(key=lambda h: h["score"], reverse=True)
+        return hits[:k]
+
+
+patient_index = PatientIndex()
+
+
+def search_pg_trgm(db: Session, query: str, k: int = 10, min_score: float = MIN_SCORE) -> List[dict]:
+    """Same search as a trigram query (uses ix_patients_name_trgm)."""
+    rows = db.execute(text("""
+        SELECT id, first_name, last_name,
+               similarity(lower(first_name || ' ' || last_name), :q) AS sim
+          FROM patients
+         WHERE lower(first_name || ' ' || last_name) % :q
+         ORDER BY sim DESC
+         LIMIT :k
+    """), {"q": normalize(query), "k": k}).all()
+    return [{"id": r.id, "first_name": r.first_name, "last_name": r.last_name, "score": round(r.sim * 100, 1)}
+            for r in rows if r.sim * 100 >= min_score]
+
+
+def search_patients(db: Session, query: str, k: int = 10, backend: str | None = None,
+                    min_score: float = MIN_SCORE) -> List[dict]:
+    if (backend or SEARCH_BACKEND) == "pg_trgm":
+        return search_pg_trgm(db, query, k, min_score)
+    patient_index.sync(db)
+    return patient_index.search(query, k, min_score)
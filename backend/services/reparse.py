@@ -0,0 +1,174 @@
+# backend/services/reparse.py
+"""
+Offline re-parse of archived Azure results.
+
+Every Azure answer is kept as gzip'd JSON under AZURE_RESULT_DIR, keyed by
+the sha256 of the uploaded bytes (azure_model.result_store) – the same hash
+as FileUpload.content_hash. After a change to bulletin_from_result /
+prescription_from_result, this re-runs only the local mapping over the
+archive, in a process pool, and writes the new output back to
+FileUpload.parsed in batches. Nothing is sent to Azure.
+
+    python -m backend.services.reparse [--kind prescription] [--workers 8] [--dry-run]
+
+A hash can have several archived results, one per page range. An upload is
+only updated when its hash has one archived page range for its document type;
+otherwise the archive can't tell which result `parsed` came from, and the row
+is skipped. Signature crops need the original scan, so the crop file names
+already stored in `parsed` are carried over instead of being recomputed. The
+new `parsed` has the shape /documents/parse stores (an Azure result, so
+"degraded" is False).
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .. import models
+
+BATCH_SIZE   = 500
+KEEP_FIELDS  = ("signatureCropFile", "signatureThumbFile")
+
+
+class Outcome(NamedTuple):
+    digest:    str
+    kind:      str
+    pages:     Optional[str]
+    stored_at: float
+    parsed:    Optional[dict]
+    error:     Optional[str]
+
+
+def reparse_file(path: str) -> Outcome:
+    """Worker: one archived envelope → freshly mapped dict (no network, no scan)."""
+    from azure_model.result_store import load_envelope, result_from_dict
+    from azure_model.pipeline import bulletin_from_result, prescription_from_result
+
+    env = load_envelope(Path(path))
+    digest, kind, pages, stored_at = env["content_hash"], env["kind"], env.get("pages"), env.get("stored_at", 0.0)
+    try:
+        result = result_from_dict(env["result"])
+        if kind == "prescription":
+            parsed = prescription_from_result(result)
+        else:
+            parsed = bulletin_from_result(result)
+        return Outcome(digest, kind, pages, stored_at, parsed, None)
+    except Exception as e:
+        return Outcome(digest, kind, pages, stored_at, None, f"{type(e).__name__}: {e}")
+
+
+def _carry(old: Optional[dict], new: dict) -> dict:
+    out = {**new, "degraded": False}
+    for key in KEEP_FIELDS:
+        if old and key in old:
+            out[key] = old[key]
+    return out
+
+
+def merge_parsed(stored: Optional[dict], outcomes: List[Outcome]) -> Optional[dict]:
+    """New `parsed` for one upload from its hash's re-parsed results, or None to leave it alone."""
+    doc_type   = ((stored or {}).get("header") or {}).get("documentType")
+    candidates = [o for o in outcomes if doc_type in (None, o.parsed["header"]["documentType"])]
+    if len({o.pages for o in candidates}) != 1:
+        return None
+    return _carry(stored, max(candidates, key=lambda o: o.stored_at).parsed)
+
+
+def apply_batch(db: Session, outcomes: List[Outcome]) -> int:
+    """Write one batch of re-parsed results onto the FileUpload rows sharing their hash."""
+    fresh: Dict[str, List[Outcome]] = {}
+    for o in outcomes:
+        if o.parsed is not None:
+            fresh.setdefault(o.digest, []).append(o)
+    if not fresh:
+        return 0
+    rows = (db.query(models.FileUpload.id, models.FileUpload.content_hash, models.FileUpload.parsed)
+              .filter(models.FileUpload.content_hash.in_(fresh))
+              .all())
+    params = []
+    for r in rows:
+        parsed = merge_parsed(r.parsed, fresh[r.content_hash])
+        if parsed is not None:
+            params.append({"id": r.id, "parsed": parsed})
+    if params:
+        db.execute(update(models.FileUpload), params)      # executemany, keyed by primary key
+        db.commit()
+    return len(params)
+
+
+def _progress(done: int, total: int, failed: int, started: float) -> None:
+    rate = done / max(time.monotonic() - started, 1e-6)
+    eta  = (total - done) / rate if rate else 0
+    sys.stderr.write(f"\r  {done}/{total}  failed={failed}  {rate:.1f} doc/s  eta {eta:.0f}s ")
+    sys.stderr.flush()
+
+
+def reparse(
+    db: Optional[Session],
+    root: Optional[Path] = None,
+    kind: Optional[str] = None,
+    workers: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Dict[str, int]:
+    """Re-parse every archived result; `db=None` is a dry run."""
+    # workers import the pipeline: keep that import offline
+    os.environ.setdefault("AZURE_LIST_MODELS", "0")
+    from azure_model.result_store import RESULT_DIR, iter_result_files
+
+    files = [str(p) for p in iter_result_files(root or RESULT_DIR, kind)]
+    stats = {"results": len(files), "parsed": 0, "failed": 0, "updated": 0}
+    if not files:
+        return stats
+
+    started, pending = time.monotonic(), []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, min(32, len(files) // ((workers or os.cpu_count() or 1) * 4)))
+        for n, outcome in enumerate(pool.map(reparse_file, files, chunksize=chunksize), start=1):
+            # flush only between hashes: merge_parsed needs all of a hash's results at once
+            if db is not None and len(pending) >= batch_size and pending[-1].digest != outcome.digest:
+                stats["updated"] += apply_batch(db, pending)
+                pending = []
+            if outcome.error:
+                stats["failed"] += 1
+                logging.debug("%s (%s %s): %s", outcome.digest[:12], outcome.kind, outcome.pages, outcome.error)
+            else:
+                stats["parsed"] += 1
+                pending.append(outcome)
+            if n % 25 == 0 or n == len(files):
+                _progress(n, len(files), stats["failed"], started)
+    sys.stderr.write("\n")
+
+    if db is not None and pending:
+        stats["updated"] += apply_batch(db, pending)
+    return stats
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    p = argparse.ArgumentParser(description="Re-run the local field mapping over archived Azure results.")
+    p.add_argument("--root", type=Path, help="archive directory (default: AZURE_RESULT_DIR)")
+    p.add_argument("--kind", choices=["bulletin", "prescription"])
+    p.add_argument("--workers", type=int, help="process pool size (default: CPU count)")
+    p.add_argument("--batch", type=int, default=BATCH_SIZE, help="rows per UPDATE batch")
+    p.add_argument("--dry-run", action="store_true", help="parse only, do not touch the database")
+    args = p.parse_args()
+
+    if args.dry_run:
+        stats = reparse(None, args.root, args.kind, args.workers, args.batch)
+    else:
+        from ..database import SessionLocal
+        with SessionLocal() as db:
+            stats = reparse(db, args.root, args.kind, args.workers, args.batch)
+    logging.info("▷ %(results)d archived result(s): %(parsed)d re-parsed, %(failed)d failed, "
+                 "%(updated)d file upload(s) updated", stats)
+
+
+if __name__ == "__main__":
+    main()
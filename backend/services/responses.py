@@ -0,0 +1,34 @@
+# backend/services/responses.py
+"""
+Direct Pydantic v2 serialization for large ORM payloads.
+
+By default FastAPI validates the returned ORM object against response_model,
+dumps it to Python primitives, then runs json.dumps over the result. For a
+patient with hundreds of bulletins (eight JSON tables each), that
+dump-then-encode round trip costs about as much as the query itself.
+
+`orm_response` validates once (from_attributes) and lets pydantic-core write
+the JSON bytes straight away. Endpoints keep `response_model=` for the
+OpenAPI schema; since they return a ready-made Response, FastAPI does not
+validate again.
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, obj: Any) -> bytes:
+    """ORM object (or list of them) → JSON bytes, shaped by `schema` (a model or e.g. List[Model])."""
+    ta = adapter(schema)
+    return ta.dump_json(ta.validate_python(obj, from_attributes=True), by_alias=True)
+
+
+def orm_response(schema: Any, obj: Any, status_code: int = 200) -> Response:
+    return Response(content=dump_json(schema, obj), status_code=status_code, media_type="application/json")
@@ -0,0 +1,49 @@
+# backend/services/storage.py
+"""
+Content-addressable blob store for uploaded documents.
+
+Every upload is written once, as bulletins/<sha256><suffix>; uploading the
+same bytes again reuses the existing blob instead of adding another copy.
+"""
+import os
+import hashlib
+import tempfile
+from typing import BinaryIO, Tuple
+
+UPLOAD_DIR = "bulletins"
+CHUNK      = 1 << 20
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def blob_path(content_hash: str, suffix: str) -> str:
+    return os.path.join(UPLOAD_DIR, f"{content_hash}{suffix.lower()}")
+
+
+def store_blob(src: BinaryIO, suffix: str) -> Tuple[str, str, int]:
+    """
+    Stream `src` into the blob store while hashing it.
+    Returns (content_hash, path, size_bytes). Existing blobs are never rewritten.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    h, size = hashlib.sha256(), 0
+    fd, tmp = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buf:
+            for chunk in iter(lambda: src.read(CHUNK), b""):
+                h.update(chunk)
+                size += len(chunk)
+                buf.write(chunk)
+        digest = h.hexdigest()
+        path   = blob_path(digest, suffix)
+        if os.path.exists(path):
+            os.unlink(tmp)
+        else:
+            os.replace(tmp, path)
+        return digest, path, size
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
@@ -0,0 +1,169 @@
+# backend/services/warmup.py
+"""
+Startup warm-up: run every pipeline stage once before taking traffic.
+
+The first parse on a fresh worker pays for OpenCV/ORB initialisation, the first
+Poppler and Tesseract start-ups, the Azure TLS handshake and empty DB / index
+caches. `run_warmup` pays those costs up front, on a tiny sample page built
+from the bundled header template (assets/ordonnance_header1.png). Azure
+parsing goes through a local stub client, so no document is sent anywhere.
+
+/health/ready answers 503 until the warm-up has finished and every required
+stage succeeded. Optional stages (Tesseract, the Azure connection) are
+reported but don't block readiness. WARMUP=0 skips the warm-up, and the
+worker is then ready at once.
+"""
+import os
+import time
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import cv2
+import numpy as np
+from PIL import Image
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .patient_search import patient_index
+
+WARMUP_ENABLED  = os.getenv("WARMUP", "1") != "0"
+DB_CONNECTIONS  = int(os.getenv("WARMUP_DB_CONNECTIONS", "5"))     # ≈ the engine's pool_size
+SAMPLE_DPI      = 100
+ASSETS          = Path(__file__).resolve().parents[2] / "assets"
+OPTIONAL_STAGES = {"tesseract", "azure_connection"}
+
+
+class WarmupState:
+    def __init__(self):
+        self.stages: Dict[str, dict] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        if self.finished_at is None:
+            return False
+        return all(s["ok"] for name, s in self.stages.items() if name not in OPTIONAL_STAGES)
+
+    def stage(self, name: str, fn: Callable, *args, **kw):
+        t0 = time.perf_counter()
+        try:
+            out = fn(*args, **kw)
+            entry = {"ok": True}
+        except Exception as e:
+            logging.warning("Warm-up stage %s failed: %s", name, e)
+            out, entry = None, {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        entry["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        with self._lock:
+            self.stages[name] = entry
+        return out
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = dict(self.stages)
+        total = (self.finished_at or time.monotonic()) - self.started_at if self.started_at else 0.0
+        return {"ready": self.ready, "finished": self.finished_at is not None,
+                "total_ms": round(total * 1000, 1), "stages": stages}
+
+
+warmup_state = WarmupState()
+
+
+# ── Sample document ──
+def make_sample(folder: Path) -> Path:
+    """One A4 page at SAMPLE_DPI: the prescription header on top, a ruled table and a scribble below (PDF)."""
+    w, h   = int(8.27 * SAMPLE_DPI), int(11.69 * SAMPLE_DPI)
+    page   = np.full((h, w), 255, np.uint8)
+    header = cv2.imread(str(ASSETS / "ordonnance_header1.png"), cv2.IMREAD_GRAYSCALE)
+    if header is None:
+        raise FileNotFoundError(ASSETS / "ordonnance_header1.png")
+    header = cv2.resize(header, (w, max(1, int(header.shape[0] * w / header.shape[1]))), interpolation=cv2.INTER_AREA)
+    page[: min(h, header.shape[0])] = header[: h]
+    top = header.shape[0] + 40
+    for i in range(5):
+        cv2.line(page, (40, top + i * 30), (w - 40, top + i * 30), 0, 1)
+    for x in np.linspace(40, w - 40, 9).astype(int):
+        cv2.line(page, (int(x), top), (int(x), top + 120), 0, 1)
+    cv2.polylines(page, [np.array([[w - 260, h - 160], [w - 200, h - 200], [w - 150, h - 150], [w - 90, h - 190]])],
+                  False, 0, 3)
+    out = folder / "warmup_sample.pdf"
+    Image.fromarray(page).save(out, "PDF", resolution=SAMPLE_DPI)
+    return out
+
+
+def stub_result():
+    """A tiny AnalyzeResult-shaped answer with one 8-column item table."""
+    from azure_model.local_ocr import make_result, make_table
+    return make_result({}, [make_table([
+        ["Code PCT", "Produit", "Forme", "Qté", "P.U.V", "Montant", "NIO", "Lot"],
+        ["123456", "DOLIPRANE 1000", "CP", "1", "2.500", "2.500", "", ""],
+        ["Total: 2.500", "", "", "", "", "", "", ""],
+    ])])
+
+
+# ── Stages ──
+def warm_database(engine: Engine, connections: int = DB_CONNECTIONS) -> None:
+    """Open `connections` pooled connections at once, so later requests find them established."""
+    def ping(_):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            time.sleep(0.05)        # hold it so the next ping needs a new connection
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        list(pool.map(ping, range(connections)))
+
+
+def warm_patient_index() -> None:
+    from ..database import SessionLocal
+    with SessionLocal() as db:
+        patient_index.sync(db, force=True)
+
+
+def warm_azure_connection() -> None:
+    """TLS handshake + pooled keep-alive connection to the Document Intelligence endpoint."""
+    from azure.core.rest import HttpRequest
+    from azure_model import pipeline
+    # any answer (even 404) leaves an open connection in the client's transport
+    pipeline.client.send_request(HttpRequest("GET", "/documentintelligence/info"))
+
+
+def run_warmup(engine: Engine, registry, state: WarmupState = warmup_state) -> WarmupState:
+    from azure_model import pipeline
+    from azure_model.azure_stub import StubDocumentIntelligenceClient
+    from azure_model.pages import first_page
+    from azure_model.prescription_cropper import HEADER_FRAC, crop_signature_from_page, ocr_text
+    from azure_model.scheduler import analyze
+
+    state.started_at = time.monotonic()
+    logging.info("▷ warm-up started")
+    with tempfile.TemporaryDirectory(prefix="warmup_") as tmp:
+        sample = state.stage("sample", make_sample, Path(tmp))
+        if sample is not None:
+            gray = state.stage("poppler", first_page, sample)
+            if gray is not None:
+                state.stage("templates", registry.score, gray)
+                state.stage("classify_form", pipeline.classify_form_pages, sample, registry=registry)
+                state.stage("signature_crop", crop_signature_from_page, gray)
+                state.stage("tesseract", ocr_text, gray[: int(gray.shape[0] * HEADER_FRAC)])
+
+    stub = StubDocumentIntelligenceClient(result_factory=stub_result)
+    result = state.stage("azure_stub", analyze, stub, "ordonnance", None)
+    if result is not None:
+        state.stage("prescription_from_result", pipeline.prescription_from_result, result)
+        state.stage("bulletin_from_result", pipeline.bulletin_from_result, result)
+    state.stage("azure_connection", warm_azure_connection)
+
+    state.stage("database", warm_database, engine)
+    state.stage("patient_index", warm_patient_index)
+
+    state.finished_at = time.monotonic()
+    logging.info("▷ warm-up done in %.0f ms (ready=%s)", (state.finished_at - state.started_at) * 1000, state.ready)
+    return state
+
+
+def skip_warmup(state: WarmupState = warmup_state) -> None:
+    state.started_at = state.finished_at = time.monotonic()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Response serialization benchmark for GET /patients/{first}/{last}.
+
+Builds one synthetic patient with N documents (transient ORM objects, no
+database needed) and times the serialization paths:
+
+    jsonable_encoder   validate → jsonable_encoder → json.dumps   (pre-v2 FastAPI)
+    fastapi_default    validate → dump_python(mode="json") → json.dumps (FastAPI today)
+    model_dump_json    validate → pydantic-core JSON bytes (backend.services.responses)
+
+    python -m benchmarks.bench_serialization                 # 500 documents
+    python -m benchmarks.bench_serialization -n 2000 --repeat 20 --json out.json
+
+All paths are checked to produce the same JSON before being timed.
+"""
+import json
+import time
+import random
+import argparse
+import statistics
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend import models, schemas
+from backend.services.responses import adapter, dump_json
+
+FIRST  = ["Mohamed", "Amira", "Sami", "Leila", "Karim", "Nour", "Youssef", "Ines"]
+LAST   = ["Ben Ali", "Trabelsi", "Gharbi", "Jlassi", "Hammami", "Mejri", "Chaabane"]
+CITIES = ["Sfax", "Tunis", "Sousse", "Gabes", "Monastir"]
+FORMS  = ["CP", "GEL", "SIROP", "SACH", "AMP", "POMM"]
+BULLETIN_TABLES = ["consultationsDentaires", "prothesesDentaires", "consultationsVisites", "actesMedicaux",
+                   "actesParamed", "biologie", "hospitalisation", "pharmacie"]
+
+
+def _row(rng: random.Random) -> dict:
+    return {
+        "date":        f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2024",
+        "codePs":      str(rng.randint(10000, 99999)),
+        "designation": f"{rng.choice(['Consultation', 'Radio', 'Bilan', 'Soins'])} {rng.randint(1, 99)}",
+        "honoraires":  f"{rng.uniform(5, 400):.3f}",
+        "montant":     f"{rng.uniform(5, 400):.3f}",
+        "forfait":     f"{rng.uniform(50, 900):.3f}",
+    }
+
+
+def synthetic_patient(n_docs: int = 500, bulletin_share: float = 0.6, rows: int = 6, seed: int = 0) -> models.Patient:
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    first, last = rng.choice(FIRST), rng.choice(LAST)
+    patient = models.Patient(id=1, first_name=first, last_name=last, created_at=now, updated_at=now)
+
+    for i in range(1, n_docs + 1):
+        ts = now - timedelta(days=i)
+        if rng.random() < bulletin_share:
+            b = models.Bulletin(
+                id=i, patient_id=1, created_at=ts, updated_at=ts,
+                prenom=first, nom=last, adresse=f"{rng.randint(1, 99)} Rue {rng.choice(CITIES)}",
+                codePostal=str(rng.randint(1000, 9999)), identifiantUnique=str(rng.randint(10**9, 10**10)),
+                assureSocial=True, cnss=True, conjoint=False, enfant=False, ascendant=False,
+                cnrps=False, convbi=False, apci=False, mo=False, hosp=False, grossesse=False,
+            )
+            for table in BULLETIN_TABLES:
+                setattr(b, table, [_row(rng) for _ in range(rng.randint(0, rows))])
+            patient.bulletins.append(b)
+        else:
+            patient.prescriptions.append(models.Prescription(
+                id=i, patient_id=1, created_at=ts, updated_at=ts,
+                pharmacyName=f"Pharmacie {rng.choice(LAST)}", pharmacyAddress=None, pharmacyContact=None,
+                pharmacyFiscalId=None, beneficiaryId=str(rng.randint(10**9, 10**10)),
+                patientIdentity=f"{first} {last}", prescriberCode=None, prescriptionDate=ts.strftime("%d/%m/%Y"),
+                regimen=None, dispensationDate=None, executor=None, pharmacistCnamRef=None,
+                total=f"{rng.uniform(5, 300):.3f}", totalInWords="",
+                items=[{"codePCT": str(rng.randint(100000, 999999)), "produit": f"MED {rng.randint(1, 500)}",
+                        "forme": rng.choice(FORMS), "qte": str(rng.randint(1, 4)),
+                        "puv": f"{rng.uniform(1, 80):.3f}", "montantPercu": f"{rng.uniform(1, 200):.3f}",
+                        "nio": "", "prLot": ""} for _ in range(rng.randint(1, rows))],
+            ))
+    return patient
+
+
+def path_jsonable_encoder(obj) -> bytes:
+    model = schemas.PatientWithDocs.model_validate(obj, from_attributes=True)
+    return JSONResponse(jsonable_encoder(model)).body
+
+
+def path_fastapi_default(obj) -> bytes:
+    ta = adapter(schemas.PatientWithDocs)
+    value = ta.validate_python(obj, from_attributes=True)
+    return JSONResponse(ta.dump_python(value, mode="json", by_alias=True)).body
+
+
+def path_model_dump_json(obj) -> bytes:
+    return dump_json(schemas.PatientWithDocs, obj)
+
+
+PATHS = {
+    "jsonable_encoder": path_jsonable_encoder,
+    "fastapi_default":  path_fastapi_default,
+    "model_dump_json":  path_model_dump_json,
+}
+
+
+def run(n_docs: int, repeat: int, seed: int) -> dict:
+    patient = synthetic_patient(n_docs, seed=seed)
+
+    bodies = {name: fn(patient) for name, fn in PATHS.items()}        # also warms the adapters
+    reference = json.loads(bodies["fastapi_default"])
+    for name, body in bodies.items():
+        if json.loads(body) != reference:
+            raise SystemExit(f"{name} produced a different payload than fastapi_default")
+
+    report = {"documents": n_docs, "bulletins": len(patient.bulletins),
+              "prescriptions": len(patient.prescriptions), "bytes": len(bodies["model_dump_json"]), "paths": {}}
+    for name, fn in PATHS.items():
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn(patient)
+            times.append((time.perf_counter() - t0) * 1000)
+        report["paths"][name] = {"mean_ms": round(statistics.fmean(times), 2),
+                                 "p50_ms":  round(statistics.median(times), 2),
+                                 "min_ms":  round(min(times), 2)}
+    return report
+
+
+def main():
+    p = argparse.ArgumentParser(description="Time response serialization of a large patient payload.")
+    p.add_argument("-n", "--documents", type=int, default=500)
+    p.add_argument("--repeat", type=int, default=10)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = p.parse_args()
+
+    report = run(args.documents, args.repeat, args.seed)
+    print(f"{report['documents']} documents ({report['bulletins']} bulletins, "
+          f"{report['prescriptions']} prescriptions), {report['bytes'] / 1024:.0f} KiB of JSON")
+    base = report["paths"]["fastapi_default"]["p50_ms"]
+    print(f"{'path':18s} {'mean':>9s} {'p50':>9s} {'min':>9s}  (ms)")
+    for name, s in report["paths"].items():
+        print(f"{name:18s} {s['mean_ms']:9.2f} {s['p50_ms']:9.2f} {s['min_ms']:9.2f}  x{base / s['p50_ms']:.2f}")
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
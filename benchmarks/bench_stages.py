@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Per-stage micro-benchmarks on a synthetic (or real) corpus.
+
+    python -m benchmarks.bench_stages --generate 20 --json bench.json
+    python -m benchmarks.bench_stages out/corpus --repeat 3 --json bench.json
+    python -m benchmarks.bench_stages out/corpus --compare baseline.json --tolerance 0.25
+
+Stages timed per document:
+
+  load_all_pages            render / read every page
+  classify_form             template-registry classification
+  classify_form_cached      same, behind the header-hash cache (hits are checked against ORB afterwards)
+  crop_signature_from_page  local signature crop on page 1
+  verify_signature          crop vs. the doctor's genuine samples
+  correct_medication_name   fuzzy match of (typo'd) item names against liste_amm
+  table_grid                ruled-table detection used by the local OCR fallback
+  bulletin_from_result      field/table mapping of an AnalyzeResult-shaped object
+  prescription_from_result  (built from the manifest ground truth, no Azure call)
+
+Azure is never called. The JSON output carries the git commit and library
+versions so runs from different commits can be diffed with --compare.
+"""
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import argparse
+import subprocess
+from pathlib import Path
+from statistics import mean, median
+from typing import Callable, Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from benchmarks.synth import ASSETS, BASE, generate_corpus, load_manifest
+
+
+def import_pipeline():
+    """Import the pipeline without contacting Azure at import time."""
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.environ.setdefault("AZURE_LIST_MODELS", "0")
+    # signature_pipeline exits when these are unset; none of the timed stages use its client
+    os.environ.setdefault("DOCUMENT_INTELLIGENCE_ENDPOINT", "https://localhost.invalid")
+    os.environ.setdefault("DOCUMENT_INTELLIGENCE_API_KEY", "offline")
+    os.environ.setdefault("SIGNATURE_MODEL_ID", "offline")
+    from azure_model import pipeline, signature_pipeline, prescription_cropper, local_ocr
+    return pipeline, signature_pipeline, prescription_cropper, local_ocr
+
+
+# ─── Ground truth → AnalyzeResult-shaped objects ─────────────────────────────
+
+def field(value: str) -> Dict:
+    return {"valueString": value, "content": value, "confidence": 1.0}
+
+
+def result_from_truth(doc: Dict, local_ocr):
+    fields = {k: field(v) for k, v in doc["fields"].items()}
+    if doc["kind"] == "bulletin_de_soin":
+        tables = [local_ocr.make_table([[""]]) for _ in range(8)]
+        tables[2] = local_ocr.make_table(doc["rows"])       # consultations / visites
+    else:
+        tables = [local_ocr.make_table(doc["rows"])]
+    return local_ocr.make_result(fields, tables)
+
+
+def typo(word: str, rng: random.Random) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    return word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+# ─── Timing ──────────────────────────────────────────────────────────────────
+
+def timed(samples: Dict[str, List[float]], stage: str, fn: Callable, *args, repeat: int = 1, **kw):
+    out = None
+    for _ in range(repeat):
+        t0  = time.perf_counter()
+        out = fn(*args, **kw)
+        samples.setdefault(stage, []).append(time.perf_counter() - t0)
+    return out
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def summarize(values: List[float]) -> Dict:
+    return {
+        "n":       len(values),
+        "mean_ms": round(mean(values) * 1000, 3),
+        "p50_ms":  round(median(values) * 1000, 3),
+        "p95_ms":  round(percentile(values, 95) * 1000, 3),
+        "min_ms":  round(min(values) * 1000, 3),
+        "max_ms":  round(max(values) * 1000, 3),
+        "total_s": round(sum(values), 4),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+# ─── Runner ──────────────────────────────────────────────────────────────────
+
+def run(corpus: Path, manifest: Dict, stages: Optional[List[str]], repeat: int, seed: int) -> Dict:
+    pipeline, signature_pipeline, prescription_cropper, local_ocr = import_pipeline()
+    from azure_model.templates import TemplateRegistry
+
+    want = (lambda s: stages is None or s in stages)
+    rng  = random.Random(seed)
+    samples: Dict[str, List[float]] = {}
+    quality = {"classified": 0, "classified_ok": 0, "verified": 0, "verified_genuine": 0,
+               "meds": 0, "meds_matched": 0, "cache_hits": 0, "cache_false_hits": 0}
+
+    from azure_model.form_cache import FormCache
+    registry = timed(samples, "template_registry", TemplateRegistry.from_directory, ASSETS)
+    form_cache = FormCache(verify_rate=0.0)     # in-memory; false hits are counted below, outside the timing
+
+    for doc in manifest["documents"]:
+        path = corpus / doc["file"]
+        pages = timed(samples, "load_all_pages", pipeline.load_all_pages, path, repeat=repeat) \
+            if want("load_all_pages") else pipeline.load_all_pages(path)
+        gray = cv2.cvtColor(pages[0], cv2.COLOR_BGR2GRAY)
+
+        if want("classify_form"):
+            label = timed(samples, "classify_form", pipeline.classify_form, path, registry=registry, repeat=repeat)
+            quality["classified"]    += 1
+            quality["classified_ok"] += int(label == doc["kind"])
+
+        if want("classify_form_cached"):
+            # one timed call per document: repeats would only measure the cache's own hits
+            hits = form_cache.entries.hits
+            cached_label = timed(samples, "classify_form_cached", pipeline.classify_form, path,
+                                 registry=registry, cache=form_cache)
+            if form_cache.entries.hits > hits:
+                orb_label = label if want("classify_form") else pipeline.classify_form(path, registry=registry)
+                quality["cache_hits"]       += 1
+                quality["cache_false_hits"] += int(cached_label != orb_label)
+
+        crop = None
+        if want("crop_signature_from_page") or want("verify_signature"):
+            crop = timed(samples, "crop_signature_from_page", prescription_cropper.crop_signature_from_page,
+                         gray, repeat=repeat)
+
+        if want("verify_signature") and crop is not None and crop.size:
+            res = timed(samples, "verify_signature", signature_pipeline.verify_signature,
+                        crop, str(corpus / doc["genuine"]), repeat=repeat)
+            quality["verified"]         += 1
+            quality["verified_genuine"] += int(bool(res["genuine"]))
+
+        if want("table_grid"):
+            timed(samples, "table_grid", local_ocr.find_table_columns, gray, repeat=repeat)
+
+        result = result_from_truth(doc, local_ocr)
+        if doc["kind"] == "bulletin_de_soin":
+            if want("bulletin_from_result"):
+                timed(samples, "bulletin_from_result", pipeline.bulletin_from_result, result, repeat=repeat)
+        else:
+            if want("prescription_from_result"):
+                timed(samples, "prescription_from_result", pipeline.prescription_from_result, result, repeat=repeat)
+            if want("correct_medication_name"):
+                for row in doc["rows"][1:-1]:
+                    match, _ = timed(samples, "correct_medication_name", pipeline.correct_medication_name,
+                                     typo(row[1], rng), repeat=repeat)
+                    quality["meds"]         += 1
+                    quality["meds_matched"] += int(bool(match) and str(match.get("Nom")) == row[1])
+
+    accuracy = {}
+    if quality["classified"]:
+        accuracy["classify_form"] = round(quality["classified_ok"] / quality["classified"], 4)
+    if quality["verified"]:
+        accuracy["verify_signature_genuine_rate"] = round(quality["verified_genuine"] / quality["verified"], 4)
+    if quality["meds"]:
+        accuracy["correct_medication_name"] = round(quality["meds_matched"] / quality["meds"], 4)
+    if want("classify_form_cached"):
+        accuracy["form_cache_hit_rate"] = round(form_cache.stats()["hit_rate"], 4)
+        if quality["cache_hits"]:
+            accuracy["form_cache_false_hit_rate"] = round(quality["cache_false_hits"] / quality["cache_hits"], 4)
+
+    return {
+        "meta": {
+            "commit":    git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python":    platform.python_version(),
+            "platform":  platform.platform(),
+            "opencv":    cv2.__version__,
+            "numpy":     np.__version__,
+            "cpus":      os.cpu_count(),
+            "repeat":    repeat,
+            "corpus":    str(corpus),
+            "config":    manifest.get("config", {}),
+        },
+        "stages":   {stage: summarize(v) for stage, v in samples.items()},
+        "accuracy": accuracy,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Stages whose p50 got slower than baseline by more than `tolerance` (fraction)."""
+    regressions = []
+    print(f"\n{'stage':28s} {'base p50':>10s} {'now p50':>10s} {'delta':>8s}")
+    for stage, now in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or not base["p50_ms"]:
+            continue
+        delta = (now["p50_ms"] - base["p50_ms"]) / base["p50_ms"]
+        flag  = "  ⚠" if delta > tolerance else ""
+        print(f"{stage:28s} {base['p50_ms']:10.2f} {now['p50_ms']:10.2f} {delta * 100:+7.1f}%{flag}")
+        if delta > tolerance:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    p = argparse.ArgumentParser(description="Time each pipeline stage on a document corpus.")
+    p.add_argument("corpus", type=Path, nargs="?", help="folder with manifest.json (see benchmarks.synth)")
+    p.add_argument("--generate", type=int, metavar="N", help="render N synthetic documents first")
+    p.add_argument("--dpi", type=int, default=200, help="DPI for --generate")
+    p.add_argument("--noise", type=float, default=6.0, help="noise sigma for --generate")
+    p.add_argument("--skew", type=float, default=1.5, help="max skew (degrees) for --generate")
+    p.add_argument("--stages", nargs="+", help="only run these stages")
+    p.add_argument("--repeat", type=int, default=1, help="timed runs per document and stage")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--json", type=Path, help="write machine-readable results here")
+    p.add_argument("--compare", type=Path, help="baseline JSON from an earlier run")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed p50 slowdown vs. baseline")
+    args = p.parse_args()
+
+    corpus = args.corpus
+    if args.generate:
+        corpus = corpus or Path(tempfile.mkdtemp(prefix="synth_corpus_"))
+        generate_corpus(corpus, args.generate, dpi=args.dpi, noise=args.noise, skew=args.skew, seed=args.seed)
+    if corpus is None:
+        p.error("give a corpus folder or --generate N")
+    manifest = load_manifest(corpus)
+    if manifest is None:
+        p.error(f"{corpus} has no manifest.json – create it with `python -m benchmarks.synth {corpus}`")
+
+    report = run(corpus, manifest, args.stages, args.repeat, args.seed)
+
+    print(f"{'stage':28s} {'n':>5s} {'mean':>9s} {'p50':>9s} {'p95':>9s}  (ms)")
+    for stage, s in report["stages"].items():
+        print(f"{stage:28s} {s['n']:5d} {s['mean_ms']:9.2f} {s['p50_ms']:9.2f} {s['p95_ms']:9.2f}")
+    if report["accuracy"]:
+        print("accuracy", json.dumps(report["accuracy"]))
+
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2))
+
+    if args.compare:
+        regressions = compare(report, json.loads(args.compare.read_text()), args.tolerance)
+        if regressions:
+            print(f"\nRegressed beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Upload-size benchmark for azure_model.upload_normalizer.
+
+    python -m benchmarks.bench_upload_size bulletins/            # size + local cost only
+    python -m benchmarks.bench_upload_size bulletins/ --azure    # also time Azure round trips
+    python -m benchmarks.bench_upload_size bulletins/ --json out.json
+
+Identical files (same SHA-256) are benchmarked once.
+"""
+import sys
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+
+from azure_model.upload_normalizer import normalize_for_upload, JPEG_QUALITY, TARGET_DPI, MAX_PIXELS
+
+EXTS = {".pdf", ".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
+
+def unique_inputs(root: Path):
+    seen = set()
+    files = [root] if root.is_file() else sorted(p for p in root.rglob("*") if p.suffix.lower() in EXTS)
+    for p in files:
+        digest = hashlib.sha256(p.read_bytes()).hexdigest()
+        if digest not in seen:
+            seen.add(digest)
+            yield p
+
+
+def time_azure(path: Path, model_id: str) -> float:
+    from azure_model.pipeline import analyze_document
+    t0 = time.perf_counter()
+    analyze_document(path, model_id=model_id, pages=None, normalize=False)
+    return time.perf_counter() - t0
+
+
+def main():
+    p = argparse.ArgumentParser(description="Bytes saved / latency change of the upload normalizer.")
+    p.add_argument("input", type=Path, help="file or folder of scans (e.g. bulletins/)")
+    p.add_argument("--dpi", type=int, default=TARGET_DPI)
+    p.add_argument("--max-pixels", type=int, default=MAX_PIXELS)
+    p.add_argument("--quality", type=int, default=None, help=f"JPEG quality (default: JPEG_QUALITY, {JPEG_QUALITY}; the smaller of JPEG / PNG is kept)")
+    p.add_argument("--azure", action="store_true", help="also time Azure analysis before/after")
+    p.add_argument("--model-id", default="ordonnance")
+    p.add_argument("--json", type=Path, help="write machine-readable results here")
+    args = p.parse_args()
+
+    rows = []
+    for src in unique_inputs(args.input):
+        t0 = time.perf_counter()
+        out, _ = normalize_for_upload(src, target_dpi=args.dpi, max_pixels=args.max_pixels, quality=args.quality)
+        norm_s = time.perf_counter() - t0
+        row = {
+            "file":        str(src),
+            "bytes_in":    src.stat().st_size,
+            "bytes_out":   out.stat().st_size,
+            "normalize_s": round(norm_s, 4),
+        }
+        row["saved_pct"] = round(100.0 * (row["bytes_in"] - row["bytes_out"]) / row["bytes_in"], 1)
+        if args.azure:
+            row["azure_orig_s"] = round(time_azure(src, args.model_id), 3)
+            row["azure_norm_s"] = round(time_azure(out, args.model_id), 3)
+            row["latency_delta_s"] = round(row["azure_norm_s"] + norm_s - row["azure_orig_s"], 3)
+        if out != src:
+            out.unlink(missing_ok=True)
+        rows.append(row)
+        print(f"{Path(row['file']).name[:50]:50s} {row['bytes_in']:>10,d} → {row['bytes_out']:>10,d} B "
+              f"({row['saved_pct']:5.1f}% saved, {norm_s*1000:7.1f} ms)"
+              + (f"  azure {row['azure_orig_s']:.2f}s → {row['azure_norm_s']:.2f}s" if args.azure else ""))
+
+    if not rows:
+        print("No input files found.")
+        sys.exit(1)
+
+    total_in  = sum(r["bytes_in"] for r in rows)
+    total_out = sum(r["bytes_out"] for r in rows)
+    summary = {
+        "files":       len(rows),
+        "bytes_in":    total_in,
+        "bytes_out":   total_out,
+        "saved_pct":   round(100.0 * (total_in - total_out) / total_in, 1),
+        "normalize_s": round(sum(r["normalize_s"] for r in rows), 4),
+    }
+    if args.azure:
+        summary["latency_delta_s"] = round(sum(r["latency_delta_s"] for r in rows), 3)
+    print("TOTAL", json.dumps(summary))
+
+    if args.json:
+        args.json.write_text(json.dumps({"config": {"dpi": args.dpi, "max_pixels": args.max_pixels,
+                                                    "quality": args.quality},
+                                         "summary": summary, "files": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Synthetic bulletin / prescription corpus for benchmarks.
+
+Pages are rendered from the header templates in ``assets/``: header on top,
+typed fields, a ruled item table, a handwriting-like signature and (optionally)
+a pharmacy stamp, then degraded with configurable skew, noise and DPI.
+
+    python -m benchmarks.synth out/corpus -n 40 --dpi 200 --noise 8 --skew 2
+    python -m benchmarks.synth out/corpus -n 10 --kinds prescription --format pdf
+
+Every run writes ``manifest.json`` with the ground truth of each document
+(kind, fields, table rows, signature box) and one genuine signature sample per
+doctor under ``genuine/<doctor>/`` for the verification benchmark.
+"""
+import json
+import random
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+BASE   = Path(__file__).resolve().parent.parent
+ASSETS = BASE / "assets"
+
+A4_INCHES = (8.27, 11.69)
+HEADERS   = {
+    "bulletin_de_soin": "bulletin_de_soin_header1.png",
+    "prescription":     "ordonnance_header1.png",
+}
+
+DOCTORS    = ["Dr Samir Dhouib", "Dr Fathi Barraj", "Dr Hasna Zakhama", "Dr Mohamed Ezzine",
+              "Dr Wissal Abbes", "Dr Mondher Hasnaoui"]
+FIRST      = ["Mohamed", "Amira", "Sami", "Leila", "Karim", "Nour", "Youssef", "Ines"]
+LAST       = ["Ben Ali", "Trabelsi", "Gharbi", "Jlassi", "Hammami", "Mejri", "Chaabane"]
+CITIES     = ["Sfax", "Tunis", "Sousse", "Gabes", "Monastir"]
+FORMS      = ["CP", "GEL", "SIROP", "SACH", "AMP", "POMM"]
+# used when azure_model/liste_amm.xls cannot be read
+FALLBACK_MEDS = ["DOLIPRANE", "AUGMENTIN", "CLAMOXYL", "SPASFON", "VOLTARENE", "GLUCOPHAGE",
+                 "LEVOTHYROX", "INEXIUM", "XYZALL", "EFFERALGAN", "SMECTA", "MAXILASE"]
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def medication_names(limit: int = 500) -> List[str]:
+    try:
+        import pandas as pd
+        names = pd.read_excel(BASE / "azure_model" / "liste_amm.xls")["Nom"].dropna().astype(str)
+        return sorted(set(names))[:limit] or FALLBACK_MEDS
+    except Exception:
+        return FALLBACK_MEDS
+
+
+# ─── Drawing helpers ─────────────────────────────────────────────────────────
+
+def put_text(img: np.ndarray, text: str, x: int, y: int, scale: float, thickness: int = 1) -> None:
+    cv2.putText(img, text, (x, y), FONT, scale, 0, max(1, thickness), cv2.LINE_AA)
+
+
+def draw_table(img: np.ndarray, rows: List[List[str]], x0: int, y0: int, width: int,
+               row_h: int, scale: float) -> Tuple[int, int, int, int]:
+    n_cols = max(len(r) for r in rows)
+    col_w  = width // n_cols
+    height = row_h * len(rows)
+    for r in range(len(rows) + 1):
+        cv2.line(img, (x0, y0 + r * row_h), (x0 + col_w * n_cols, y0 + r * row_h), 0, 2)
+    for c in range(n_cols + 1):
+        cv2.line(img, (x0 + c * col_w, y0), (x0 + c * col_w, y0 + height), 0, 2)
+    for r, row in enumerate(rows):
+        for c, val in enumerate(row):
+            put_text(img, val[:14], x0 + c * col_w + 6, y0 + r * row_h + int(row_h * 0.7), scale * 0.8)
+    return x0, y0, col_w * n_cols, height
+
+
+def signature_strokes(rng: random.Random, w: int, h: int) -> List[np.ndarray]:
+    """A few smooth, looping polylines – enough ink and curvature to look handwritten."""
+    strokes = []
+    for _ in range(rng.randint(1, 3)):
+        n  = rng.randint(4, 8)
+        xs = np.sort(np.array([rng.uniform(0, w) for _ in range(n)]))
+        ys = np.array([rng.uniform(0.15 * h, 0.85 * h) for _ in range(n)])
+        t  = np.linspace(0, 1, 120)
+        px = np.interp(t, np.linspace(0, 1, n), xs)
+        py = np.interp(t, np.linspace(0, 1, n), ys)
+        py = py + np.sin(t * rng.uniform(6, 18)) * h * rng.uniform(0.08, 0.2)
+        strokes.append(np.stack([px, py], axis=1).astype(np.int32))
+    return strokes
+
+
+def draw_signature(img: np.ndarray, strokes: List[np.ndarray], x: int, y: int, thickness: int) -> None:
+    for s in strokes:
+        cv2.polylines(img, [s + np.array([x, y])], False, 0, thickness, cv2.LINE_AA)
+
+
+def render_signature(strokes: List[np.ndarray], w: int, h: int, thickness: int) -> np.ndarray:
+    canvas = np.full((h, w), 255, np.uint8)
+    draw_signature(canvas, strokes, 0, 0, thickness)
+    return canvas
+
+
+def draw_stamp(img: np.ndarray, cx: int, cy: int, r: int, text: str, scale: float) -> None:
+    cv2.circle(img, (cx, cy), r, 60, 3, cv2.LINE_AA)
+    cv2.circle(img, (cx, cy), int(r * 0.8), 60, 2, cv2.LINE_AA)
+    (tw, _), _ = cv2.getTextSize(text, FONT, scale, 1)
+    cv2.putText(img, text, (cx - tw // 2, cy), FONT, scale, 60, 1, cv2.LINE_AA)
+
+
+# ─── Degradation ─────────────────────────────────────────────────────────────
+
+def degrade(img: np.ndarray, rng: random.Random, skew: float, noise: float, speckle: float) -> np.ndarray:
+    if skew:
+        angle = rng.uniform(-skew, skew)
+        h, w  = img.shape
+        M     = cv2.getRotationMatrix2D((w / 2, h / 2), angle, 1.0)
+        img   = cv2.warpAffine(img, M, (w, h), flags=cv2.INTER_LINEAR, borderValue=255)
+    if noise:
+        nrng = np.random.default_rng(rng.randrange(2**32))
+        img  = np.clip(img.astype(np.float32) + nrng.normal(0, noise, img.shape), 0, 255).astype(np.uint8)
+    if speckle:
+        nrng = np.random.default_rng(rng.randrange(2**32))
+        mask = nrng.random(img.shape)
+        img[mask < speckle / 2] = 0
+        img[mask > 1 - speckle / 2] = 255
+    return img
+
+
+# ─── Documents ───────────────────────────────────────────────────────────────
+
+def blank_page(dpi: int) -> np.ndarray:
+    return np.full((int(A4_INCHES[1] * dpi), int(A4_INCHES[0] * dpi)), 255, np.uint8)
+
+
+def paste_header(page: np.ndarray, kind: str) -> int:
+    hdr = cv2.imread(str(ASSETS / HEADERS[kind]), cv2.IMREAD_GRAYSCALE)
+    if hdr is None:
+        raise FileNotFoundError(f"Missing header template {HEADERS[kind]} in {ASSETS}")
+    w     = page.shape[1]
+    h     = int(hdr.shape[0] * w / hdr.shape[1])
+    page[0:h, :] = cv2.resize(hdr, (w, h), interpolation=cv2.INTER_AREA)
+    return h
+
+
+def make_document(kind: str, rng: random.Random, meds: List[str], dpi: int, stamp: bool) -> Tuple[np.ndarray, Dict]:
+    page  = blank_page(dpi)
+    w     = page.shape[1]
+    unit  = dpi / 100.0          # layout scales with DPI
+    scale = 0.45 * unit
+    y     = paste_header(page, kind) + int(40 * unit)
+    x0    = int(60 * unit)
+
+    patient = {"prenom": rng.choice(FIRST), "nom": rng.choice(LAST)}
+    fields  = {"id_unique": f"{rng.randint(10, 99)}{rng.randint(100000, 999999)}{rng.randint(10, 99)}"}
+    doctor  = rng.choice(DOCTORS)
+
+    if kind == "bulletin_de_soin":
+        fields.update({
+            "prenom_assure":         patient["prenom"],
+            "nom_assure":            patient["nom"],
+            "adresse_assure":        f"{rng.randint(1, 120)} Rue {rng.choice(LAST)} {rng.choice(CITIES)}",
+            "code_postal":           str(rng.randint(1000, 9999)),
+            "date_naissance_malade": f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(1940, 2020)}",
+        })
+        labels = [("Identifiant unique", "id_unique"), ("Prenom", "prenom_assure"), ("Nom", "nom_assure"),
+                  ("Adresse", "adresse_assure"), ("Code postal", "code_postal"),
+                  ("Date de naissance", "date_naissance_malade")]
+        rows = [["Date", "Designation", "Honoraires", "Code PS", "Signature"]]
+        rows += [[f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}", rng.choice(["C", "V", "CS", "K10"]),
+                  f"{rng.randint(10, 90)}.000", str(rng.randint(1000, 9999)), ""] for _ in range(rng.randint(1, 4))]
+    else:
+        fields.update({
+            "nom_prenom":         f"{patient['nom']} {patient['prenom']}",
+            "code_apci":          str(rng.randint(100000, 999999)),
+            "date":               f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025",
+            "nom_prenom_docteur": doctor,
+        })
+        labels = [("Docteur", "nom_prenom_docteur"), ("Beneficiaire", "id_unique"),
+                  ("Identite du malade", "nom_prenom"), ("Prescripteur", "code_apci"),
+                  ("Date de la prescription", "date")]
+        rows = [["Code PCT", "Produit", "Forme", "Qte", "PUV", "Montant", "NIO", "Lot"]]
+        for _ in range(rng.randint(1, 6)):
+            rows.append([str(rng.randint(100000, 999999)), rng.choice(meds), rng.choice(FORMS),
+                         str(rng.randint(1, 3)), f"{rng.uniform(1, 40):.3f}", f"{rng.uniform(1, 80):.3f}",
+                         str(rng.randint(1, 9)), f"L{rng.randint(1000, 9999)}"])
+        rows.append(["Total TTC", "", "", "", "", f"{rng.uniform(5, 200):.3f}", "", ""])
+
+    for label, key in labels:
+        put_text(page, f"{label} : {fields[key]}", x0, y, scale, max(1, int(unit)))
+        y += int(32 * unit)
+
+    y += int(20 * unit)
+    table_box = draw_table(page, rows, x0, y, w - 2 * x0, int(34 * unit), scale)
+    y = table_box[1] + table_box[3] + int(60 * unit)
+
+    sig_w, sig_h = int(260 * unit), int(90 * unit)
+    sig_x        = w - x0 - sig_w
+    sig_y        = min(y, page.shape[0] - sig_h - int(40 * unit))
+    strokes      = signature_strokes(random.Random(doctor), sig_w, sig_h)   # same doctor → same signature
+    thickness    = max(2, int(2 * unit))
+    draw_signature(page, strokes, sig_x, sig_y, thickness)
+    if stamp:
+        r = int(70 * unit)
+        draw_stamp(page, x0 + r + int(20 * unit), sig_y + sig_h // 2, r, "PHARMACIE", scale * 0.9)
+
+    truth = {
+        "kind":      kind,
+        "doctor":    doctor,
+        "fields":    fields,
+        "rows":      rows,
+        "signature": [sig_x, sig_y, sig_w, sig_h],
+        "_strokes":  strokes,
+        "_thick":    thickness,
+    }
+    return page, truth
+
+
+def save_page(page: np.ndarray, path: Path, dpi: int) -> None:
+    if path.suffix == ".pdf":
+        Image.fromarray(page).convert("RGB").save(str(path), "PDF", resolution=dpi)
+    else:
+        cv2.imwrite(str(path), page)
+
+
+def generate_corpus(
+    out: Path,
+    n: int = 20,
+    kinds: Tuple[str, ...] = ("bulletin_de_soin", "prescription"),
+    dpi: int = 200,
+    noise: float = 6.0,
+    speckle: float = 0.0,
+    skew: float = 1.5,
+    stamp_rate: float = 0.5,
+    fmt: str = "png",
+    seed: int = 0,
+) -> Dict:
+    """Write `n` documents + manifest.json (+ genuine/<doctor>/ samples) to `out`; returns the manifest."""
+    out  = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    rng  = random.Random(seed)
+    meds = medication_names()
+    docs: List[Dict] = []
+    genuine: Dict[str, Path] = {}
+
+    for i in range(n):
+        kind = kinds[i % len(kinds)]
+        page, truth = make_document(kind, rng, meds, dpi, stamp=rng.random() < stamp_rate)
+        page = degrade(page, rng, skew, noise, speckle)
+        path = out / f"{i:04d}_{kind}.{fmt}"
+        save_page(page, path, dpi)
+
+        doctor_dir = out / "genuine" / truth["doctor"].replace(" ", "_")
+        if truth["doctor"] not in genuine:
+            doctor_dir.mkdir(parents=True, exist_ok=True)
+            _, _, sw, sh = truth["signature"]
+            for k in range(2):
+                sample = render_signature(truth["_strokes"], sw, sh, truth["_thick"])
+                sample = degrade(sample, rng, skew=3.0, noise=noise, speckle=0.0)
+                cv2.imwrite(str(doctor_dir / f"sample_{k}.png"), sample)
+            genuine[truth["doctor"]] = doctor_dir
+
+        docs.append({"file": path.name, "genuine": str(doctor_dir.relative_to(out)),
+                     **{k: v for k, v in truth.items() if not k.startswith("_")}})
+
+    manifest = {
+        "config": {"n": n, "kinds": list(kinds), "dpi": dpi, "noise": noise, "speckle": speckle,
+                   "skew": skew, "stamp_rate": stamp_rate, "format": fmt, "seed": seed},
+        "documents": docs,
+    }
+    (out / "manifest.json").write_text(json.dumps(manifest, indent=2, ensure_ascii=False))
+    return manifest
+
+
+def load_manifest(corpus: Path) -> Optional[Dict]:
+    path = Path(corpus) / "manifest.json"
+    return json.loads(path.read_text()) if path.exists() else None
+
+
+def main():
+    p = argparse.ArgumentParser(description="Render a synthetic bulletin/prescription corpus.")
+    p.add_argument("out", type=Path, help="output folder")
+    p.add_argument("-n", type=int, default=20, help="number of documents")
+    p.add_argument("--kinds", nargs="+", default=list(HEADERS), choices=list(HEADERS))
+    p.add_argument("--dpi", type=int, default=200)
+    p.add_argument("--noise", type=float, default=6.0, help="gaussian noise sigma (grey levels)")
+    p.add_argument("--speckle", type=float, default=0.0, help="salt-and-pepper fraction, e.g. 0.002")
+    p.add_argument("--skew", type=float, default=1.5, help="max rotation, degrees")
+    p.add_argument("--stamp-rate", type=float, default=0.5)
+    p.add_argument("--format", choices=["png", "pdf"], default="png")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    manifest = generate_corpus(args.out, args.n, tuple(args.kinds), args.dpi, args.noise, args.speckle,
+                               args.skew, args.stamp_rate, args.format, args.seed)
+    print(f"Wrote {len(manifest['documents'])} document(s) to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# tests/test_hedge.py
+"""Hedge budget timing, with Azure latency injected through the stub client."""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import pytest
+
+from azure_model.azure_stub import StubDocumentIntelligenceClient
+from azure_model.hedge import result_within, submit_started
+from azure_model.scheduler import AzureScheduler
+
+
+def stub_call(sched: AzureScheduler, stub):
+    poller = sched.submit(stub.begin_analyze_document, "ordonnance")
+    return poller.result()
+
+
+@pytest.fixture
+def pool():
+    with ThreadPoolExecutor(max_workers=1) as p:
+        yield p
+
+
+def test_slow_azure_overruns_the_budget(pool):
+    stub = StubDocumentIntelligenceClient(delay=0.5)
+    future, started = submit_started(pool, stub_call, AzureScheduler(tps=1000), stub)
+
+    with pytest.raises(FutureTimeout):
+        result_within(future, started, budget=0.1)
+    assert future.result(timeout=2) is not None      # the Azure answer still arrives late
+
+
+def test_pool_queue_time_is_not_counted(pool):
+    release = threading.Event()
+    pool.submit(release.wait)                         # the only worker is busy
+    stub = StubDocumentIntelligenceClient(delay=0.05)
+    future, started = submit_started(pool, stub_call, AzureScheduler(tps=1000), stub)
+
+    threading.Timer(0.3, release.set).start()         # queued well past the budget
+    assert result_within(future, started, budget=0.2) is not None
+    assert stub.calls == 1
+
+
+def test_cancelled_call_does_not_hang():
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    pool.submit(release.wait)
+    future, started = submit_started(pool, lambda: None)
+    assert future.cancel()
+    assert started.is_set()
+    release.set()
+    pool.shutdown()
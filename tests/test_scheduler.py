@@ -0,0 +1,129 @@
+# tests/test_scheduler.py
+"""AzureScheduler / analyze driven through the local 429-returning stub client."""
+import threading
+import time
+
+import pytest
+
+from azure_model.azure_stub import StubDocumentIntelligenceClient, StubHttpResponseError
+from azure_model.scheduler import BATCH, INTERACTIVE, AzureScheduler, backoff_delay
+
+
+class Sleeps:
+    """Records the scheduler's backoff sleeps instead of waiting them out."""
+
+    def __init__(self):
+        self.delays = []
+
+    def __call__(self, seconds: float) -> None:
+        self.delays.append(seconds)
+
+
+def analyze_with(sched: AzureScheduler, stub, priority: str = INTERACTIVE):
+    return sched.submit(lambda: stub.begin_analyze_document("ordonnance").result(), priority=priority)
+
+
+def test_retry_after_is_honoured():
+    sleeps = Sleeps()
+    sched  = AzureScheduler(tps=1000, max_retries=5, sleep=sleeps)
+    stub   = StubDocumentIntelligenceClient(throttle_first=2, retry_after=0.05)
+
+    assert analyze_with(sched, stub) is not None
+    assert stub.calls == 3
+    assert sleeps.delays == [0.05, 0.05]
+    lane = sched.stats()["lanes"][INTERACTIVE]
+    assert (lane["retries"], lane["throttled"], lane["completed"]) == (2, 2, 1)
+
+
+def test_429_pauses_the_shared_bucket():
+    sched = AzureScheduler(tps=1000, sleep=lambda s: None)
+    stub  = StubDocumentIntelligenceClient(throttle_first=1, retry_after=0.2)
+
+    t0 = time.monotonic()
+    analyze_with(sched, stub)
+    # the retry had to wait for the bucket, not just for this caller's (skipped) sleep
+    assert time.monotonic() - t0 >= 0.15
+
+
+def test_jittered_backoff_without_retry_after():
+    sleeps = Sleeps()
+    sched  = AzureScheduler(tps=1000, max_retries=4, backoff_base=0.01, backoff_cap=1.0, sleep=sleeps)
+    stub   = StubDocumentIntelligenceClient(throttle_first=4, retry_after=None)
+
+    analyze_with(sched, stub)
+    assert len(sleeps.delays) == 4
+    for attempt, delay in enumerate(sleeps.delays):
+        assert 0.0 <= delay <= 0.01 * 2 ** attempt
+
+
+def test_backoff_delay_is_capped():
+    assert all(0.0 <= backoff_delay(20, base=0.5, cap=3.0) <= 3.0 for _ in range(100))
+
+
+def test_gives_up_after_max_retries():
+    sched = AzureScheduler(tps=1000, max_retries=2, sleep=lambda s: None)
+    stub  = StubDocumentIntelligenceClient(fail_with=503)
+
+    with pytest.raises(StubHttpResponseError):
+        analyze_with(sched, stub)
+    assert stub.calls == 3
+    assert sched.stats()["lanes"][INTERACTIVE]["failed"] == 1
+
+
+def test_non_retryable_status_is_raised_at_once():
+    sched = AzureScheduler(tps=1000, sleep=lambda s: None)
+    stub  = StubDocumentIntelligenceClient(fail_with=400)
+
+    with pytest.raises(StubHttpResponseError):
+        analyze_with(sched, stub)
+    assert stub.calls == 1
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def test_interactive_lane_jumps_ahead_of_batch():
+    sched   = AzureScheduler(tps=1000, max_inflight=1)
+    release = threading.Event()
+    order   = []
+
+    blocker = threading.Thread(target=sched.submit, args=(release.wait,))
+    blocker.start()
+    _wait_for(lambda: sched.stats()["inflight"] == 1)
+
+    def run(name: str, lane: str) -> threading.Thread:
+        t = threading.Thread(target=sched.submit, args=(lambda: order.append(name),), kwargs={"priority": lane})
+        t.start()
+        return t
+
+    waiting = [run("batch-1", BATCH), run("batch-2", BATCH)]
+    _wait_for(lambda: sched.stats()["lanes"][BATCH]["queue_depth"] == 2)
+    waiting.append(run("interactive", INTERACTIVE))
+    _wait_for(lambda: sched.stats()["lanes"][INTERACTIVE]["queue_depth"] == 1)
+
+    release.set()
+    for t in [blocker, *waiting]:
+        t.join(timeout=5)
+    assert order == ["interactive", "batch-1", "batch-2"]
+
+
+def test_analyze_releases_the_slot_while_polling(monkeypatch):
+    from azure_model import scheduler as scheduler_module
+
+    sched = AzureScheduler(tps=1000, max_inflight=1)
+    monkeypatch.setattr(scheduler_module, "scheduler", sched)
+    stub  = StubDocumentIntelligenceClient(delay=0.3)
+
+    done = []
+    t = threading.Thread(target=lambda: done.append(scheduler_module.analyze(stub, "ordonnance", None)))
+    t.start()
+    _wait_for(lambda: sched.stats()["lanes"][INTERACTIVE]["dispatched"] == 1)
+    time.sleep(0.1)                      # submit accepted, poll still sleeping
+    assert sched.stats()["inflight"] == 0
+    t.join(timeout=5)
+    assert done and stub.calls == 1